@@ -116,6 +116,7 @@ class ResourceVersionListOutputSLZ(serializers.ModelSerializer):
             "title",
             "comment",
             "resource_version_display",
+            "resource_count",
             "created_time",
             "released_stages",
             "has_sdk",
@@ -147,6 +148,9 @@ class NeedNewVersionOutputSLZ(serializers.Serializer):
 class ResourceVersionDiffQueryInputSLZ(serializers.Serializer):
     source_resource_version_id = serializers.IntegerField(allow_null=True)
     target_resource_version_id = serializers.IntegerField(allow_null=True)
+    # 不指定 limit 时，返回全部对比结果
+    offset = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(min_value=1, required=False)
 
 
 class ResourceVersionResourceSLZ(serializers.Serializer):
@@ -161,3 +165,4 @@ class ResourceVersionDiffOutputSLZ(serializers.Serializer):
     add = ResourceVersionResourceSLZ()
     delete = ResourceVersionResourceSLZ()
     update = serializers.DictField(child=ResourceVersionResourceSLZ())
+    count = serializers.DictField(child=serializers.IntegerField(), required=False, help_text="分页时，各类型的总数")
@@ -63,7 +63,7 @@ class ResourceVersionListCreateApi(generics.ListCreateAPIView):
     def list(self, request, *args, **kwargs):
         data = (
             ResourceVersion.objects.filter(gateway=request.gateway)
-            .values("id", "version", "name", "title", "comment", "created_time")
+            .values("id", "version", "name", "title", "comment", "resource_count", "created_time")
             .order_by("-id")
         )
 
@@ -175,23 +175,12 @@ class ResourceVersionDiffRetrieveApi(generics.RetrieveAPIView):
         slz.is_valid(raise_exception=True)
 
         data = slz.validated_data
-        source_resource_data = ResourceVersionHandler.get_data_by_id_or_new(
-            request.gateway, data.get("source_resource_version_id")
+        diff_data = ResourceVersionHandler.diff_resource_versions(
+            request.gateway,
+            data.get("source_resource_version_id"),
+            data.get("target_resource_version_id"),
         )
+        if data.get("limit"):
+            diff_data = ResourceDifferHandler.paginate_diff(diff_data, data["offset"], data["limit"])
 
-        target_resource_data = ResourceVersionHandler.get_data_by_id_or_new(
-            request.gateway, data.get("target_resource_version_id")
-        )
-
-        return OKJsonResponse(
-            data=ResourceDifferHandler.diff_resource_version_data(
-                source_resource_data,
-                target_resource_data,
-                source_resource_doc_updated_time=ResourceDocVersion.objects.get_doc_updated_time(
-                    request.gateway.id, data.get("source_resource_version_id")
-                ),
-                target_resource_doc_updated_time=ResourceDocVersion.objects.get_doc_updated_time(
-                    request.gateway.id, data.get("target_resource_version_id")
-                ),
-            ),
-        )
+        return OKJsonResponse(data=diff_data)
@@ -17,9 +17,12 @@
 # to the current version of the project delivered to anyone in the future.
 #
 import datetime
+import json
 from collections import defaultdict
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+from cachetools import TTLCache, cached
+from django.conf import settings
 from django.utils.translation import gettext as _
 from rest_framework import serializers
 
@@ -33,10 +36,21 @@ from apigateway.biz.proxy import ProxyHandler
 from apigateway.biz.resource import ResourceHandler
 from apigateway.biz.resource_doc import ResourceDocHandler
 from apigateway.biz.resource_label import ResourceLabelHandler
+from apigateway.biz.resource_version_diff import ResourceDifferHandler
 from apigateway.biz.stage_resource_disabled import StageResourceDisabledHandler
 from apigateway.common.audit.shortcuts import record_audit_log
+from apigateway.common.constants import CACHE_TIME_24_HOURS
 from apigateway.core.constants import ContextScopeTypeEnum, ResourceVersionSchemaEnum
-from apigateway.core.models import Backend, Gateway, Proxy, Release, Resource, ResourceVersion, Stage
+from apigateway.core.models import (
+    Backend,
+    Gateway,
+    Proxy,
+    Release,
+    Resource,
+    ResourceSnapshot,
+    ResourceVersion,
+    Stage,
+)
 from apigateway.utils import time as time_utils
 from apigateway.utils.string import random_string
 
@@ -104,14 +118,79 @@ class ResourceVersionHandler:
         )
 
     @staticmethod
-    def get_data_by_id_or_new(gateway: Gateway, resource_version_id: Optional[int]) -> list:
+    def diff_resource_versions(
+        gateway: Gateway,
+        source_resource_version_id: Optional[int],
+        target_resource_version_id: Optional[int],
+    ) -> dict:
         """
-        根据版本 ID 获取 Data，或者获取当前资源列表中的版本数据
+        对比资源版本，版本 ID 为空时，使用当前资源列表中的数据
+        - 版本不会变化，因此两个版本均已生成时，缓存对比结果
         """
-        if resource_version_id:
-            return ResourceVersion.objects.get(gateway=gateway, id=resource_version_id).data
+        if source_resource_version_id and target_resource_version_id:
+            return ResourceVersionHandler._diff_released_resource_versions(
+                gateway, source_resource_version_id, target_resource_version_id
+            )
+
+        return ResourceVersionHandler._diff_resource_versions(
+            gateway, source_resource_version_id, target_resource_version_id
+        )
+
+    @staticmethod
+    @cached(
+        # 对比结果可能很大，按序列化后的字节数限制缓存大小；超过上限的结果不缓存
+        cache=TTLCache(
+            maxsize=settings.RESOURCE_VERSION_DIFF_CACHE_MAXSIZE,
+            ttl=CACHE_TIME_24_HOURS,
+            getsizeof=lambda diff: len(json.dumps(diff, default=str)),
+        ),
+        key=lambda gateway, source_resource_version_id, target_resource_version_id: (
+            gateway.id,
+            source_resource_version_id,
+            target_resource_version_id,
+        ),
+    )
+    def _diff_released_resource_versions(
+        gateway: Gateway, source_resource_version_id: int, target_resource_version_id: int
+    ) -> dict:
+        return ResourceVersionHandler._diff_resource_versions(
+            gateway, source_resource_version_id, target_resource_version_id
+        )
+
+    @staticmethod
+    def _diff_resource_versions(
+        gateway: Gateway,
+        source_resource_version_id: Optional[int],
+        target_resource_version_id: Optional[int],
+    ) -> dict:
+        source_data, source_resource_digests = ResourceVersionHandler._get_diff_data(
+            gateway, source_resource_version_id
+        )
+        target_data, target_resource_digests = ResourceVersionHandler._get_diff_data(
+            gateway, target_resource_version_id
+        )
+
+        return ResourceDifferHandler.diff_resource_version_data(
+            source_data,
+            target_data,
+            source_resource_doc_updated_time=ResourceDocVersion.objects.get_doc_updated_time(
+                gateway.id, source_resource_version_id
+            ),
+            target_resource_doc_updated_time=ResourceDocVersion.objects.get_doc_updated_time(
+                gateway.id, target_resource_version_id
+            ),
+            source_resource_digests=source_resource_digests,
+            target_resource_digests=target_resource_digests,
+        )
+
+    @staticmethod
+    def _get_diff_data(gateway: Gateway, resource_version_id: Optional[int]) -> Tuple[list, Optional[Dict[str, str]]]:
+        """获取版本数据及版本中记录的资源摘要"""
+        if not resource_version_id:
+            return ResourceVersionHandler.make_version(gateway), None
 
-        return ResourceVersionHandler.make_version(gateway)
+        resource_version = ResourceVersion.objects.get(gateway=gateway, id=resource_version_id)
+        return resource_version.data, resource_version.resource_digests or None
 
     @staticmethod
     def delete_by_gateway_id(gateway_id: int):
@@ -120,6 +199,7 @@ class ResourceVersionHandler:
 
         # delete resource version
         ResourceVersion.objects.filter(gateway_id=gateway_id).delete()
+        ResourceSnapshot.objects.filter(gateway_id=gateway_id).delete()
 
     @classmethod
     def create_resource_version(cls, gateway: Gateway, data: Dict[str, Any], username: str = "") -> ResourceVersion:
@@ -198,7 +278,10 @@ class ResourceVersionHandler:
         """
         是否需要创建新的资源版本
         """
-        latest_version = ResourceVersion.objects.get_latest_version(gateway_id)
+        # 使用版本中记录的资源数量判断，无需加载版本数据
+        latest_version = (
+            ResourceVersion.objects.filter(gateway_id=gateway_id).defer("_data", "resource_digests").last()
+        )
         resource_last_updated_time = ResourceHandler.get_last_updated_time(gateway_id)
 
         if not (latest_version or resource_last_updated_time):
@@ -215,7 +298,7 @@ class ResourceVersionHandler:
         # 版本中资源数量是否发生变化
         # some resource could be deleted
         resource_count = Resource.objects.filter(gateway_id=gateway_id).count()
-        if resource_count != len(latest_version.data):
+        if resource_count != latest_version.get_resource_count():
             return True
 
         return False
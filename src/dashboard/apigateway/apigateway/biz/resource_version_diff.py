@@ -157,7 +157,15 @@ class ResourceDifferHandler(BaseModel, DiffMixin):
         target_data: list,
         source_resource_doc_updated_time: dict,
         target_resource_doc_updated_time: dict,
+        *,
+        source_resource_digests: Optional[Dict[str, str]] = None,
+        target_resource_digests: Optional[Dict[str, str]] = None,
     ) -> dict:
+        """
+        对比版本数据，资源内容摘要相同的资源，视为无变化，仅对摘要不同的资源逐字段对比
+
+        :param source_resource_digests: 版本中记录的资源摘要，{"资源 ID": "sha256"}，未记录时直接比较资源数据
+        """
         source_key_to_value_map = {}
         target_data_map = {}
         for item in source_data:
@@ -176,14 +184,23 @@ class ResourceDifferHandler(BaseModel, DiffMixin):
         resource_update = []
 
         for resource_id, source_resource_data_raw in source_key_to_value_map.items():
-            source_resource_differ = ResourceDifferHandler.parse_obj(source_resource_data_raw)
             target_resource_data = target_data_map.pop(resource_id, None)
 
             # 目标版本中资源不存在，资源被删除
             if not target_resource_data:
-                resource_delete.append(source_resource_differ.dict())
+                resource_delete.append(ResourceDifferHandler.parse_obj(source_resource_data_raw).dict())
                 continue
 
+            # 资源内容未变化，无需逐字段对比
+            if ResourceDifferHandler._is_resource_unchanged(
+                source_resource_data_raw,
+                target_resource_data,
+                source_resource_digests,
+                target_resource_digests,
+            ):
+                continue
+
+            source_resource_differ = ResourceDifferHandler.parse_obj(source_resource_data_raw)
             target_resource_differ = ResourceDifferHandler.parse_obj(target_resource_data)
             source_diff_value, target_diff_value = source_resource_differ.diff(target_resource_differ)
 
@@ -214,3 +231,29 @@ class ResourceDifferHandler(BaseModel, DiffMixin):
             "delete": sorted(resource_delete, key=lambda x: x["path"]),
             "update": sorted(resource_update, key=lambda x: x["target"]["path"]),
         }
+
+    @staticmethod
+    def _is_resource_unchanged(
+        source_resource_data: dict,
+        target_resource_data: dict,
+        source_resource_digests: Optional[Dict[str, str]],
+        target_resource_digests: Optional[Dict[str, str]],
+    ) -> bool:
+        if source_resource_data["doc_updated_time"] != target_resource_data["doc_updated_time"]:
+            return False
+
+        key = str(source_resource_data["id"])
+        if source_resource_digests and target_resource_digests:
+            source_digest = source_resource_digests.get(key)
+            target_digest = target_resource_digests.get(key)
+            if source_digest and target_digest:
+                return source_digest == target_digest
+
+        return source_resource_data == target_resource_data
+
+    @staticmethod
+    def paginate_diff(diff_data: dict, offset: int, limit: int) -> dict:
+        """对比结果分页，add、delete、update 分别分页，并返回各自的总数"""
+        result = {key: items[offset : offset + limit] for key, items in diff_data.items()}
+        result["count"] = {key: len(items) for key, items in diff_data.items()}
+        return result
@@ -83,6 +83,9 @@ def _trigger_rolling_publish(
 ):
     """触发网关滚动更新"""
 
+    # 命令行同步用于修复微网关中的数据（如 etcd 数据恢复后），不能依据已记录的发布状态增量发布
+    force_full_sync = source is PublishSourceEnum.CLI_SYNC
+
     for release in release_list:
         if source is PublishSourceEnum.CLI_SYNC:
             release_history = ReleaseHistory()
@@ -110,13 +113,19 @@ def _trigger_rolling_publish(
 
         # 开始发布
         if is_sync:
-            return rolling_update_release(gateway_id=release.gateway.pk, publish_id=publish_id, release_id=release.pk)
+            return rolling_update_release(
+                gateway_id=release.gateway.pk,
+                publish_id=publish_id,
+                release_id=release.pk,
+                force_full_sync=force_full_sync,
+            )
 
         delay_on_commit(
             rolling_update_release,
             gateway_id=release.gateway_id,
             publish_id=publish_id,
             release_id=release.pk,
+            force_full_sync=force_full_sync,
         )
     return None
 
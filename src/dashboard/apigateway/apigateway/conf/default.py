@@ -364,6 +364,12 @@ ETCD_CONFIG = {
     "cert_cert": env.str("BK_ETCD_CERT_PATH", default=None),
     "cert_key": env.str("BK_ETCD_KEY_PATH", default=None),
 }
+# 同步资源到 etcd 时，单个事务的最大操作数、最大数据量；etcd 服务端默认限制为 128 个操作、1.5 MiB 请求大小
+ETCD_SYNC_TXN_MAX_OPS = env.int("BK_ETCD_SYNC_TXN_MAX_OPS", default=128)
+ETCD_SYNC_TXN_MAX_BYTES = env.int("BK_ETCD_SYNC_TXN_MAX_BYTES", default=1024 * 1024)
+# 增量发布：记录已分发到微网关的资源状态，下次发布时仅转换、同步变更的资源；全局配置变化或状态过期时，全量同步
+MICRO_GATEWAY_DELTA_RELEASE_ENABLED = env.bool("MICRO_GATEWAY_DELTA_RELEASE_ENABLED", default=False)
+MICRO_GATEWAY_RELEASE_STATE_TTL = env.int("MICRO_GATEWAY_RELEASE_STATE_TTL", default=7 * 24 * 3600)
 
 # celery 配置
 # 修改 Redis 连接时的 keepalive 配置，让连接更健壮
@@ -690,6 +696,20 @@ PROMETHEUS_DEFAULT_LABELS = [
 # DB 操作大小配置
 RELEASED_RESOURCE_CREATE_BATCH_SIZE = env.int("RELEASED_RESOURCE_CREATE_BATCH_SIZE", 50)
 RELEASED_RESOURCE_DOC_CREATE_BATCH_SIZE = env.int("RELEASED_RESOURCE_DOC_CREATE_BATCH_SIZE", 50)
+RESOURCE_SNAPSHOT_CREATE_BATCH_SIZE = env.int("RESOURCE_SNAPSHOT_CREATE_BATCH_SIZE", 100)
+# 按 id 等批量查询时，单次查询的最大数量
+DB_QUERY_IN_BATCH_SIZE = env.int("DB_QUERY_IN_BATCH_SIZE", 500)
+
+# 新建的资源版本，其资源数据是否去重、压缩后存储在 ResourceSnapshot 中
+RESOURCE_VERSION_SNAPSHOT_STORAGE_ENABLED = env.bool("RESOURCE_VERSION_SNAPSHOT_STORAGE_ENABLED", default=True)
+# 已解析的资源版本数据缓存：进程内缓存的最大字节数；共享缓存开启后，存入 Redis 供各进程复用
+RESOURCE_VERSION_SNAPSHOT_CACHE_MAXSIZE = env.int("RESOURCE_VERSION_SNAPSHOT_CACHE_MAXSIZE", 64 * 1024 * 1024)
+RESOURCE_VERSION_SNAPSHOT_SHARED_CACHE_ENABLED = env.bool(
+    "RESOURCE_VERSION_SNAPSHOT_SHARED_CACHE_ENABLED", default=False
+)
+RESOURCE_VERSION_SNAPSHOT_SHARED_CACHE_TTL = env.int("RESOURCE_VERSION_SNAPSHOT_SHARED_CACHE_TTL", 24 * 3600)
+# 已发布版本间对比结果的进程内缓存，按对比结果序列化后的字节数限制大小
+RESOURCE_VERSION_DIFF_CACHE_MAXSIZE = env.int("RESOURCE_VERSION_DIFF_CACHE_MAXSIZE", 16 * 1024 * 1024)
 
 # 网关资源数量限制
 MAX_STAGE_COUNT_PER_GATEWAY = env.int("MAX_STAGE_COUNT_PER_GATEWAY", 20)
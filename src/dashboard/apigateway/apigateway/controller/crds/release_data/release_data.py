@@ -88,6 +88,21 @@ class ReleaseData:
             .get()
         )
 
+    @cached_property
+    def stage_backend_configs(self) -> Dict[int, Dict[str, Any]]:
+        """
+        :return: A dict contains the configs of all backends at "stage" scope, the key is
+            the backend_id; loaded in one query, so converting resources needs no extra queries.
+        """
+        return dict(
+            BackendConfig.objects.filter(gateway_id=self.gateway.pk, stage_id=self.stage.pk).values_list(
+                "backend_id", "config"
+            )
+        )
+
+    def get_backend_config(self, backend_id: int) -> Optional[Dict[str, Any]]:
+        return self.stage_backend_configs.get(backend_id)
+
     @cached_property
     def stage_backend_config(self) -> Dict[str, Any]:
         if self.is_schema_v2:
@@ -61,6 +61,8 @@ class CustomResourceConvertor:
     include_http_resource: bool = field(default=True)
     include_service: bool = field(default=True)
     include_plugin_metadata: bool = field(default=True)
+    # 仅转换这些 ID 的资源，用于增量发布；为 None 时转换版本中的全部资源
+    resource_ids: Optional[List[int]] = field(default=None)
     # 转换后的资源
     _gateway_config: Optional[BkGatewayConfig] = field(init=False, default=None)
     _stage: Optional[BkGatewayStage] = field(init=False, default=None)
@@ -71,6 +73,10 @@ class CustomResourceConvertor:
     def __post_init__(self):
         self._release_data = ReleaseData(self.release)
 
+    @property
+    def release_data(self) -> ReleaseData:
+        return self._release_data
+
     def convert(self):
         self._iter_convert()
 
@@ -95,6 +101,7 @@ class CustomResourceConvertor:
                 self._services,
                 self.publish_id,
                 self.revoke_flag,
+                self.resource_ids,
             )
             self._http_resources = http_resource_convertor.convert()
 
@@ -16,7 +16,7 @@
 # to the current version of the project delivered to anyone in the future.
 #
 import json
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from django.utils.functional import cached_property
 
@@ -35,7 +35,7 @@ from apigateway.controller.crds.v1beta1.models.gateway_resource import (
 )
 from apigateway.controller.crds.v1beta1.models.gateway_service import BkGatewayService
 from apigateway.core.constants import ProxyTypeEnum
-from apigateway.core.models import BackendConfig, MicroGateway
+from apigateway.core.models import MicroGateway
 from apigateway.utils.time import now_str
 
 
@@ -47,11 +47,19 @@ class HttpResourceConvertor(BaseConvertor):
         gateway_service: List[BkGatewayService],
         publish_id: Union[int, None] = None,
         revoke_flag: Union[bool, None] = False,
+        resource_ids: Optional[List[int]] = None,
     ):
+        """
+        :param resource_ids: 仅转换这些 ID 的资源，为 None 时转换版本中的全部资源
+        """
         super().__init__(release_data, micro_gateway)
         self._gateway_services = gateway_service
         self._publish_id = publish_id
         self._revoke_flag = revoke_flag
+        self._resource_ids = resource_ids
+        # 多个资源通常共用同一后端、超时配置，缓存已转换的对象；key 为 (backend_id, timeout)、timeout
+        self._backend_upstreams: Dict[Tuple[int, int], Optional[Upstream]] = {}
+        self._timeout_configs: Dict[int, TimeoutConfig] = {}
 
     @cached_property
     def _default_stage_service_key(self) -> str:
@@ -65,7 +73,7 @@ class HttpResourceConvertor(BaseConvertor):
     def convert(self) -> List[BkGatewayResource]:
         resources: List[BkGatewayResource] = []
         if not self._revoke_flag:
-            for resource in self._release_data.resource_version.data:
+            for resource in self._get_resources():
                 crd = self._convert_http_resource(resource)
                 if crd:
                     resources.append(crd)
@@ -76,6 +84,13 @@ class HttpResourceConvertor(BaseConvertor):
                 resources.append(version_route_crd)
         return resources
 
+    def _get_resources(self) -> List[Dict[str, Any]]:
+        resource_version = self._release_data.resource_version
+        if self._resource_ids is None:
+            return resource_version.data
+
+        return resource_version.get_resources_data(self._resource_ids)
+
     def _convert_http_resource(self, resource: Dict[str, Any]) -> Optional[BkGatewayResource]:
         if resource["proxy"]["type"] not in [ProxyTypeEnum.HTTP.value, ProxyTypeEnum.MOCK.value]:
             return None
@@ -160,22 +175,19 @@ class HttpResourceConvertor(BaseConvertor):
 
     def _convert_http_resource_upstream(self, resource_proxy: Dict[str, Any], backend_id: int) -> Optional[Upstream]:
         # 如果是 v2，需要从 backend_config 里面去拿 upstreams
-
-        upstreams = None
-
         if self._release_data.is_schema_v2:
-            upstreams = (
-                BackendConfig.objects.filter(
-                    backend_id=backend_id,
-                    gateway_id=self._release_data.gateway.pk,
-                    stage_id=self._release_data.stage.pk,
+            key = (backend_id, self._get_http_resource_timeout(resource_proxy))
+            if key not in self._backend_upstreams:
+                self._backend_upstreams[key] = self._convert_upstream(
+                    self._release_data.get_backend_config(backend_id), resource_proxy
                 )
-                .values_list("config", flat=True)
-                .first()
-            )
-        else:
-            upstreams = resource_proxy.get("upstreams")
+            return self._backend_upstreams[key]
+
+        return self._convert_upstream(resource_proxy.get("upstreams"), resource_proxy)
 
+    def _convert_upstream(
+        self, upstreams: Optional[Dict[str, Any]], resource_proxy: Dict[str, Any]
+    ) -> Optional[Upstream]:
         if not upstreams:
             return None
 
@@ -192,15 +204,20 @@ class HttpResourceConvertor(BaseConvertor):
 
         return upstream
 
-    def _convert_http_resource_timeout(self, resource_proxy: Dict[str, Any]) -> TimeoutConfig:
+    def _get_http_resource_timeout(self, resource_proxy: Dict[str, Any]) -> int:
         # 资源没有配置则使用环境的
-        timeout = resource_proxy.get("timeout") or self._release_data.stage_backend_config.get("timeout") or 60
+        return resource_proxy.get("timeout") or self._release_data.stage_backend_config.get("timeout") or 60
 
-        return TimeoutConfig(
-            connect=timeout,
-            send=timeout,
-            read=timeout,
-        )
+    def _convert_http_resource_timeout(self, resource_proxy: Dict[str, Any]) -> TimeoutConfig:
+        timeout = self._get_http_resource_timeout(resource_proxy)
+        if timeout not in self._timeout_configs:
+            self._timeout_configs[timeout] = TimeoutConfig(
+                connect=timeout,
+                send=timeout,
+                read=timeout,
+            )
+
+        return self._timeout_configs[timeout]
 
     def _convert_http_resource_rewrite(self, resource_proxy: Dict[str, Any]) -> ResourceRewrite:
         # FIXME: 1.13 去掉这个逻辑
@@ -29,8 +29,12 @@ class BaseDistributor(ABC):
         micro_gateway: MicroGateway,
         release_task_id: Optional[str] = None,
         publish_id: Optional[int] = None,
+        force_full_sync: bool = False,
     ) -> Tuple[bool, str]:
-        """发布到微网关"""
+        """发布到微网关
+
+        :param force_full_sync: 是否强制全量同步，不依据已记录的发布状态增量发布，如：etcd 数据恢复后重新同步
+        """
         raise NotImplementedError()
 
     @abstractmethod
@@ -74,13 +74,16 @@ class CombineDistributor(BaseDistributor):
         micro_gateway: MicroGateway,
         release_task_id: Optional[str] = None,
         publish_id: Optional[int] = None,
+        force_full_sync: bool = False,
     ) -> Tuple[bool, str]:
         is_success = True
         err_msg = ""
 
         def do_distribute(distributor: BaseDistributor, gateway: MicroGateway):
             nonlocal is_success, err_msg
-            is_success, err_msg = distributor.distribute(release, gateway, release_task_id, publish_id=publish_id)
+            is_success, err_msg = distributor.distribute(
+                release, gateway, release_task_id, publish_id=publish_id, force_full_sync=force_full_sync
+            )
 
         self.foreach_distributor(release.stage, micro_gateway, do_distribute)
         return is_success, err_msg
@@ -18,10 +18,13 @@
 import logging
 from typing import Optional, Tuple
 
+from django.conf import settings
+
 from apigateway.controller.constants import DELETE_PUBLISH_ID
 from apigateway.controller.crds.v1beta1.convertor import CustomResourceConvertor
 from apigateway.controller.distributor.base import BaseDistributor
 from apigateway.controller.distributor.key_prefix import KeyPrefixHandler
+from apigateway.controller.distributor.release_state import ReleaseState, ReleaseStateStore
 from apigateway.controller.procedure_logger.release_logger import ReleaseProcedureLogger
 from apigateway.controller.registry.etcd import EtcdRegistry
 from apigateway.core.models import Gateway, MicroGateway, Release, Stage
@@ -53,6 +56,7 @@ class EtcdDistributor(BaseDistributor):
         micro_gateway: MicroGateway,
         release_task_id: Optional[str] = None,
         publish_id: Optional[int] = None,
+        force_full_sync: bool = False,
     ) -> Tuple[bool, str]:
         """将 release 发布到 micro-gateway 对应的 registry 中"""
         convertor = CustomResourceConvertor(
@@ -73,7 +77,17 @@ class EtcdDistributor(BaseDistributor):
             publish_id=publish_id,
         )
 
+        state_store = ReleaseStateStore(registry.key_prefix)
+
         try:
+            release_state, previous_state = self._get_release_states(
+                convertor, state_store, registry, force_full_sync=force_full_sync
+            )
+            changed_resource_ids = None
+            if release_state and previous_state:
+                changed_resource_ids = release_state.get_changed_resource_ids(previous_state)
+            convertor.resource_ids = changed_resource_ids
+
             # step 1: 将网关资源转换为 kubernetes 资源
             with procedure_logger.step("convert to kubernetes resources"):
                 convertor.convert()
@@ -81,17 +95,68 @@ class EtcdDistributor(BaseDistributor):
             resources = list(convertor.get_kubernetes_resources())
 
             # step 2: 将 kubernetes 资源同步到 etcd
-            with procedure_logger.step(f"sync resources(count={len(resources)}) to etcd"):
-                fail_resources = registry.sync_resources_by_key_prefix(resources)
-                if fail_resources:
-                    raise SyncFail(fail_resources)
+            if changed_resource_ids is None:
+                with procedure_logger.step(f"sync resources(count={len(resources)}) to etcd"):
+                    fail_resources = registry.sync_resources_by_key_prefix(resources)
+            else:
+                assert release_state and previous_state
+                release_state.record_resources(resources, previous_state)
+                removed_resources = release_state.get_removed_resources(previous_state)
+                with procedure_logger.step(
+                    f"patch resources(count={len(resources)}, removed={len(removed_resources)}) to etcd"
+                ):
+                    fail_resources = registry.patch_resources(resources, removed_resources)
+
+            sync_msg = f"sync resources to etcd: {registry.last_sync_stats}"
+            procedure_logger.info(sync_msg)
+            if fail_resources:
+                raise SyncFail(fail_resources)
         except Exception as e:
             fail_msg = f"distribute to etcd failed: {type(e).__name__}: {str(e)}"
             procedure_logger.exception(fail_msg)
             return False, fail_msg
 
+        if release_state:
+            if changed_resource_ids is None:
+                release_state.record_resources(resources)
+            state_store.set(release_state)
+
         return True, ""
 
+    def _get_release_states(
+        self,
+        convertor: CustomResourceConvertor,
+        state_store: ReleaseStateStore,
+        registry: EtcdRegistry,
+        force_full_sync: bool = False,
+    ) -> Tuple[Optional[ReleaseState], Optional[ReleaseState]]:
+        """获取本次发布的状态及上次发布的状态，未开启增量发布时，均为 None；需全量同步时，上次发布的状态为 None
+
+        读取后即删除已记录的状态，本次分发未成功记录新状态时，下次发布将全量同步，避免依据过期的状态增量发布
+        """
+        if not settings.MICRO_GATEWAY_DELTA_RELEASE_ENABLED:
+            # 未开启时仍删除已记录的状态，避免再次开启后，依据期间未更新的状态增量发布
+            state_store.delete()
+            return None, None
+
+        release_state = ReleaseState.from_release_data(convertor.release_data)
+        previous_state = None if force_full_sync else state_store.get()
+        state_store.delete()
+
+        # etcd 数据被清空、恢复或在外部修改后，已记录的状态与 etcd 中的数据不一致，需全量同步
+        if release_state and previous_state:
+            key_count = registry.count_by_key_prefix()
+            if key_count != previous_state.get_key_count():
+                logger.warning(
+                    "release state of %s does not match registry, expected %s keys, got %s, sync fully",
+                    registry.key_prefix,
+                    previous_state.get_key_count(),
+                    key_count,
+                )
+                previous_state = None
+
+        return release_state, previous_state
+
     def revoke(
         self,
         release: Release,
@@ -101,6 +166,8 @@ class EtcdDistributor(BaseDistributor):
     ) -> Tuple[bool, str]:
         """撤销已发布到 micro-gateway 对应的 registry 中的配置"""
         registry = self._get_registry(release.gateway, release.stage, micro_gateway)
+        # 已发布的资源被删除，下次发布需全量同步
+        ReleaseStateStore(registry.key_prefix).delete()
 
         # 删除所有相关数据
         if publish_id == DELETE_PUBLISH_ID:
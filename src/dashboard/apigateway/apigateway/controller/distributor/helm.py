@@ -187,8 +187,9 @@ class HelmDistributor(BaseDistributor):
         micro_gateway: MicroGateway,
         release_task_id: Optional[str] = None,
         publish_id: Optional[int] = None,
+        force_full_sync: bool = False,
     ) -> Tuple[bool, str]:
-        """将 release 通过 bcs helm manager 发布"""
+        """将 release 通过 bcs helm manager 发布，每次均全量发布"""
         bcs_info = MicroGatewayBcsInfo.from_micro_gateway_config(micro_gateway.config)
         context: HelmReleaseContext = self._convert_release_context(release, micro_gateway)
         template_dir = os.path.join(settings.BASE_DIR, "templates", "controller", "v1beta1", "crd-chart")
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+"""
+已分发到微网关的发布状态，用于增量发布
+
+每次分发成功后，记录各资源转换输入的摘要及转换后的资源名称；下次分发时，仅转换摘要有变化的资源，
+并删除不再存在的资源。全局配置（如版本数据格式、环境后端配置）变化时，需全量同步
+"""
+import hashlib
+import json
+import logging
+import zlib
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+
+from apigateway.controller.crds.base import KubernetesResource
+from apigateway.controller.crds.release_data.release_data import ReleaseData
+from apigateway.controller.crds.v1beta1.models.gateway_resource import BkGatewayResource
+from apigateway.utils.redis_utils import get_default_redis_client, get_redis_key
+
+logger = logging.getLogger(__name__)
+
+# 转换逻辑变化，导致已记录的状态不再适用时，修改此版本
+RELEASE_STATE_FORMAT_VERSION = "v1"
+
+
+def _get_digest(data: Any) -> str:
+    content = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ReleaseState:
+    # 影响所有资源转换结果的配置摘要
+    global_digest: str
+    # 资源 ID -> 资源转换输入（版本中资源数据、资源插件）的摘要
+    resource_digests: Dict[str, str]
+    # 资源 ID -> 转换后 BkGatewayResource 的名称；资源未转换（如：在环境中禁用）时不记录
+    resource_names: Dict[str, str] = field(default_factory=dict)
+    # 除版本中资源外的其它转换结果，[kind, name]
+    other_resources: List[List[str]] = field(default_factory=list)
+
+    @classmethod
+    def from_release_data(cls, release_data: ReleaseData) -> Optional["ReleaseState"]:
+        """根据待发布的数据生成状态，版本中未记录资源摘要时，返回 None"""
+        resource_version = release_data.resource_version
+        if not resource_version.resource_digests:
+            return None
+
+        stage_backend_config = (
+            release_data.stage_backend_configs if release_data.is_schema_v2 else release_data.stage_backend_config
+        )
+        global_digest = _get_digest(
+            {
+                "format_version": RELEASE_STATE_FORMAT_VERSION,
+                "schema_version": resource_version.schema_version,
+                "stage_backend_config": stage_backend_config,
+            }
+        )
+
+        resource_digests = {}
+        for resource_id, digest in resource_version.resource_digests.items():
+            plugins = [[plugin.name, plugin.config] for plugin in release_data.get_resource_plugins(int(resource_id))]
+            resource_digests[resource_id] = _get_digest([digest, plugins])
+
+        return cls(global_digest=global_digest, resource_digests=resource_digests)
+
+    def get_changed_resource_ids(self, previous_state: "ReleaseState") -> Optional[List[int]]:
+        """与上次发布相比，新增或变更的资源 ID；全局配置变化时返回 None，需全量同步"""
+        if previous_state.global_digest != self.global_digest:
+            return None
+
+        return sorted(
+            int(resource_id)
+            for resource_id, digest in self.resource_digests.items()
+            if previous_state.resource_digests.get(resource_id) != digest
+        )
+
+    def record_resources(
+        self, resources: Iterable[KubernetesResource], previous_state: Optional["ReleaseState"] = None
+    ):
+        """记录转换后的资源；增量发布时，未变更的资源沿用上次发布的记录"""
+        if previous_state is not None:
+            self.resource_names = {
+                resource_id: name
+                for resource_id, name in previous_state.resource_names.items()
+                if previous_state.resource_digests.get(resource_id) == self.resource_digests.get(resource_id)
+            }
+
+        self.other_resources = []
+        for resource in resources:
+            resource_id = str(resource.spec.id) if isinstance(resource, BkGatewayResource) else ""
+            if resource_id in self.resource_digests:
+                self.resource_names[resource_id] = resource.metadata.name
+            else:
+                self.other_resources.append([resource.kind, resource.metadata.name])
+
+    def get_removed_resources(self, previous_state: "ReleaseState") -> List[Tuple[str, str]]:
+        """上次发布中存在，本次发布中不再存在的资源 (kind, name)，如：删除、改名、在环境中禁用的资源"""
+        return sorted(previous_state._get_resource_keys() - self._get_resource_keys())
+
+    def get_key_count(self) -> int:
+        """发布成功后，registry 中 key_prefix 下应有的 key 数量，用于低成本地校验状态与 registry 中的数据是否一致"""
+        return len(self._get_resource_keys())
+
+    def _get_resource_keys(self) -> Set[Tuple[str, str]]:
+        keys = {(BkGatewayResource.kind, name) for name in self.resource_names.values()}
+        keys.update((kind, name) for kind, name in self.other_resources)
+        return keys
+
+    def dumps(self) -> bytes:
+        return zlib.compress(json.dumps(asdict(self)).encode("utf-8"))
+
+    @classmethod
+    def loads(cls, data: bytes) -> "ReleaseState":
+        return cls(**json.loads(zlib.decompress(data)))
+
+
+class ReleaseStateStore:
+    """按 registry 的 key_prefix 存储发布状态；状态不可用时，调用方应全量同步"""
+
+    def __init__(self, key_prefix: str):
+        self._key = get_redis_key(f"controller:release_state:{RELEASE_STATE_FORMAT_VERSION}:{key_prefix}")
+
+    def get(self) -> Optional[ReleaseState]:
+        try:
+            client = get_default_redis_client()
+            data = client.get(self._key) if client else None
+            return ReleaseState.loads(data) if data else None
+        except Exception:
+            logger.exception("get release state %s failed", self._key)
+            return None
+
+    def set(self, state: ReleaseState):
+        try:
+            client = get_default_redis_client()
+            if client:
+                client.set(self._key, state.dumps(), ex=settings.MICRO_GATEWAY_RELEASE_STATE_TTL)
+        except Exception:
+            logger.exception("set release state %s failed", self._key)
+
+    def delete(self):
+        try:
+            client = get_default_redis_client()
+            if client:
+                client.delete(self._key)
+        except Exception:
+            logger.exception("delete release state %s failed", self._key)
@@ -16,36 +16,23 @@
 # to the current version of the project delivered to anyone in the future.
 #
 import logging
-from multiprocessing import Pool
 from typing import List, Optional
 
 from django.core.management.base import BaseCommand, CommandError
 
-from apigateway.common.release import publish
-from apigateway.core.constants import GatewayStatusEnum, PublishSourceEnum
-from apigateway.core.models import Gateway
+from apigateway.controller.release_syncer import (
+    GatewaySyncResult,
+    ReleaseSyncer,
+    SyncCheckpoint,
+    estimate,
+    get_sync_tasks,
+)
 
 logger = logging.getLogger(__name__)
 
 POOL_SIZE = 10
 
 
-def sync_gateway(gateway):
-    # https://groups.google.com/g/django-users/c/eCAIY9DAfG0
-    from django.db import connection
-
-    connection.close()
-
-    print(f"syncing release for gateway {gateway.name} ...")
-    ok = publish.trigger_gateway_publish(PublishSourceEnum.CLI_SYNC, author="cli", gateway_id=gateway.id, is_sync=True)
-    if not ok:
-        print(f"[ERROR] syncing release for gateway {gateway.name} failed")
-        return gateway.name
-
-    print(f"[INFO] syncing release for gateway {gateway.name} success")
-    return None
-
-
 class Command(BaseCommand):
     """同步已发布的资源到共享网关，只对存在且Activate状态的stage进行同步处理，非Activate stage与曾被删除的stage将忽略"""
 
@@ -53,18 +40,57 @@ class Command(BaseCommand):
         parser.add_argument(
             "--gateway-names", dest="gateway_names", nargs="*", help="gateway names, default is all micro apis"
         )
+        parser.add_argument("--processes", type=int, default=POOL_SIZE, help="number of worker processes")
+        parser.add_argument("--retries", type=int, default=1, help="retry times for each failed stage")
+        parser.add_argument(
+            "--checkpoint-file",
+            dest="checkpoint_file",
+            default=None,
+            help="file to record the result of each gateway, used with --resume",
+        )
+        parser.add_argument(
+            "--resume", action="store_true", default=False, help="skip gateways succeeded in the checkpoint file"
+        )
+        parser.add_argument(
+            "--dry-run", dest="dry_run", action="store_true", default=False, help="only print the estimate"
+        )
 
-    def handle(self, gateway_names: Optional[List[str]], *args, **options):
-        gateways = Gateway.objects.filter(status=GatewayStatusEnum.ACTIVE.value)
-        if gateway_names:
-            gateways = gateways.filter(name__in=gateway_names)
-
-        failed_gateway_names = []
-        with Pool(POOL_SIZE) as pool:
-            failed_gateway_names = pool.map(sync_gateway, gateways)
-            failed_gateway_names = [name for name in failed_gateway_names if name is not None]
-
+    def handle(
+        self,
+        gateway_names: Optional[List[str]],
+        processes: int,
+        retries: int,
+        checkpoint_file: Optional[str],
+        resume: bool,
+        dry_run: bool,
+        *args,
+        **options,
+    ):
+        tasks = get_sync_tasks(gateway_names)
+        checkpoint = SyncCheckpoint.load(checkpoint_file, resume=resume)
+
+        self.stdout.write(f"estimate: {estimate(tasks, processes, checkpoint)}")
+        if dry_run:
+            return
+
+        syncer = ReleaseSyncer(processes, checkpoint, retries=retries, on_result=self._print_result)
+        results = syncer.sync(tasks)
+
+        failed_gateway_names = [result.gateway_name for result in results if not result.ok]
         if len(failed_gateway_names) != 0:
             raise CommandError("failed gateway: {}".format(", ".join(failed_gateway_names)))
 
-        print("syncing gateway succeeded")
+        self.stdout.write("syncing gateway succeeded")
+
+    def _print_result(self, finished: int, total: int, result: GatewaySyncResult):
+        if result.ok:
+            self.stdout.write(
+                f"[INFO] [{finished}/{total}] syncing release for gateway {result.gateway_name} success, "
+                f"duration={result.duration:.2f}s, attempts={result.attempts}"
+            )
+            return
+
+        self.stdout.write(
+            f"[ERROR] [{finished}/{total}] syncing release for gateway {result.gateway_name} failed, "
+            f"duration={result.duration:.2f}s, attempts={result.attempts}, error={result.error}"
+        )
@@ -17,13 +17,27 @@
 #
 import logging
 from abc import ABC, abstractmethod
-from typing import ClassVar, Iterable, List, Type
+from dataclasses import dataclass
+from typing import ClassVar, Iterable, List, Tuple, Type
 
 from apigateway.controller.crds.base import KubernetesResource
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class SyncStats:
+    """一次同步中，写入、未变更、删除及失败的 key 数量"""
+
+    written: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    failed: int = 0
+
+    def __str__(self):
+        return f"written={self.written}, unchanged={self.unchanged}, deleted={self.deleted}, failed={self.failed}"
+
+
 class Registry(ABC):
     """配置注册中心，本质上是一个 KV 结构的存储，可以同时存储多种类型的资源，并可以进行迭代，修改和查询等操作"""
 
@@ -35,6 +49,8 @@ class Registry(ABC):
         """
         # key_prefix 应以 / 结尾，防止筛选数据出现错误；如 key_prefix 为 /foo 时，不应该过滤出 /foo2 的数据
         self.key_prefix = key_prefix if key_prefix.endswith("/") else f"{key_prefix}/"
+        # 最近一次同步资源的统计
+        self.last_sync_stats = SyncStats()
 
     @abstractmethod
     def apply_resource(self, resource: KubernetesResource) -> bool:
@@ -49,11 +65,27 @@ class Registry(ABC):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def patch_resources(
+        self, resources: List[KubernetesResource], removed_resources: List[Tuple[str, str]]
+    ) -> List[KubernetesResource]:
+        """写入指定的资源，并删除 removed_resources 中的资源，key_prefix 下的其它资源保持不变
+
+        :param removed_resources: 待删除资源的 (kind, name)
+        :return: 返回同步失败的资源列表
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     def delete_resources_by_key_prefix(self):
         """删除 key_prefix 下的所有资源"""
         raise NotImplementedError()
 
+    @abstractmethod
+    def count_by_key_prefix(self) -> int:
+        """获取 key_prefix 下的 key 数量"""
+        raise NotImplementedError()
+
     @abstractmethod
     def iter_by_type(self, resource_type: Type[KubernetesResource]) -> Iterable[KubernetesResource]:
         """获取 key_prefix 下，指定类型的资源"""
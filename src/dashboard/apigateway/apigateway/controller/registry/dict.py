@@ -17,7 +17,7 @@
 #
 import logging
 from copy import deepcopy
-from typing import ClassVar, Dict, Iterable, List, Type
+from typing import ClassVar, Dict, Iterable, List, Tuple, Type
 
 from apigateway.controller.crds.base import KubernetesResource
 from apigateway.controller.registry.base import Registry
@@ -46,9 +46,23 @@ class DictRegistry(Registry):
 
         return []
 
+    def patch_resources(
+        self, resources: List[KubernetesResource], removed_resources: List[Tuple[str, str]]
+    ) -> List[KubernetesResource]:
+        for resource in resources:
+            self.apply_resource(resource)
+
+        for kind, name in removed_resources:
+            self._registry_dict.pop(self._get_key(kind, name), None)
+
+        return []
+
     def delete_resources_by_key_prefix(self):
         self._registry_dict.clear()
 
+    def count_by_key_prefix(self) -> int:
+        return sum(1 for key in self._registry_dict if key.startswith(self.key_prefix))
+
     def iter_by_type(self, resource_type: Type[KubernetesResource]) -> Iterable[KubernetesResource]:
         kind_key_prefix = self._get_kind_key_prefix(resource_type.kind)
         for key, resource in self._registry_dict.items():
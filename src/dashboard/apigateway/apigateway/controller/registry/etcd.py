@@ -15,20 +15,45 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 #
+import hashlib
 import logging
-from typing import ClassVar, Dict, Iterable, List, Optional, Type
+from dataclasses import dataclass
+from typing import Any, ClassVar, Dict, Iterable, List, Optional, Tuple, Type, Union
 
 import etcd3
-from django.utils.encoding import force_str
+from django.conf import settings
+from django.utils.encoding import force_bytes, force_str
 
 from apigateway.controller.crds.base import KubernetesResource
-from apigateway.controller.registry.base import Registry
+from apigateway.controller.registry.base import Registry, SyncStats
 from apigateway.utils.etcd import get_etcd_client
 from apigateway.utils.yaml import yaml_dumps, yaml_loads
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class ExistValue:
+    """etcd 中已存在的数据，仅保存内容摘要及修改版本"""
+
+    digest: str
+    mod_revision: int
+
+
+@dataclass
+class _TxnOperation:
+    key: str
+    # 待写入的数据，为 None 时表示删除
+    payload: Optional[str]
+    # key 已存在时的修改版本，为 None 时表示 key 不存在
+    mod_revision: Optional[int]
+    resource: Optional[KubernetesResource] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.key) + (len(force_bytes(self.payload)) if self.payload else 0)
+
+
 class EtcdRegistry(Registry):
     """Etcd 注册配置中心，数据实际存储在 etcd 中"""
 
@@ -48,38 +73,162 @@ class EtcdRegistry(Registry):
         return True
 
     def sync_resources_by_key_prefix(self, resources: List[KubernetesResource]) -> List[KubernetesResource]:
-        """按 key_prefix 同步资源，若 key_prefix 下的资源不在待同步资源列表中，将被删除；返回同步失败的资源列表"""
-        sync_fail_resources = []
-        remaining_keys = self._get_exist_keys_by_key_prefix()
+        """按 key_prefix 同步资源，若 key_prefix 下的资源不在待同步资源列表中，将被删除；返回同步失败的资源列表
+
+        仅写入内容有变更的资源，并按修改版本比较后，分批在事务中写入；
+        若事务中的 key 已被其它发布修改，则该批次的资源同步失败
+        """
+        stats = SyncStats()
+        remaining_values = self._get_exist_values_by_key_prefix()
+        operations = []
 
         for resource in resources:
             key = self._get_key(resource.kind, resource.metadata.name)
-            remaining_keys.pop(key, None)
-            if not self.apply_resource(resource):
-                sync_fail_resources.append(resource)
-
-        for key in remaining_keys:
-            if not self._delete_by_key(key):
-                logger.warning(
-                    "failed to remove key [%s] from registry %s",
-                    key,
-                    self.registry_type,
-                )
+            operation = self._get_put_operation(key, resource, remaining_values.pop(key, None))
+            if operation is None:
+                stats.unchanged += 1
+                continue
+
+            operations.append(operation)
+
+        for key, exist_value in remaining_values.items():
+            operations.append(_TxnOperation(key=key, payload=None, mod_revision=exist_value.mod_revision))
+
+        return self._commit_sync_operations(operations, stats)
+
+    def patch_resources(
+        self, resources: List[KubernetesResource], removed_resources: List[Tuple[str, str]]
+    ) -> List[KubernetesResource]:
+        """写入指定的资源，并删除 removed_resources 中的资源，key_prefix 下的其它资源保持不变；返回同步失败的资源列表
+
+        仅读取涉及的 key，写入方式与 sync_resources_by_key_prefix 相同
+        """
+        stats = SyncStats()
+        operations = []
+
+        for resource in resources:
+            key = self._get_key(resource.kind, resource.metadata.name)
+            operation = self._get_put_operation(key, resource, self._get_exist_value(key))
+            if operation is None:
+                stats.unchanged += 1
+                continue
+
+            operations.append(operation)
+
+        for kind, name in removed_resources:
+            key = self._get_key(kind, name)
+            exist_value = self._get_exist_value(key)
+            if exist_value:
+                operations.append(_TxnOperation(key=key, payload=None, mod_revision=exist_value.mod_revision))
+
+        return self._commit_sync_operations(operations, stats)
+
+    def _get_put_operation(
+        self, key: str, resource: KubernetesResource, exist_value: Optional[ExistValue]
+    ) -> Optional[_TxnOperation]:
+        """获取写入资源的操作，资源内容未变更时返回 None"""
+        payload = yaml_dumps(resource.dict(by_alias=True))
+        if exist_value and exist_value.digest == self._get_digest(payload):
+            return None
+
+        return _TxnOperation(
+            key=key,
+            payload=payload,
+            mod_revision=exist_value.mod_revision if exist_value else None,
+            resource=resource,
+        )
+
+    def _commit_sync_operations(self, operations: List[_TxnOperation], stats: SyncStats) -> List[KubernetesResource]:
+        sync_fail_resources = []
+        for batch in self._split_operations(operations):
+            if self._commit_operations(batch):
+                stats.written += sum(1 for op in batch if op.payload is not None)
+                stats.deleted += sum(1 for op in batch if op.payload is None)
+                continue
+
+            stats.failed += len(batch)
+            sync_fail_resources.extend(op.resource for op in batch if op.resource is not None)
+            logger.warning(
+                "keys changed during sync, failed to commit %s operations to registry %s: %s",
+                len(batch),
+                self.registry_type,
+                [op.key for op in batch],
+            )
+
+        self.last_sync_stats = stats
+        logger.info("sync resources to registry %s by key_prefix %s: %s", self.registry_type, self.key_prefix, stats)
 
         return sync_fail_resources
 
-    def _get_exist_keys_by_key_prefix(self) -> Dict[str, bool]:
-        exist_keys: Dict[str, bool] = {}
+    def _get_exist_value(self, key: str) -> Optional[ExistValue]:
+        value, kv_metadata = self._etcd_client.get(key)
+        if value is None:
+            return None
+
+        return ExistValue(digest=self._get_digest(value), mod_revision=kv_metadata.mod_revision)
+
+    def _get_exist_values_by_key_prefix(self) -> Dict[str, ExistValue]:
+        exist_values: Dict[str, ExistValue] = {}
+
+        for value, kv_metadata in self._etcd_client.get_prefix(self.key_prefix):
+            exist_values[force_str(kv_metadata.key)] = ExistValue(
+                digest=self._get_digest(value),
+                mod_revision=kv_metadata.mod_revision,
+            )
 
-        for _, kv_metadata in self._etcd_client.get_prefix(self.key_prefix, keys_only=True):
-            exist_keys[force_str(kv_metadata.key)] = True
+        return exist_values
 
-        return exist_keys
+    def _get_digest(self, value: Union[str, bytes]) -> str:
+        return hashlib.sha256(force_bytes(value)).hexdigest()
+
+    def _split_operations(self, operations: List[_TxnOperation]) -> Iterable[List[_TxnOperation]]:
+        """按事务的最大操作数、最大数据量拆分"""
+        batch: List[_TxnOperation] = []
+        batch_size = 0
+
+        for operation in operations:
+            if batch and (
+                len(batch) >= settings.ETCD_SYNC_TXN_MAX_OPS
+                or batch_size + operation.size > settings.ETCD_SYNC_TXN_MAX_BYTES
+            ):
+                yield batch
+                batch = []
+                batch_size = 0
+
+            batch.append(operation)
+            batch_size += operation.size
+
+        if batch:
+            yield batch
+
+    def _commit_operations(self, operations: List[_TxnOperation]) -> bool:
+        """在一个事务中提交，key 的修改版本与读取时一致才会执行；返回事务是否成功"""
+        transactions = self._etcd_client.transactions
+        compare: List[Any] = []
+        success: List[Any] = []
+
+        for op in operations:
+            if op.mod_revision is None:
+                compare.append(transactions.create(op.key) == 0)
+            else:
+                compare.append(transactions.mod(op.key) == op.mod_revision)
+
+            if op.payload is None:
+                success.append(transactions.delete(op.key))
+            else:
+                success.append(transactions.put(op.key, op.payload))
+
+        succeeded, _ = self._etcd_client.transaction(compare=compare, success=success, failure=[])
+        return succeeded
 
     def delete_resources_by_key_prefix(self):
         """删除 key_prefix 下的所有资源"""
         self._etcd_client.delete_prefix(self.key_prefix)
 
+    def count_by_key_prefix(self) -> int:
+        # 仅获取 key，不传输资源内容
+        return sum(1 for _ in self._etcd_client.get_prefix(self.key_prefix, keys_only=True))
+
     def iter_by_type(self, resource_type: Type[KubernetesResource]) -> Iterable[KubernetesResource]:
         for payload, _ in self._etcd_client.get_prefix(self._get_kind_key_prefix(resource_type.kind)):
             cr = self._deserialize_cr(resource_type, payload)
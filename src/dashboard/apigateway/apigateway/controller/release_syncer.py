@@ -0,0 +1,264 @@
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+"""
+批量同步网关已发布的配置到微网关，如 etcd 数据恢复后重建所有网关的配置
+"""
+import heapq
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from multiprocessing import Pool
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.db import connection
+from django.db.models import Count
+
+from apigateway.common.release import publish
+from apigateway.core.constants import GatewayStatusEnum, PublishSourceEnum, StageStatusEnum
+from apigateway.core.models import Release, ReleasedResource
+from apigateway.utils.etcd import use_process_etcd_client
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class GatewaySyncTask:
+    gateway_id: int
+    gateway_name: str
+    release_count: int = 0
+    resource_count: int = 0
+
+    @property
+    def weight(self) -> int:
+        """同步耗时主要取决于资源数量，每个环境额外计一个单位"""
+        return self.resource_count + self.release_count
+
+
+@dataclass
+class GatewaySyncResult:
+    gateway_name: str
+    ok: bool
+    duration: float
+    attempts: int
+    weight: int
+    error: str = ""
+
+
+@dataclass
+class SyncEstimate:
+    gateway_count: int
+    release_count: int
+    resource_count: int
+    processes: int
+    # 按资源数量分配到各 worker 后，负载最大的 worker 的资源数量
+    max_worker_weight: int
+    # 根据检查点中已完成网关的耗时估算，无历史数据时为 None
+    estimated_seconds: Optional[float] = None
+
+    def __str__(self):
+        parts = [
+            f"gateways={self.gateway_count}",
+            f"releases={self.release_count}",
+            f"resources={self.resource_count}",
+            f"processes={self.processes}",
+            f"max_worker_weight={self.max_worker_weight}",
+        ]
+        if self.estimated_seconds is not None:
+            parts.append(f"estimated_seconds={self.estimated_seconds:.1f}")
+        return ", ".join(parts)
+
+
+@dataclass
+class SyncCheckpoint:
+    """记录各网关的同步结果，中断后可跳过已成功的网关继续同步；path 为空时仅保存在内存中"""
+
+    path: Optional[str] = None
+    results: Dict[str, Dict] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Optional[str], resume: bool = False) -> "SyncCheckpoint":
+        checkpoint = cls(path=path)
+        if resume and path and os.path.exists(path):
+            with open(path) as fp:
+                checkpoint.results = json.load(fp)
+        return checkpoint
+
+    def is_succeeded(self, gateway_name: str) -> bool:
+        return self.results.get(gateway_name, {}).get("ok", False)
+
+    def record(self, result: GatewaySyncResult):
+        self.results[result.gateway_name] = asdict(result)
+        if not self.path:
+            return
+
+        # 先写入临时文件再替换，避免中断时检查点文件损坏
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as fp:
+            json.dump(self.results, fp, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get_seconds_per_weight(self) -> Optional[float]:
+        succeeded = [r for r in self.results.values() if r["ok"] and r["weight"] > 0]
+        if not succeeded:
+            return None
+        return sum(r["duration"] for r in succeeded) / sum(r["weight"] for r in succeeded)
+
+
+def get_sync_tasks(gateway_names: Optional[List[str]] = None) -> List[GatewaySyncTask]:
+    """获取启用中网关的同步任务，只同步启用中的环境"""
+    releases = Release.objects.filter(
+        gateway__status=GatewayStatusEnum.ACTIVE.value,
+        stage__status=StageStatusEnum.ACTIVE.value,
+    )
+    if gateway_names:
+        releases = releases.filter(gateway__name__in=gateway_names)
+
+    release_values = list(releases.values_list("gateway_id", "gateway__name", "resource_version_id"))
+    resource_counts = dict(
+        ReleasedResource.objects.filter(resource_version_id__in={value[2] for value in release_values})
+        .values("resource_version_id")
+        .annotate(count=Count("id"))
+        .values_list("resource_version_id", "count")
+    )
+
+    tasks: Dict[int, GatewaySyncTask] = {}
+    for gateway_id, gateway_name, resource_version_id in release_values:
+        task = tasks.setdefault(gateway_id, GatewaySyncTask(gateway_id=gateway_id, gateway_name=gateway_name))
+        task.release_count += 1
+        task.resource_count += resource_counts.get(resource_version_id, 0)
+
+    return sorted(tasks.values(), key=lambda task: task.weight, reverse=True)
+
+
+def shard_tasks(tasks: Iterable[GatewaySyncTask], shard_count: int) -> List[List[GatewaySyncTask]]:
+    """按资源数量，将任务分配给负载最小的 worker（从大到小分配），使各 worker 的负载尽量均衡"""
+    shards: List[List[GatewaySyncTask]] = [[] for _ in range(max(shard_count, 1))]
+    loads = [(0, index) for index in range(len(shards))]
+
+    for task in sorted(tasks, key=lambda task: task.weight, reverse=True):
+        load, index = heapq.heappop(loads)
+        shards[index].append(task)
+        heapq.heappush(loads, (load + task.weight, index))
+
+    return shards
+
+
+def estimate(tasks: List[GatewaySyncTask], processes: int, checkpoint: SyncCheckpoint) -> SyncEstimate:
+    max_worker_weight = max((sum(task.weight for task in shard) for shard in shard_tasks(tasks, processes)), default=0)
+    seconds_per_weight = checkpoint.get_seconds_per_weight()
+
+    return SyncEstimate(
+        gateway_count=len(tasks),
+        release_count=sum(task.release_count for task in tasks),
+        resource_count=sum(task.resource_count for task in tasks),
+        processes=processes,
+        max_worker_weight=max_worker_weight,
+        estimated_seconds=max_worker_weight * seconds_per_weight if seconds_per_weight is not None else None,
+    )
+
+
+def _init_worker():
+    # 子进程不能复用父进程的数据库连接，https://groups.google.com/g/django-users/c/eCAIY9DAfG0
+    connection.close()
+    use_process_etcd_client()
+
+
+def sync_gateway(task: GatewaySyncTask, retries: int = 0) -> GatewaySyncResult:
+    """同步网关所有启用中环境的发布，失败的环境最多重试 retries 次"""
+    started_at = time.perf_counter()
+    stage_ids = list(
+        Release.objects.filter(gateway_id=task.gateway_id, stage__status=StageStatusEnum.ACTIVE.value).values_list(
+            "stage_id", flat=True
+        )
+    )
+    errors: Dict[int, str] = {}
+
+    attempts = 0
+    while stage_ids and attempts <= retries:
+        attempts += 1
+        errors = {}
+        for stage_id in stage_ids:
+            try:
+                ok = publish.trigger_gateway_publish(
+                    PublishSourceEnum.CLI_SYNC,
+                    author="cli",
+                    gateway_id=task.gateway_id,
+                    stage_id=stage_id,
+                    is_sync=True,
+                )
+            except Exception as err:
+                logger.exception("sync release of gateway %s stage %s failed", task.gateway_name, stage_id)
+                errors[stage_id] = f"{type(err).__name__}: {err}"
+            else:
+                if not ok:
+                    errors[stage_id] = "distribute failed"
+        stage_ids = list(errors)
+
+    return GatewaySyncResult(
+        gateway_name=task.gateway_name,
+        ok=not errors,
+        duration=time.perf_counter() - started_at,
+        attempts=attempts,
+        weight=task.weight,
+        error="; ".join(f"stage_id={stage_id}: {error}" for stage_id, error in errors.items()),
+    )
+
+
+class ReleaseSyncer:
+    """多进程同步网关的发布，资源多的网关优先分配，各 worker 进程复用数据库连接、etcd client"""
+
+    def __init__(
+        self,
+        processes: int,
+        checkpoint: SyncCheckpoint,
+        retries: int = 0,
+        on_result: Optional[Callable[[int, int, GatewaySyncResult], None]] = None,
+    ):
+        """
+        :param processes: 并发的进程数，不大于 1 时在当前进程中同步
+        :param on_result: 每个网关同步完成后的回调，参数为 (已完成数量, 总数量, 同步结果)，便于输出进度
+        """
+        self.processes = processes
+        self.checkpoint = checkpoint
+        self.retries = retries
+        self.on_result = on_result
+
+    def sync(self, tasks: List[GatewaySyncTask]) -> List[GatewaySyncResult]:
+        pending_tasks = [task for task in tasks if not self.checkpoint.is_succeeded(task.gateway_name)]
+        # 从大到小分发任务，worker 空闲时获取下一个，效果等同于按资源数量分片
+        pending_tasks.sort(key=lambda task: task.weight, reverse=True)
+        func = partial(sync_gateway, retries=self.retries)
+
+        if self.processes <= 1:
+            return self._collect(map(func, pending_tasks), len(pending_tasks))
+
+        with Pool(self.processes, initializer=_init_worker) as pool:
+            return self._collect(pool.imap_unordered(func, pending_tasks), len(pending_tasks))
+
+    def _collect(self, results: Iterable[GatewaySyncResult], total: int) -> List[GatewaySyncResult]:
+        collected = []
+        for result in results:
+            collected.append(result)
+            self.checkpoint.record(result)
+            if self.on_result:
+                self.on_result(len(collected), total, result)
+
+        return collected
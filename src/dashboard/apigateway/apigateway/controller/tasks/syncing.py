@@ -30,8 +30,11 @@ logger = logging.getLogger(__name__)
 
 
 @shared_task(ignore_result=True)
-def rolling_update_release(gateway_id: int, publish_id: int, release_id: int):
-    """滚动同步微网关配置，不会生成新的版本"""
+def rolling_update_release(gateway_id: int, publish_id: int, release_id: int, force_full_sync: bool = False):
+    """滚动同步微网关配置，不会生成新的版本
+
+    :param force_full_sync: 是否强制全量同步，如：etcd 数据恢复后，通过命令行重新同步
+    """
 
     release = Release.objects.get(id=release_id)
 
@@ -69,6 +72,7 @@ def rolling_update_release(gateway_id: int, publish_id: int, release_id: int):
         micro_gateway=shared_gateway,
         release_task_id=release_task_id,
         publish_id=publish_id,
+        force_full_sync=force_full_sync,
     )
     if not is_success:
         msg = f"distribute failed: {err_msg}"
@@ -206,6 +206,13 @@ class ResourceVersionSchemaEnum(StructuredEnum):
     V2 = EnumField("2.0", "新模型版本")
 
 
+class ResourceVersionStorageEnum(StructuredEnum):
+    # data 中存储所有资源的完整数据
+    INLINE = EnumField("inline", "完整存储")
+    # data 中仅存储资源的 id、name 及快照摘要，资源数据去重、压缩后存储在 ResourceSnapshot 中
+    SNAPSHOT = EnumField("snapshot", "快照存储")
+
+
 class ProxyTypeEnum(StructuredEnum):
     HTTP = EnumField("http", "http")
     MOCK = EnumField("mock", "mock")
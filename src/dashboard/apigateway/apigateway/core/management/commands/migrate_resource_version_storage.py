@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+"""
+将完整存储的资源版本转换为快照存储，并输出转换前后的存储大小、加载耗时
+"""
+import json
+import time
+from typing import List, Optional
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import Length
+
+from apigateway.core.constants import ResourceVersionStorageEnum
+from apigateway.core.models import ResourceSnapshot, ResourceVersion
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument("--gateway-id", type=int, dest="gateway_ids", nargs="*", help="default is all gateways")
+        parser.add_argument("--dry-run", dest="dry_run", action="store_true", help="only report the inline storage")
+
+    def handle(self, gateway_ids: Optional[List[int]], dry_run: bool, **options) -> None:
+        queryset = ResourceVersion.objects.filter(storage=ResourceVersionStorageEnum.INLINE.value)
+        if gateway_ids:
+            queryset = queryset.filter(gateway_id__in=gateway_ids)
+
+        resource_version_ids = list(queryset.order_by("id").values_list("id", flat=True))
+        converted_gateway_ids = set(queryset.values_list("gateway_id", flat=True))
+
+        snapshot_size_before = self._get_snapshot_size(converted_gateway_ids)
+        inline_size = 0
+        manifest_size = 0
+        inline_load_seconds = 0.0
+        snapshot_load_seconds = 0.0
+
+        for resource_version_id in resource_version_ids:
+            started_at = time.perf_counter()
+            resource_version = ResourceVersion.objects.get(id=resource_version_id)
+            data = resource_version.data
+            inline_load_seconds += time.perf_counter() - started_at
+            inline_size += len(resource_version._data.encode("utf-8"))
+
+            if dry_run:
+                continue
+
+            with transaction.atomic():
+                resource_version.data = data
+                resource_version.save(
+                    update_fields=["_data", "storage", "resource_count", "digest", "resource_digests"]
+                )
+                manifest_size += len(resource_version._data.encode("utf-8"))
+
+                started_at = time.perf_counter()
+                converted_data = ResourceVersion.objects.get(id=resource_version_id).data
+                snapshot_load_seconds += time.perf_counter() - started_at
+
+                # 转换后的数据应与原数据一致，否则回滚
+                if json.dumps(converted_data, sort_keys=True) != json.dumps(data, sort_keys=True):
+                    raise ValueError(f"resource_version[id={resource_version_id}] data changed after converting")
+
+        self.stdout.write(f"resource versions: {len(resource_version_ids)}, converted: {not dry_run}")
+        self.stdout.write(f"inline storage: {inline_size} bytes, load: {inline_load_seconds:.3f}s")
+        if dry_run:
+            return
+
+        snapshot_size = manifest_size + self._get_snapshot_size(converted_gateway_ids) - snapshot_size_before
+        self.stdout.write(f"snapshot storage: {snapshot_size} bytes, load: {snapshot_load_seconds:.3f}s")
+
+    def _get_snapshot_size(self, gateway_ids) -> int:
+        return (
+            ResourceSnapshot.objects.filter(gateway_id__in=gateway_ids)
+            .aggregate(size=Sum(Length("_data")))
+            .get("size")
+            or 0
+        )
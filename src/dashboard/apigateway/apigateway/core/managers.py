@@ -38,6 +38,7 @@ from apigateway.core.constants import (
     SSLCertificateBindingScopeTypeEnum,
     StageStatusEnum,
 )
+from apigateway.utils.list import chunk_list
 from apigateway.utils.time import now_datetime
 
 # - managers.py 下面不能存在跨 models 的操作，每个 manager 只关心自己的逻辑 (避免循环引用)
@@ -214,6 +215,36 @@ class ResourceVersionManager(models.Manager):
         return qs.values("id", "version", "title", "comment")
 
 
+class ResourceSnapshotManager(models.Manager):
+    def save_snapshots(self, gateway_id: int, snapshots: Dict[str, bytes]) -> List[str]:
+        """保存网关下尚不存在的快照，返回新增快照的摘要
+
+        :param snapshots: 快照摘要到压缩数据的映射
+        """
+        exist_digests = set(self.get_data_by_digests(gateway_id, list(snapshots), digest_only=True))
+        new_digests = [digest for digest in snapshots if digest not in exist_digests]
+
+        self.bulk_create(
+            [self.model(gateway_id=gateway_id, digest=digest, _data=snapshots[digest]) for digest in new_digests],
+            batch_size=settings.RESOURCE_SNAPSHOT_CREATE_BATCH_SIZE,
+            # 并发创建相同内容的版本时，快照可能已被其它请求创建
+            ignore_conflicts=True,
+        )
+        return new_digests
+
+    def get_data_by_digests(self, gateway_id: int, digests: List[str], digest_only: bool = False) -> Dict[str, bytes]:
+        """获取快照摘要到压缩数据的映射，digest_only 为 True 时不加载数据，映射的值为空"""
+        data: Dict[str, bytes] = {}
+        for chunk_digests in chunk_list(digests, settings.DB_QUERY_IN_BATCH_SIZE):
+            queryset = self.filter(gateway_id=gateway_id, digest__in=chunk_digests)
+            if digest_only:
+                data.update((digest, b"") for digest in queryset.values_list("digest", flat=True))
+            else:
+                data.update((digest, bytes(value)) for digest, value in queryset.values_list("digest", "_data"))
+
+        return data
+
+
 class ReleaseManager(models.Manager):
     def get_released_stages(self, gateway=None, resource_version_ids=None):
         # 查询版本信息，并按照版本 ID 排序
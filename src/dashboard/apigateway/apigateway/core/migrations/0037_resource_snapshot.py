@@ -0,0 +1,58 @@
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+# Generated by Django 3.2.18 on 2023-09-10 10:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django_add_default_value import AddDefaultValue
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0036_auto_20230902_1307'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResourceSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(help_text='sha256 of the resource snapshot', max_length=64)),
+                ('_data', models.BinaryField(db_column='data', help_text='zlib compressed json of the resource snapshot')),
+                ('created_time', models.DateTimeField(auto_now_add=True)),
+                ('gateway', models.ForeignKey(db_column='api_id', on_delete=django.db.models.deletion.CASCADE, to='core.gateway')),
+            ],
+            options={
+                'verbose_name': 'ResourceSnapshot',
+                'verbose_name_plural': 'ResourceSnapshot',
+                'db_table': 'core_resource_snapshot',
+                'unique_together': {('gateway', 'digest')},
+            },
+        ),
+        migrations.AddField(
+            model_name='resourceversion',
+            name='storage',
+            field=models.CharField(choices=[('inline', '完整存储'), ('snapshot', '快照存储')], default='inline', max_length=16),
+        ),
+        AddDefaultValue(
+            model_name='resourceversion',
+            name='storage',
+            value='inline'
+        ),
+    ]
@@ -0,0 +1,54 @@
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+# Generated by Django 3.2.18 on 2023-09-16 10:00
+
+from django.db import migrations, models
+import jsonfield.fields
+from django_add_default_value import AddDefaultValue
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0037_resource_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resourceversion',
+            name='resource_count',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='resourceversion',
+            name='digest',
+            field=models.CharField(blank=True, default='', help_text='sha256 of the resources in version', max_length=64),
+        ),
+        AddDefaultValue(
+            model_name='resourceversion',
+            name='digest',
+            value=''
+        ),
+        migrations.AddField(
+            model_name='resourceversion',
+            name='resource_digests',
+            field=jsonfield.fields.JSONField(
+                blank=True, default=dict, dump_kwargs={'indent': None}, help_text='resource id to sha256 of the resource'
+            ),
+        ),
+    ]
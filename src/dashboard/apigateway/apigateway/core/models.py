@@ -16,12 +16,15 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 #
+import hashlib
 import json
 import logging
 import uuid
-from typing import List
+import zlib
+from typing import Dict, List, Optional, Tuple
 
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from jsonfield import JSONField
 from tencent_apigateway_common.i18n.field import I18nProperty
@@ -47,10 +50,12 @@ from apigateway.core.constants import (
     PublishSourceEnum,
     ReleaseStatusEnum,
     ResourceVersionSchemaEnum,
+    ResourceVersionStorageEnum,
     SSLCertificateBindingScopeTypeEnum,
     SSLCertificateTypeEnum,
     StageStatusEnum,
 )
+from apigateway.core.resource_version_cache import ResourceVersionSnapshot, get_resource_version_snapshot_cache
 from apigateway.core.utils import get_path_display
 from apigateway.schema.models import Schema
 
@@ -451,6 +456,43 @@ class Context(ConfigModelMixin):
 
 
 # ============================================ version and release ============================================
+class ResourceSnapshot(models.Model):
+    """
+    Resource snapshot in resource versions
+    deduplicated by the digest of its content in a gateway, stored compressed
+    """
+
+    gateway = models.ForeignKey(Gateway, db_column="api_id", on_delete=models.CASCADE)
+    digest = models.CharField(max_length=64, help_text="sha256 of the resource snapshot")
+    _data = models.BinaryField(db_column="data", help_text="zlib compressed json of the resource snapshot")
+    created_time = models.DateTimeField(auto_now_add=True)
+
+    objects = managers.ResourceSnapshotManager()
+
+    def __str__(self):
+        return f"<ResourceSnapshot: {self.gateway_id}/{self.digest}>"
+
+    class Meta:
+        verbose_name = "ResourceSnapshot"
+        verbose_name_plural = "ResourceSnapshot"
+        unique_together = ("gateway", "digest")
+        db_table = "core_resource_snapshot"
+
+    @property
+    def data(self) -> dict:
+        return self.decode(self._data)
+
+    @staticmethod
+    def encode(resource: dict) -> Tuple[str, bytes]:
+        """返回资源快照的摘要及压缩后的数据"""
+        content = json.dumps(resource, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        return hashlib.sha256(content).hexdigest(), zlib.compress(content)
+
+    @staticmethod
+    def decode(data: bytes) -> dict:
+        return json.loads(zlib.decompress(data))
+
+
 class ResourceVersion(TimestampedModelMixin, OperatorModelMixin):
     """
     Resource version
@@ -462,6 +504,7 @@ class ResourceVersion(TimestampedModelMixin, OperatorModelMixin):
     # todo: 1.14 删除
     title = models.CharField(max_length=128, blank=True, default="", null=True)
     comment = models.CharField(max_length=512, blank=True, null=True)
+    # storage 为 snapshot 时，仅存储资源清单 [{"id": 1, "name": "foo", "digest": "..."}]，core-api 依赖其中的 id、name
     _data = models.TextField(db_column="data")
     # 用于不同数据格式解析版本数据兼容历史数据
     schema_version = models.CharField(
@@ -469,6 +512,17 @@ class ResourceVersion(TimestampedModelMixin, OperatorModelMixin):
         choices=ResourceVersionSchemaEnum.get_choices(),
         default=ResourceVersionSchemaEnum.V1.value,
     )
+    storage = models.CharField(
+        max_length=16,
+        choices=ResourceVersionStorageEnum.get_choices(),
+        default=ResourceVersionStorageEnum.INLINE.value,
+    )
+    # 版本数据的摘要，设置 data 时生成，用于判断版本是否变化，无需解析版本数据；历史版本未记录
+    resource_count = models.IntegerField(null=True, blank=True)
+    digest = models.CharField(max_length=64, blank=True, default="", help_text="sha256 of the resources in version")
+    resource_digests = JSONField(
+        default=dict, dump_kwargs={"indent": None}, blank=True, help_text="resource id to sha256 of the resource"
+    )
 
     created_time = models.DateTimeField(null=True, blank=True)
 
@@ -476,11 +530,104 @@ class ResourceVersion(TimestampedModelMixin, OperatorModelMixin):
 
     @property
     def data(self) -> list:
-        return json.loads(self._data)
+        snapshot = self._get_cached_snapshot()
+        if snapshot is not None:
+            return snapshot.get_resources()
+
+        return self._load_data()
+
+    def _load_data(self) -> list:
+        if self.storage != ResourceVersionStorageEnum.SNAPSHOT.value:
+            return json.loads(self._data)
+
+        manifest = self.manifest
+        snapshots = self._get_snapshots([item["digest"] for item in manifest])
+        return [ResourceSnapshot.decode(snapshots[item["digest"]]) for item in manifest]
 
     @data.setter
     def data(self, data: list):
-        self._data = json.dumps(data)
+        encoded_resources = [ResourceSnapshot.encode(resource) for resource in data]
+        self._set_digests(data, [digest for digest, _ in encoded_resources])
+
+        if not settings.RESOURCE_VERSION_SNAPSHOT_STORAGE_ENABLED:
+            self.storage = ResourceVersionStorageEnum.INLINE.value
+            self._data = json.dumps(data)
+            return
+
+        manifest = []
+        # 待保存的快照，在 save 时写入
+        self._pending_snapshots: Dict[str, bytes] = {}
+        for resource, (digest, snapshot) in zip(data, encoded_resources):
+            manifest.append({"id": resource.get("id"), "name": resource.get("name"), "digest": digest})
+            self._pending_snapshots[digest] = snapshot
+
+        self.storage = ResourceVersionStorageEnum.SNAPSHOT.value
+        self._data = json.dumps(manifest)
+
+    def _set_digests(self, data: list, digests: List[str]):
+        self.resource_count = len(data)
+        # json 中 key 为字符串，因此资源 id 转换为字符串
+        self.resource_digests = {str(resource.get("id")): digest for resource, digest in zip(data, digests)}
+        self.digest = hashlib.sha256(
+            json.dumps(self.resource_digests, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        ).hexdigest()
+
+    def get_resource_count(self) -> int:
+        """版本中的资源数量，历史版本未记录时，从版本数据中统计"""
+        if self.resource_count is not None:
+            return self.resource_count
+
+        if self.storage == ResourceVersionStorageEnum.SNAPSHOT.value:
+            return len(self.manifest)
+        return len(self.data)
+
+    @property
+    def manifest(self) -> List[dict]:
+        """版本中资源快照的清单，仅 storage 为 snapshot 时有效"""
+        if self.storage != ResourceVersionStorageEnum.SNAPSHOT.value:
+            return []
+        return json.loads(self._data)
+
+    def _get_snapshots(self, digests: List[str]) -> Dict[str, bytes]:
+        snapshots = getattr(self, "_pending_snapshots", None) or {}
+        missing_digests = [digest for digest in digests if digest not in snapshots]
+        if not missing_digests:
+            return snapshots
+
+        return dict(snapshots, **ResourceSnapshot.objects.get_data_by_digests(self.gateway_id, missing_digests))
+
+    @property
+    def _snapshot_cache_key(self) -> Optional[str]:
+        """版本快照缓存的 key；未保存的版本不缓存，且 key 中包含数据校验值，避免 id 复用时读到其它版本的数据"""
+        if self.id is None or getattr(self, "_pending_snapshots", None):
+            return None
+
+        data = self._data.encode("utf-8")
+        return f"{self.id}:{len(data)}:{zlib.crc32(data)}"
+
+    def _get_cached_snapshot(self, load: bool = True) -> Optional[ResourceVersionSnapshot]:
+        """获取缓存的版本快照，load 为 False 时，不在缓存中则返回 None"""
+        key = self._snapshot_cache_key
+        if key is None:
+            return None
+
+        cache = get_resource_version_snapshot_cache()
+        if not load:
+            return cache.peek(key)
+
+        return cache.get(key, self._load_data)
+
+    def save(self, *args, **kwargs):
+        pending_snapshots = getattr(self, "_pending_snapshots", None)
+        if not pending_snapshots:
+            super().save(*args, **kwargs)
+            return
+
+        with transaction.atomic():
+            ResourceSnapshot.objects.save_snapshots(self.gateway_id, pending_snapshots)
+            super().save(*args, **kwargs)
+
+        self._pending_snapshots = {}
 
     @property
     def data_display(self) -> list:
@@ -494,13 +641,41 @@ class ResourceVersion(TimestampedModelMixin, OperatorModelMixin):
 
         return data
 
-    def get_resource_data(self, resource_id):
-        """获取资源数据"""
+    def get_resource_data(self, resource_id) -> Optional[dict]:
+        """获取资源数据，快照存储的版本未缓存时，仅加载该资源的快照"""
+        is_snapshot_storage = self.storage == ResourceVersionStorageEnum.SNAPSHOT.value
+        snapshot = self._get_cached_snapshot(load=not is_snapshot_storage)
+        if snapshot is not None:
+            return snapshot.get_resource(resource_id)
+
+        if is_snapshot_storage:
+            for item in self.manifest:
+                if item["id"] == resource_id:
+                    return ResourceSnapshot.decode(self._get_snapshots([item["digest"]])[item["digest"]])
+            return None
+
         for resource_data in self.data:
             if resource_data["id"] == resource_id:
                 return resource_data
         return None
 
+    def get_resources_data(self, resource_ids: List[int]) -> List[dict]:
+        """按 resource_ids 的顺序获取多个资源的数据，忽略版本中不存在的资源；快照存储的版本未缓存时，仅加载这些资源的快照"""
+        is_snapshot_storage = self.storage == ResourceVersionStorageEnum.SNAPSHOT.value
+        snapshot = self._get_cached_snapshot(load=not is_snapshot_storage)
+        if snapshot is not None:
+            resources = [snapshot.get_resource(resource_id) for resource_id in resource_ids]
+            return [resource for resource in resources if resource is not None]
+
+        if is_snapshot_storage:
+            id_to_item = {item["id"]: item for item in self.manifest}
+            items = [id_to_item[resource_id] for resource_id in resource_ids if resource_id in id_to_item]
+            snapshots = self._get_snapshots([item["digest"] for item in items])
+            return [ResourceSnapshot.decode(snapshots[item["digest"]]) for item in items]
+
+        id_to_resource = {resource["id"]: resource for resource in self.data}
+        return [id_to_resource[resource_id] for resource_id in resource_ids if resource_id in id_to_resource]
+
     @property
     def object_display(self):
         if not self.version:
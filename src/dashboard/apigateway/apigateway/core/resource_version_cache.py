@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+"""
+资源版本数据的快照缓存
+
+版本创建后数据不再变化，因此按版本缓存已解析的数据：进程内缓存按字节数限制大小，
+开启共享缓存时，解析后的数据压缩存入 Redis，供其它 gunicorn、celery 进程复用
+"""
+import json
+import logging
+import marshal
+import threading
+import zlib
+from typing import Callable, Dict, List, Optional
+
+from cachetools import LRUCache
+from django.conf import settings
+
+from apigateway.utils.redis_utils import get_default_redis_client, get_redis_key
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceVersionSnapshot:
+    """
+    已解析的版本数据，按资源 id 索引
+    - 资源以 marshal 序列化保存，反序列化远快于 json.loads，且每次获取均返回新的对象，调用方可以修改
+    """
+
+    def __init__(self, resources: List[dict]):
+        self._items = [marshal.dumps(resource) for resource in resources]
+        self._id_to_index = {
+            resource["id"]: index
+            for index, resource in enumerate(resources)
+            if isinstance(resource, dict) and "id" in resource
+        }
+        self.size = sum(len(item) for item in self._items)
+
+    def get_resources(self) -> List[dict]:
+        return [marshal.loads(item) for item in self._items]
+
+    def get_resource(self, resource_id: int) -> Optional[dict]:
+        index = self._id_to_index.get(resource_id)
+        if index is None:
+            return None
+        return marshal.loads(self._items[index])
+
+    def dumps(self) -> bytes:
+        """序列化为压缩的 json，用于共享缓存；marshal 格式与 python 版本相关，不适合跨进程共享"""
+        return zlib.compress(json.dumps(self.get_resources()).encode("utf-8"))
+
+    @classmethod
+    def loads(cls, data: bytes) -> "ResourceVersionSnapshot":
+        return cls(json.loads(zlib.decompress(data)))
+
+
+class ResourceVersionSnapshotCache:
+    def __init__(self):
+        self._local_cache: LRUCache = LRUCache(
+            maxsize=settings.RESOURCE_VERSION_SNAPSHOT_CACHE_MAXSIZE,
+            getsizeof=lambda snapshot: snapshot.size,
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: str, loader: Callable[[], List[dict]]) -> ResourceVersionSnapshot:
+        """获取版本快照，缓存中不存在时，调用 loader 加载版本数据
+
+        :param key: 版本的缓存 key，应能唯一标识版本的数据
+        """
+        snapshot = self.peek(key)
+        if snapshot is not None:
+            return snapshot
+
+        snapshot = ResourceVersionSnapshot(loader())
+        self._set_shared(key, snapshot)
+        self._set_local(key, snapshot)
+        return snapshot
+
+    def peek(self, key: str) -> Optional[ResourceVersionSnapshot]:
+        """获取缓存中的版本快照，不存在时返回 None"""
+        with self._lock:
+            snapshot = self._local_cache.get(key)
+        if snapshot is not None:
+            return snapshot
+
+        snapshot = self._get_shared(key)
+        if snapshot is not None:
+            self._set_local(key, snapshot)
+        return snapshot
+
+    def clear(self):
+        with self._lock:
+            self._local_cache.clear()
+
+    def _set_local(self, key: str, snapshot: ResourceVersionSnapshot):
+        # 超过缓存容量的快照不缓存
+        if snapshot.size > self._local_cache.maxsize:
+            return
+
+        with self._lock:
+            self._local_cache[key] = snapshot
+
+    def _get_shared(self, key: str) -> Optional[ResourceVersionSnapshot]:
+        if not settings.RESOURCE_VERSION_SNAPSHOT_SHARED_CACHE_ENABLED:
+            return None
+
+        try:
+            data = get_default_redis_client().get(self._get_shared_key(key))
+            return ResourceVersionSnapshot.loads(data) if data else None
+        except Exception:
+            logger.exception("get resource version snapshot %s from redis failed", key)
+            return None
+
+    def _set_shared(self, key: str, snapshot: ResourceVersionSnapshot):
+        if not settings.RESOURCE_VERSION_SNAPSHOT_SHARED_CACHE_ENABLED:
+            return
+
+        try:
+            get_default_redis_client().set(
+                self._get_shared_key(key),
+                snapshot.dumps(),
+                ex=settings.RESOURCE_VERSION_SNAPSHOT_SHARED_CACHE_TTL,
+            )
+        except Exception:
+            logger.exception("set resource version snapshot %s to redis failed", key)
+
+    def _get_shared_key(self, key: str) -> str:
+        return get_redis_key(f"resource_version_snapshot:{key}")
+
+
+_snapshot_cache: Dict[str, ResourceVersionSnapshotCache] = {}
+
+
+def get_resource_version_snapshot_cache() -> ResourceVersionSnapshotCache:
+    if "default" not in _snapshot_cache:
+        _snapshot_cache["default"] = ResourceVersionSnapshotCache()
+    return _snapshot_cache["default"]
@@ -83,7 +83,7 @@ class TestResourceVersionListOutputSLZ:
         )
 
         queryset = ResourceVersion.objects.filter(gateway=gateway).values(
-            "id", "version", "name", "title", "comment", "created_time"
+            "id", "version", "name", "title", "comment", "resource_count", "created_time"
         )
 
         slz = serializers.ResourceVersionListOutputSLZ(
@@ -114,6 +114,7 @@ class TestResourceVersionListOutputSLZ:
                 "title": resource_version.title,
                 "comment": resource_version.comment,
                 "resource_version_display": "1.0.1(test)",
+                "resource_count": resource_version.resource_count,
                 "has_sdk": False,
                 "sdk_count": 0,
                 "released_stages": [
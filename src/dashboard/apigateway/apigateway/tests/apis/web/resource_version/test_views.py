@@ -79,6 +79,7 @@ class TestResourceVersionListCreateApi:
                 "title": resource_version.title,
                 "comment": resource_version.comment,
                 "resource_version_display": "1.0.1(test)",
+                "resource_count": resource_version.resource_count,
                 "has_sdk": True,
                 "sdk_count": 1,
                 "created_time": dummy_time.str,
@@ -171,6 +172,7 @@ class TestResourceVersionNeedNewVersionRetrieveApi:
             gateway=gateway_4,
             created_time=dummy_time.time + datetime.timedelta(seconds=10),
             _data=json.dumps([{"id": 1}]),
+            resource_count=None,
         )
 
         gateway_5 = create_gateway()
@@ -180,6 +182,7 @@ class TestResourceVersionNeedNewVersionRetrieveApi:
             gateway=gateway_5,
             created_time=dummy_time.time + datetime.timedelta(seconds=10),
             _data=json.dumps([{"id": 1}]),
+            resource_count=None,
         )
         G(ResourceDoc, gateway=gateway_5, updated_time=dummy_time.time + datetime.timedelta(seconds=20))
         G(
@@ -189,6 +192,17 @@ class TestResourceVersionNeedNewVersionRetrieveApi:
             _data=json.dumps([{"id": 1}]),
         )
 
+        # resource deleted, the resource count in version is changed
+        gateway_6 = create_gateway()
+        G(Resource, gateway=gateway_6, updated_time=dummy_time.time)
+        G(
+            ResourceVersion,
+            gateway=gateway_6,
+            created_time=dummy_time.time + datetime.timedelta(seconds=10),
+            _data=json.dumps([{"id": 1}, {"id": 2}]),
+            resource_count=2,
+        )
+
         data = [
             {
                 "gateway": gateway_1,
@@ -219,6 +233,12 @@ class TestResourceVersionNeedNewVersionRetrieveApi:
                     "need_new_version": True,
                 },
             },
+            {
+                "gateway": gateway_6,
+                "expected": {
+                    "need_new_version": True,
+                },
+            },
         ]
 
         for test in data:
@@ -65,6 +65,25 @@ class TestResourceVersionHandler:
         ResourceVersionHandler.create_resource_version(gateway, {"comment": "test"}, "admin")
         assert ResourceVersion.objects.filter(gateway=gateway).count() == 1
 
+    def test_diff_resource_versions(self, mocker, fake_resource):
+        gateway = fake_resource.gateway
+        source = ResourceVersionHandler.create_resource_version(gateway, {"comment": "test"}, "admin")
+        target = ResourceVersionHandler.create_resource_version(gateway, {"comment": "test"}, "admin")
+
+        result = ResourceVersionHandler.diff_resource_versions(gateway, source.id, None)
+        assert result == {"add": [], "delete": [], "update": []}
+
+        mock_diff = mocker.patch(
+            "apigateway.biz.resource_version.ResourceDifferHandler.diff_resource_version_data",
+            return_value={"add": [], "delete": [], "update": []},
+        )
+        # 版本不会变化，对比结果被缓存
+        for _ in range(2):
+            result = ResourceVersionHandler.diff_resource_versions(gateway, source.id, target.id)
+            assert result == {"add": [], "delete": [], "update": []}
+        mock_diff.assert_called_once()
+        assert mock_diff.call_args[1]["source_resource_digests"] == source.resource_digests
+
     @pytest.mark.parametrize(
         "gateway_id, stage_name, mocked_released_resource_version_ids, mocked_resources, expected",
         [
@@ -433,3 +433,50 @@ class TestResourceDifferHandler:
                 }
             ],
         }
+
+    @patch("apigateway.biz.resource_version_diff.ResourceDifferHandler.parse_obj")
+    def test_diff_resource_version_data_unchanged(self, mock_parse_obj):
+        source_data = [{"id": 1, "name": "n1"}, {"id": 2, "name": "n2"}]
+        target_data = [{"id": 1, "name": "n1"}, {"id": 2, "name": "n2"}]
+
+        # 摘要相同，或未记录摘要时数据相同，均不逐字段对比
+        result = ResourceDifferHandler.diff_resource_version_data(
+            source_data,
+            target_data,
+            {},
+            {},
+            source_resource_digests={"1": "a", "2": "b"},
+            target_resource_digests={"1": "a"},
+        )
+        assert result == {"add": [], "delete": [], "update": []}
+        mock_parse_obj.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "source_digests, target_digests, source_doc_updated_time, expected",
+        [
+            ({"1": "a"}, {"1": "a"}, {}, True),
+            ({"1": "a"}, {"1": "b"}, {}, False),
+            ({"1": "a"}, {"1": "a"}, {1: {"zh": "2023-01-01"}}, False),
+            (None, None, {}, False),
+        ],
+    )
+    def test_is_resource_unchanged(self, source_digests, target_digests, source_doc_updated_time, expected):
+        source_resource_data = {"id": 1, "name": "n1", "doc_updated_time": source_doc_updated_time.get(1, {})}
+        target_resource_data = {"id": 1, "name": "n2", "doc_updated_time": {}}
+
+        assert (
+            ResourceDifferHandler._is_resource_unchanged(
+                source_resource_data, target_resource_data, source_digests, target_digests
+            )
+            is expected
+        )
+
+    def test_paginate_diff(self):
+        diff_data = {"add": [1, 2, 3], "delete": [4], "update": []}
+
+        assert ResourceDifferHandler.paginate_diff(diff_data, 1, 1) == {
+            "add": [2],
+            "delete": [],
+            "update": [],
+            "count": {"add": 3, "delete": 1, "update": 0},
+        }
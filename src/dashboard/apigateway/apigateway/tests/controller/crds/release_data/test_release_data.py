@@ -21,6 +21,7 @@ from ddf import G
 
 from apigateway.apps.plugin.constants import PluginBindingScopeEnum
 from apigateway.apps.plugin.models import PluginBinding
+from apigateway.core.models import Backend, BackendConfig
 
 
 class TestReleaseData:
@@ -37,6 +38,14 @@ class TestReleaseData:
     def test_stage_proxy_config(self, edge_gateway_stage_context_proxy_http):
         assert self.release_data.stage_backend_config == edge_gateway_stage_context_proxy_http.config
 
+    def test_get_backend_config(self, edge_gateway, edge_gateway_stage, django_assert_num_queries):
+        backend = G(Backend, gateway=edge_gateway)
+        G(BackendConfig, gateway=edge_gateway, stage=edge_gateway_stage, backend=backend, config={"timeout": 30})
+
+        with django_assert_num_queries(1):
+            assert self.release_data.get_backend_config(backend.id) == {"timeout": 30}
+            assert self.release_data.get_backend_config(0) is None
+
     def test_get_stage_plugins(self, edge_gateway, edge_gateway_stage, edge_plugin_config, edge_plugin_type):
         G(
             PluginBinding,
@@ -34,6 +34,26 @@ class TestHttpResourceConvertor:
                 return plugin
         return None
 
+    def test_convert_http_resource_upstream_schema_v2(self, fake_http_resource_convertor, django_assert_num_queries):
+        release_data = fake_http_resource_convertor._release_data
+        release_data.__dict__.update(
+            is_schema_v2=True,
+            stage_backend_config={"timeout": 30},
+            stage_backend_configs={1: {"hosts": [{"host": "http://1.1.1.1:8080", "weight": 10}]}},
+        )
+
+        with django_assert_num_queries(0):
+            upstream = fake_http_resource_convertor._convert_http_resource_upstream({}, 1)
+            assert upstream.nodes[0].host == "1.1.1.1"
+            assert upstream.nodes[0].port == 8080
+            assert upstream.nodes[0].weight == 10
+            assert upstream.timeout.connect == 30
+
+            # 相同后端、超时的资源复用已转换的 upstream
+            assert fake_http_resource_convertor._convert_http_resource_upstream({}, 1) is upstream
+            assert fake_http_resource_convertor._convert_http_resource_upstream({"timeout": 10}, 1).timeout.read == 10
+            assert fake_http_resource_convertor._convert_http_resource_upstream({}, 2) is None
+
     def test_convert_http_resource_plugin_bk_resource_context(
         self, edge_resource_inherit_stage_snapshot, fake_http_resource_convertor
     ):
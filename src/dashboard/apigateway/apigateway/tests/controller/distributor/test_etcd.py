@@ -59,6 +59,74 @@ class TestEtcdDistributor:
         for m in distributed_models:
             assert len(list(self.registry.iter_by_type(m))) > 0
 
+    def test_distribute_delta(self, mocker, settings, edge_release, micro_gateway):
+        settings.MICRO_GATEWAY_DELTA_RELEASE_ENABLED = True
+        # 重新设置版本数据，生成资源摘要
+        resource_version = edge_release.resource_version
+        resource_version.data = resource_version.data
+        resource_version.save()
+
+        distributor = EtcdDistributor(include_gateway_global_config=False)
+        mocker.patch.object(distributor, "_get_registry", return_value=self.registry)
+        patch_resources = mocker.spy(self.registry, "patch_resources")
+
+        # 首次发布，无已记录的状态，全量同步
+        is_success, _ = distributor.distribute(release=edge_release, micro_gateway=micro_gateway)
+        assert is_success
+        patch_resources.assert_not_called()
+        resource_names = {resource.metadata.name for resource in self.registry.iter_by_type(BkGatewayResource)}
+        assert resource_names
+
+        # 资源未变化，不再转换、同步版本中的资源
+        is_success, _ = distributor.distribute(release=edge_release, micro_gateway=micro_gateway)
+        assert is_success
+        resources, removed_resources = patch_resources.call_args[0]
+        assert not [resource for resource in resources if isinstance(resource, BkGatewayResource)]
+        assert removed_resources == []
+        assert {resource.metadata.name for resource in self.registry.iter_by_type(BkGatewayResource)} == resource_names
+
+    @pytest.fixture
+    def delta_distributor(self, mocker, settings, edge_release):
+        settings.MICRO_GATEWAY_DELTA_RELEASE_ENABLED = True
+        # 重新设置版本数据，生成资源摘要
+        resource_version = edge_release.resource_version
+        resource_version.data = resource_version.data
+        resource_version.save()
+
+        distributor = EtcdDistributor(include_gateway_global_config=False)
+        mocker.patch.object(distributor, "_get_registry", return_value=self.registry)
+        return distributor
+
+    def test_distribute_delta_after_registry_cleared(self, mocker, delta_distributor, edge_release, micro_gateway):
+        patch_resources = mocker.spy(self.registry, "patch_resources")
+
+        is_success, _ = delta_distributor.distribute(release=edge_release, micro_gateway=micro_gateway)
+        assert is_success
+        resource_names = {resource.metadata.name for resource in self.registry.iter_by_type(BkGatewayResource)}
+
+        # etcd 数据被清空后，已记录的状态与 etcd 中的数据不一致，全量同步
+        self.registry.delete_resources_by_key_prefix()
+        is_success, _ = delta_distributor.distribute(release=edge_release, micro_gateway=micro_gateway)
+        assert is_success
+        patch_resources.assert_not_called()
+        assert {resource.metadata.name for resource in self.registry.iter_by_type(BkGatewayResource)} == resource_names
+
+    def test_distribute_force_full_sync(self, mocker, delta_distributor, edge_release, micro_gateway):
+        patch_resources = mocker.spy(self.registry, "patch_resources")
+        sync_resources = mocker.spy(self.registry, "sync_resources_by_key_prefix")
+
+        delta_distributor.distribute(release=edge_release, micro_gateway=micro_gateway)
+        is_success, _ = delta_distributor.distribute(
+            release=edge_release, micro_gateway=micro_gateway, force_full_sync=True
+        )
+        assert is_success
+        patch_resources.assert_not_called()
+        assert sync_resources.call_count == 2
+
+        # 全量同步后仍记录状态，下次发布可增量发布
+        delta_distributor.distribute(release=edge_release, micro_gateway=micro_gateway)
+        patch_resources.assert_called_once()
+
     @pytest.mark.parametrize(
         "include_gateway_global_config, ignored_models, revoked_models",
         [
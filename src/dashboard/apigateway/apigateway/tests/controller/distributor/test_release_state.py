@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import pytest
+
+from apigateway.controller.crds.v1beta1.models.gateway_resource import BkGatewayResource
+from apigateway.controller.crds.v1beta1.models.gateway_service import BkGatewayService
+from apigateway.controller.distributor.release_state import ReleaseState, ReleaseStateStore
+
+
+@pytest.fixture
+def previous_state():
+    state = ReleaseState(global_digest="global", resource_digests={"1": "a", "2": "b", "3": "c"})
+    state.record_resources(
+        [
+            BkGatewayResource(metadata={"name": "foo"}, spec={"id": 1}),
+            BkGatewayResource(metadata={"name": "bar"}, spec={"id": 2}),
+            BkGatewayResource(metadata={"name": "baz"}, spec={"id": 3}),
+            BkGatewayService(metadata={"name": "service"}, spec={}),
+        ]
+    )
+    return state
+
+
+class TestReleaseState:
+    def test_from_release_data(self, edge_release, fake_release_data):
+        resource_version = edge_release.resource_version
+        resource_version.data = resource_version.data
+        resource_version.save()
+
+        state = ReleaseState.from_release_data(fake_release_data)
+        assert state.resource_digests.keys() == resource_version.resource_digests.keys()
+        assert state == ReleaseState.from_release_data(fake_release_data)
+
+        resource_version.resource_digests = {}
+        assert ReleaseState.from_release_data(fake_release_data) is None
+
+    def test_get_changed_resource_ids(self, previous_state):
+        state = ReleaseState(global_digest="global", resource_digests={"1": "a", "2": "b2", "4": "d"})
+        assert state.get_changed_resource_ids(previous_state) == [2, 4]
+
+        state.global_digest = "changed"
+        assert state.get_changed_resource_ids(previous_state) is None
+
+    def test_record_resources(self, previous_state):
+        assert previous_state.resource_names == {"1": "foo", "2": "bar", "3": "baz"}
+        assert previous_state.other_resources == [["BkGatewayService", "service"]]
+
+        state = ReleaseState(global_digest="global", resource_digests={"1": "a", "2": "b2", "4": "d"})
+        # 资源 2 变更后，在环境中禁用，未转换
+        state.record_resources(
+            [
+                BkGatewayResource(metadata={"name": "qux"}, spec={"id": 4}),
+                BkGatewayService(metadata={"name": "service"}, spec={}),
+            ],
+            previous_state,
+        )
+        assert state.resource_names == {"1": "foo", "4": "qux"}
+        assert state.get_removed_resources(previous_state) == [
+            ("BkGatewayResource", "bar"),
+            ("BkGatewayResource", "baz"),
+        ]
+
+    def test_get_key_count(self, previous_state):
+        # 3 个资源及 1 个服务
+        assert previous_state.get_key_count() == 4
+
+    def test_dumps_loads(self, previous_state):
+        assert ReleaseState.loads(previous_state.dumps()) == previous_state
+
+
+class TestReleaseStateStore:
+    def test_get_set_delete(self, faker, previous_state):
+        store = ReleaseStateStore(faker.pystr())
+        assert store.get() is None
+
+        store.set(previous_state)
+        assert store.get() == previous_state
+
+        store.delete()
+        assert store.get() is None
+
+    def test_get_error(self, mocker, faker):
+        mocker.patch(
+            "apigateway.controller.distributor.release_state.get_default_redis_client",
+            side_effect=Exception("redis error"),
+        )
+
+        store = ReleaseStateStore(faker.pystr())
+        assert store.get() is None
+        store.delete()
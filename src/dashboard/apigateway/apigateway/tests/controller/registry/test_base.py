@@ -29,6 +29,9 @@ class DummyRegistry(Registry):
     def sync_resources_by_key_prefix(self, resources):
         pass
 
+    def patch_resources(self, resources, removed_resources):
+        pass
+
     def delete_resources_by_key_prefix(self):
         pass
 
@@ -61,6 +61,12 @@ class TestDictRegistry:
         keys = self.registry._get_exist_keys_by_key_prefix()
         assert keys == {}
 
+    def test_count_by_key_prefix(self, fake_custom_resource):
+        assert self.registry.count_by_key_prefix() == 0
+
+        self.registry.sync_resources_by_key_prefix([fake_custom_resource])
+        assert self.registry.count_by_key_prefix() == 1
+
     def test_iter_by_type(self, faker, fake_custom_resource, resource_type):
         self.registry.sync_resources_by_key_prefix([fake_custom_resource])
 
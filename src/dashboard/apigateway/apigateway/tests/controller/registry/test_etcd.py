@@ -17,7 +17,7 @@
 #
 import pytest
 
-from apigateway.controller.registry.etcd import EtcdRegistry
+from apigateway.controller.registry.etcd import EtcdRegistry, ExistValue, SyncStats, _TxnOperation
 from apigateway.utils.yaml import yaml_dumps
 
 
@@ -47,37 +47,141 @@ class TestEtcdRegistry:
         resource_a = resource_type(metadata={"name": "a"}, value="to_be_removed")
         resource_b = resource_type(metadata={"name": "b"}, value="to_be_updated")
         resource_c = resource_type(metadata={"name": "c"}, value="to_be_created")
+        resource_d = resource_type(metadata={"name": "d"}, value="unchanged")
 
         mocker.patch.object(
             self.registry,
-            "_get_exist_keys_by_key_prefix",
+            "_get_exist_values_by_key_prefix",
             return_value={
-                f"/testing/{resource_type.kind}/a": True,
-                f"/testing/{resource_type.kind}/b": True,
+                f"/testing/{resource_type.kind}/a": ExistValue(digest="a", mod_revision=1),
+                f"/testing/{resource_type.kind}/b": ExistValue(digest="b", mod_revision=2),
+                f"/testing/{resource_type.kind}/d": ExistValue(
+                    digest=self.registry._get_digest(yaml_dumps(resource_d.dict(by_alias=True))), mod_revision=3
+                ),
             },
         )
+        mock_commit_operations = mocker.patch.object(self.registry, "_commit_operations", return_value=True)
 
-        self.registry.sync_resources_by_key_prefix([resource_b, resource_c])
+        fail_resources = self.registry.sync_resources_by_key_prefix([resource_b, resource_c, resource_d])
 
-        calls = [
-            mocker.call(f"/testing/{resource_type.kind}/b", yaml_dumps(resource_b.dict(by_alias=True))),
-            mocker.call(f"/testing/{resource_type.kind}/c", yaml_dumps(resource_c.dict(by_alias=True))),
+        assert fail_resources == []
+        operations = mock_commit_operations.call_args[0][0]
+        assert [(op.key, op.payload, op.mod_revision) for op in operations] == [
+            (f"/testing/{resource_type.kind}/b", yaml_dumps(resource_b.dict(by_alias=True)), 2),
+            (f"/testing/{resource_type.kind}/c", yaml_dumps(resource_c.dict(by_alias=True)), None),
+            (f"/testing/{resource_type.kind}/a", None, 1),
         ]
-        self.etcd_client.put.assert_has_calls(calls)
-        self.etcd_client.delete.assert_called_once_with(f"/testing/{resource_type.kind}/a")
+        assert self.registry.last_sync_stats == SyncStats(written=2, unchanged=1, deleted=1, failed=0)
 
-    def test_get_exist_keys_by_key_prefix(self, mocker, faker):
+    def test_sync_resources_by_key_prefix_conflict(self, resource_type, mocker, settings):
+        settings.ETCD_SYNC_TXN_MAX_OPS = 1
+        resource_b = resource_type(metadata={"name": "b"}, value="b")
+        resource_c = resource_type(metadata={"name": "c"}, value="c")
+
+        mocker.patch.object(self.registry, "_get_exist_values_by_key_prefix", return_value={})
+        mock_commit_operations = mocker.patch.object(self.registry, "_commit_operations", side_effect=[True, False])
+
+        fail_resources = self.registry.sync_resources_by_key_prefix([resource_b, resource_c])
+
+        assert fail_resources == [resource_c]
+        assert mock_commit_operations.call_count == 2
+        assert self.registry.last_sync_stats == SyncStats(written=1, failed=1)
+
+    def test_patch_resources(self, resource_type, mocker):
+        resource_b = resource_type(metadata={"name": "b"}, value="to_be_updated")
+        resource_c = resource_type(metadata={"name": "c"}, value="to_be_created")
+        resource_d = resource_type(metadata={"name": "d"}, value="unchanged")
+        exist_values = {
+            f"/testing/{resource_type.kind}/a": ExistValue(digest="a", mod_revision=1),
+            f"/testing/{resource_type.kind}/b": ExistValue(digest="b", mod_revision=2),
+            f"/testing/{resource_type.kind}/d": ExistValue(
+                digest=self.registry._get_digest(yaml_dumps(resource_d.dict(by_alias=True))), mod_revision=3
+            ),
+        }
+        mocker.patch.object(self.registry, "_get_exist_value", side_effect=exist_values.get)
+        mock_commit_operations = mocker.patch.object(self.registry, "_commit_operations", return_value=True)
+
+        fail_resources = self.registry.patch_resources(
+            [resource_b, resource_c, resource_d],
+            [(resource_type.kind, "a"), (resource_type.kind, "not_exist")],
+        )
+
+        assert fail_resources == []
+        operations = mock_commit_operations.call_args[0][0]
+        assert [(op.key, op.payload, op.mod_revision) for op in operations] == [
+            (f"/testing/{resource_type.kind}/b", yaml_dumps(resource_b.dict(by_alias=True)), 2),
+            (f"/testing/{resource_type.kind}/c", yaml_dumps(resource_c.dict(by_alias=True)), None),
+            (f"/testing/{resource_type.kind}/a", None, 1),
+        ]
+        assert self.registry.last_sync_stats == SyncStats(written=2, unchanged=1, deleted=1, failed=0)
+
+    def test_get_exist_value(self, mocker):
+        self.etcd_client.get.return_value = (b"foo", mocker.Mock(mod_revision=10))
+        assert self.registry._get_exist_value("/testing/a") == ExistValue(
+            digest=self.registry._get_digest("foo"), mod_revision=10
+        )
+
+        self.etcd_client.get.return_value = (None, None)
+        assert self.registry._get_exist_value("/testing/a") is None
+
+    @pytest.mark.parametrize(
+        "max_ops, max_bytes, expected",
+        [
+            (128, 1024, [["a", "b", "c"]]),
+            (2, 1024, [["a", "b"], ["c"]]),
+            (128, 25, [["a", "b"], ["c"]]),
+            (128, 1, [["a"], ["b"], ["c"]]),
+        ],
+    )
+    def test_split_operations(self, settings, max_ops, max_bytes, expected):
+        settings.ETCD_SYNC_TXN_MAX_OPS = max_ops
+        settings.ETCD_SYNC_TXN_MAX_BYTES = max_bytes
+        operations = [_TxnOperation(key=key, payload="x" * 10, mod_revision=None) for key in ["a", "b", "c"]]
+
+        result = list(self.registry._split_operations(operations))
+        assert [[op.key for op in batch] for batch in result] == expected
+
+    def test_commit_operations(self, mocker):
+        self.etcd_client.transaction.return_value = (True, [])
+
+        result = self.registry._commit_operations(
+            [
+                _TxnOperation(key="/testing/a", payload="a", mod_revision=None),
+                _TxnOperation(key="/testing/b", payload="b", mod_revision=2),
+                _TxnOperation(key="/testing/c", payload=None, mod_revision=3),
+            ]
+        )
+
+        assert result is True
+        transactions = self.etcd_client.transactions
+        transactions.create.assert_called_once_with("/testing/a")
+        transactions.mod.assert_has_calls([mocker.call("/testing/b"), mocker.call("/testing/c")], any_order=True)
+        transactions.put.assert_has_calls([mocker.call("/testing/a", "a"), mocker.call("/testing/b", "b")])
+        transactions.delete.assert_called_once_with("/testing/c")
+
+        kwargs = self.etcd_client.transaction.call_args[1]
+        assert len(kwargs["compare"]) == 3
+        assert len(kwargs["success"]) == 3
+        assert kwargs["failure"] == []
+
+    def test_get_exist_values_by_key_prefix(self, mocker, faker):
         key = faker.pystr()
-        self.etcd_client.get_prefix.return_value = [(mocker.Mock(), mocker.Mock(key=key))]
+        self.etcd_client.get_prefix.return_value = [(b"foo", mocker.Mock(key=key, mod_revision=10))]
 
-        keys = self.registry._get_exist_keys_by_key_prefix()
-        assert keys == {key: True}
-        self.etcd_client.get_prefix.assert_called_once_with("/testing/", keys_only=True)
+        values = self.registry._get_exist_values_by_key_prefix()
+        assert values == {key: ExistValue(digest=self.registry._get_digest("foo"), mod_revision=10)}
+        self.etcd_client.get_prefix.assert_called_once_with("/testing/")
 
     def test_delete_resources_by_key_prefix(self):
         self.registry.delete_resources_by_key_prefix()
         self.etcd_client.delete_prefix.assert_called_once_with("/testing/")
 
+    def test_count_by_key_prefix(self, mocker):
+        self.etcd_client.get_prefix.return_value = [(None, mocker.Mock()), (None, mocker.Mock())]
+
+        assert self.registry.count_by_key_prefix() == 2
+        self.etcd_client.get_prefix.assert_called_once_with("/testing/", keys_only=True)
+
     def test_iter_by_type(self, mocker, fake_custom_resource, resource_type, cr_yaml):
         self.etcd_client.get_prefix.return_value = [(cr_yaml, mocker.Mock())]
 
@@ -64,6 +64,15 @@ class TestRollingUpdateRelease:
 
         self.distributor.distribute.assert_called()
 
+    def test_force_full_sync(self, edge_gateway, edge_release, micro_gateway):
+        self.distributor.distribute.return_value = True, ""
+
+        assert rolling_update_release(
+            edge_gateway.pk, NO_NEED_REPORT_EVENT_PUBLISH_ID, edge_release.pk, force_full_sync=True
+        )
+
+        assert self.distributor.distribute.call_args[1]["force_full_sync"] is True
+
 
 class TestRevokeRelease:
     def test_revoke(self, mocker, fake_release, fake_release_history, micro_gateway):
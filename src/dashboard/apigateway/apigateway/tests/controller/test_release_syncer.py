@@ -0,0 +1,160 @@
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import pytest
+from ddf import G
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from apigateway.controller.release_syncer import (
+    GatewaySyncResult,
+    GatewaySyncTask,
+    ReleaseSyncer,
+    SyncCheckpoint,
+    estimate,
+    get_sync_tasks,
+    shard_tasks,
+    sync_gateway,
+)
+from apigateway.core.models import ReleasedResource
+
+pytestmark = pytest.mark.django_db
+
+
+def test_get_sync_tasks(edge_gateway, edge_release):
+    for resource_id in [1, 2]:
+        G(
+            ReleasedResource,
+            gateway=edge_gateway,
+            resource_version_id=edge_release.resource_version_id,
+            resource_id=resource_id,
+        )
+
+    tasks = get_sync_tasks([edge_gateway.name])
+    assert tasks == [
+        GatewaySyncTask(gateway_id=edge_gateway.id, gateway_name=edge_gateway.name, release_count=1, resource_count=2)
+    ]
+    assert get_sync_tasks(["not-exist"]) == []
+
+
+def test_shard_tasks():
+    tasks = [
+        GatewaySyncTask(gateway_id=i, gateway_name=str(i), resource_count=count)
+        for i, count in enumerate([8, 5, 4, 3])
+    ]
+
+    shards = shard_tasks(tasks, 2)
+    assert [[task.gateway_name for task in shard] for shard in shards] == [["0", "3"], ["1", "2"]]
+    assert shard_tasks([], 0) == [[]]
+
+
+def test_estimate():
+    tasks = [GatewaySyncTask(gateway_id=i, gateway_name=str(i), release_count=1, resource_count=9) for i in range(4)]
+    checkpoint = SyncCheckpoint()
+
+    result = estimate(tasks, 2, checkpoint)
+    assert result.gateway_count == 4
+    assert result.resource_count == 36
+    assert result.max_worker_weight == 20
+    assert result.estimated_seconds is None
+
+    checkpoint.record(GatewaySyncResult(gateway_name="0", ok=True, duration=2, attempts=1, weight=10))
+    assert estimate(tasks, 2, checkpoint).estimated_seconds == 4
+
+
+def test_sync_checkpoint(tmpdir):
+    path = str(tmpdir.join("checkpoint.json"))
+    checkpoint = SyncCheckpoint.load(path)
+    checkpoint.record(GatewaySyncResult(gateway_name="foo", ok=True, duration=1, attempts=1, weight=1))
+    checkpoint.record(GatewaySyncResult(gateway_name="bar", ok=False, duration=1, attempts=2, weight=1))
+
+    resumed = SyncCheckpoint.load(path, resume=True)
+    assert resumed.is_succeeded("foo")
+    assert not resumed.is_succeeded("bar")
+    assert not SyncCheckpoint.load(path).is_succeeded("foo")
+
+
+class TestSyncGateway:
+    @pytest.fixture
+    def task(self, edge_gateway, edge_release):
+        return GatewaySyncTask(gateway_id=edge_gateway.id, gateway_name=edge_gateway.name, release_count=1)
+
+    def test_retry_succeeded(self, mocker, task, edge_gateway_stage):
+        mock_publish = mocker.patch(
+            "apigateway.controller.release_syncer.publish.trigger_gateway_publish", side_effect=[False, True]
+        )
+
+        result = sync_gateway(task, retries=1)
+
+        assert result.ok
+        assert result.attempts == 2
+        assert mock_publish.call_args[1]["stage_id"] == edge_gateway_stage.id
+
+    def test_failed(self, mocker, task):
+        mocker.patch(
+            "apigateway.controller.release_syncer.publish.trigger_gateway_publish", side_effect=ValueError("error")
+        )
+
+        result = sync_gateway(task, retries=1)
+
+        assert not result.ok
+        assert result.attempts == 2
+        assert "ValueError: error" in result.error
+
+
+class TestReleaseSyncer:
+    def test_sync(self, mocker):
+        tasks = [GatewaySyncTask(gateway_id=i, gateway_name=str(i)) for i in range(3)]
+        checkpoint = SyncCheckpoint()
+        checkpoint.record(GatewaySyncResult(gateway_name="0", ok=True, duration=1, attempts=1, weight=0))
+        mocker.patch(
+            "apigateway.controller.release_syncer.sync_gateway",
+            side_effect=lambda task, retries: GatewaySyncResult(
+                gateway_name=task.gateway_name, ok=task.gateway_id == 1, duration=0, attempts=1, weight=0
+            ),
+        )
+        on_result = mocker.MagicMock()
+
+        results = ReleaseSyncer(1, checkpoint, on_result=on_result).sync(tasks)
+
+        assert sorted(result.gateway_name for result in results) == ["1", "2"]
+        assert on_result.call_count == 2
+        assert checkpoint.is_succeeded("1")
+        assert not checkpoint.is_succeeded("2")
+
+
+class TestCommand:
+    def test_dry_run(self, mocker, edge_gateway, edge_release):
+        mock_sync = mocker.patch.object(ReleaseSyncer, "sync")
+
+        call_command(
+            "sync_releases_to_shared_micro_gateway_parallel", "--gateway-names", edge_gateway.name, "--dry-run"
+        )
+
+        mock_sync.assert_not_called()
+
+    def test_failed(self, mocker, edge_gateway, edge_release):
+        mocker.patch.object(
+            ReleaseSyncer,
+            "sync",
+            return_value=[
+                GatewaySyncResult(gateway_name=edge_gateway.name, ok=False, duration=0, attempts=2, weight=1)
+            ],
+        )
+
+        with pytest.raises(CommandError):
+            call_command("sync_releases_to_shared_micro_gateway_parallel", "--gateway-names", edge_gateway.name)
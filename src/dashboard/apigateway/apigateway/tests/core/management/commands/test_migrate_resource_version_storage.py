@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import json
+
+import pytest
+from ddf import G
+from django.core.management import call_command
+
+from apigateway.core.constants import ResourceVersionStorageEnum
+from apigateway.core.models import ResourceSnapshot, ResourceVersion
+
+pytestmark = pytest.mark.django_db
+
+
+class TestCommand:
+    @pytest.fixture
+    def inline_resource_version(self, fake_gateway):
+        return G(
+            ResourceVersion,
+            gateway=fake_gateway,
+            _data=json.dumps([{"id": 1, "name": "foo"}, {"id": 2, "name": "bar"}]),
+            storage=ResourceVersionStorageEnum.INLINE.value,
+        )
+
+    def test_handle(self, fake_gateway, inline_resource_version):
+        call_command("migrate_resource_version_storage", "--gateway-id", fake_gateway.id)
+
+        resource_version = ResourceVersion.objects.get(id=inline_resource_version.id)
+        assert resource_version.storage == ResourceVersionStorageEnum.SNAPSHOT.value
+        assert resource_version.data == [{"id": 1, "name": "foo"}, {"id": 2, "name": "bar"}]
+        assert ResourceSnapshot.objects.filter(gateway=fake_gateway).count() == 2
+
+    def test_handle_dry_run(self, fake_gateway, inline_resource_version):
+        call_command("migrate_resource_version_storage", "--gateway-id", fake_gateway.id, "--dry-run")
+
+        resource_version = ResourceVersion.objects.get(id=inline_resource_version.id)
+        assert resource_version.storage == ResourceVersionStorageEnum.INLINE.value
+        assert not ResourceSnapshot.objects.filter(gateway=fake_gateway).exists()
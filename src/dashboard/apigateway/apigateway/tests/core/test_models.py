@@ -16,12 +16,14 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 #
+import json
+
 import pytest
 from django_dynamic_fixture import G
 
 from apigateway.biz.resource import ResourceHandler
 from apigateway.core import models
-from apigateway.core.constants import GatewayStatusEnum
+from apigateway.core.constants import GatewayStatusEnum, ResourceVersionStorageEnum
 
 pytestmark = pytest.mark.django_db
 
@@ -46,3 +48,108 @@ class TestResource:
         snapshot = ResourceHandler.snapshot(fake_resource, as_dict=True)
         assert snapshot
         assert isinstance(snapshot, dict)
+
+
+class TestResourceVersion:
+    @pytest.fixture
+    def resources(self):
+        return [
+            {"id": 1, "name": "foo", "path": "/foo/", "proxy": {"type": "mock"}},
+            {"id": 2, "name": "bar", "path": "/bar/", "proxy": {"type": "mock"}},
+        ]
+
+    def test_data_snapshot_storage(self, settings, faker, fake_gateway, resources, django_assert_num_queries):
+        settings.RESOURCE_VERSION_SNAPSHOT_STORAGE_ENABLED = True
+
+        resource_version = models.ResourceVersion.objects.create(
+            gateway=fake_gateway, name=faker.pystr(), data=resources
+        )
+        assert resource_version.storage == ResourceVersionStorageEnum.SNAPSHOT.value
+        # data 中保留 id、name，兼容 core-api 读取
+        assert [(item["id"], item["name"]) for item in json.loads(resource_version._data)] == [(1, "foo"), (2, "bar")]
+        assert models.ResourceSnapshot.objects.filter(gateway=fake_gateway).count() == 2
+
+        resource_version = models.ResourceVersion.objects.get(id=resource_version.id)
+        with django_assert_num_queries(1):
+            assert resource_version.get_resource_data(2) == resources[1]
+        with django_assert_num_queries(1):
+            assert resource_version.data == resources
+        # 版本数据已缓存
+        with django_assert_num_queries(0):
+            assert resource_version.data == resources
+            assert resource_version.get_resource_data(2) == resources[1]
+        assert resource_version.get_resource_data(3) is None
+
+        # 相同的资源快照只存储一份
+        resources[0]["path"] = "/foo/v2/"
+        models.ResourceVersion.objects.create(gateway=fake_gateway, name=faker.pystr(), data=resources)
+        assert models.ResourceSnapshot.objects.filter(gateway=fake_gateway).count() == 3
+
+    def test_data_inline_storage(self, settings, faker, fake_gateway, resources):
+        settings.RESOURCE_VERSION_SNAPSHOT_STORAGE_ENABLED = False
+
+        resource_version = models.ResourceVersion.objects.create(
+            gateway=fake_gateway, name=faker.pystr(), data=resources
+        )
+        assert resource_version.storage == ResourceVersionStorageEnum.INLINE.value
+        assert json.loads(resource_version._data) == resources
+
+        resource_version = models.ResourceVersion.objects.get(id=resource_version.id)
+        assert resource_version.data == resources
+        assert resource_version.get_resource_data(2) == resources[1]
+        assert resource_version.manifest == []
+
+        # 返回的数据可修改，不影响缓存
+        resource_version.data[0]["name"] = "changed"
+        resource_version.get_resource_data(2)["name"] = "changed"
+        assert resource_version.data == resources
+        assert not models.ResourceSnapshot.objects.filter(gateway=fake_gateway).exists()
+
+    @pytest.mark.parametrize("snapshot_storage_enabled", [True, False])
+    def test_get_resources_data(self, settings, faker, fake_gateway, resources, snapshot_storage_enabled):
+        settings.RESOURCE_VERSION_SNAPSHOT_STORAGE_ENABLED = snapshot_storage_enabled
+
+        resource_version = models.ResourceVersion.objects.create(
+            gateway=fake_gateway, name=faker.pystr(), data=resources
+        )
+        resource_version = models.ResourceVersion.objects.get(id=resource_version.id)
+        assert resource_version.get_resources_data([2, 3, 1]) == [resources[1], resources[0]]
+
+        # 已缓存版本数据
+        assert resource_version.data == resources
+        assert resource_version.get_resources_data([2, 3, 1]) == [resources[1], resources[0]]
+
+    @pytest.mark.parametrize("snapshot_storage_enabled", [True, False])
+    def test_digest(self, settings, faker, fake_gateway, resources, snapshot_storage_enabled):
+        settings.RESOURCE_VERSION_SNAPSHOT_STORAGE_ENABLED = snapshot_storage_enabled
+
+        resource_version = models.ResourceVersion.objects.create(
+            gateway=fake_gateway, name=faker.pystr(), data=resources
+        )
+        resource_version = models.ResourceVersion.objects.get(id=resource_version.id)
+        assert resource_version.resource_count == 2
+        assert resource_version.get_resource_count() == 2
+        assert resource_version.resource_digests == {
+            "1": models.ResourceSnapshot.encode(resources[0])[0],
+            "2": models.ResourceSnapshot.encode(resources[1])[0],
+        }
+        assert len(resource_version.digest) == 64
+
+        # 资源未变化时，摘要不变
+        other_version = models.ResourceVersion(gateway=fake_gateway, data=resources)
+        assert other_version.digest == resource_version.digest
+
+        resources[1]["proxy"]["type"] = "http"
+        other_version = models.ResourceVersion(gateway=fake_gateway, data=resources)
+        assert other_version.digest != resource_version.digest
+        assert other_version.resource_digests["1"] == resource_version.resource_digests["1"]
+        assert other_version.resource_digests["2"] != resource_version.resource_digests["2"]
+
+    def test_get_resource_count_without_metadata(self, faker, fake_gateway, resources):
+        resource_version = models.ResourceVersion.objects.create(
+            gateway=fake_gateway, name=faker.pystr(), data=resources
+        )
+        models.ResourceVersion.objects.filter(id=resource_version.id).update(resource_count=None)
+
+        resource_version = models.ResourceVersion.objects.get(id=resource_version.id)
+        assert resource_version.get_resource_count() == 2
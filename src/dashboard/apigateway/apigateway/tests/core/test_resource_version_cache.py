@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import pytest
+
+from apigateway.core.resource_version_cache import (
+    ResourceVersionSnapshot,
+    ResourceVersionSnapshotCache,
+    get_resource_version_snapshot_cache,
+)
+
+
+@pytest.fixture
+def resources():
+    return [
+        {"id": 1, "name": "foo", "proxy": {"type": "mock"}},
+        {"id": 2, "name": "bar", "proxy": {"type": "http"}},
+    ]
+
+
+class TestResourceVersionSnapshot:
+    def test_get_resources(self, resources):
+        snapshot = ResourceVersionSnapshot(resources)
+        assert snapshot.size > 0
+        assert snapshot.get_resources() == resources
+
+        snapshot.get_resources()[0]["proxy"]["type"] = "http"
+        assert snapshot.get_resources() == resources
+
+    def test_get_resource(self, resources):
+        snapshot = ResourceVersionSnapshot(resources)
+        assert snapshot.get_resource(2) == resources[1]
+        assert snapshot.get_resource(3) is None
+
+    def test_dumps_loads(self, resources):
+        snapshot = ResourceVersionSnapshot.loads(ResourceVersionSnapshot(resources).dumps())
+        assert snapshot.get_resources() == resources
+        assert snapshot.get_resource(1) == resources[0]
+
+
+class TestResourceVersionSnapshotCache:
+    def test_get(self, mocker, settings, resources):
+        settings.RESOURCE_VERSION_SNAPSHOT_SHARED_CACHE_ENABLED = False
+        loader = mocker.Mock(return_value=resources)
+        cache = ResourceVersionSnapshotCache()
+
+        assert cache.peek("1:a") is None
+        assert cache.get("1:a", loader).get_resources() == resources
+        assert cache.get("1:a", loader).get_resources() == resources
+        assert cache.peek("1:a").get_resource(1) == resources[0]
+        loader.assert_called_once_with()
+
+        cache.clear()
+        assert cache.peek("1:a") is None
+
+    def test_get_exceed_maxsize(self, settings, resources):
+        settings.RESOURCE_VERSION_SNAPSHOT_SHARED_CACHE_ENABLED = False
+        settings.RESOURCE_VERSION_SNAPSHOT_CACHE_MAXSIZE = 1
+        cache = ResourceVersionSnapshotCache()
+
+        assert cache.get("1:a", lambda: resources).get_resources() == resources
+        assert cache.peek("1:a") is None
+
+    def test_get_shared(self, mocker, settings, faker, resources):
+        settings.RESOURCE_VERSION_SNAPSHOT_SHARED_CACHE_ENABLED = True
+        loader = mocker.Mock(return_value=resources)
+        key = faker.pystr()
+
+        assert ResourceVersionSnapshotCache().get(key, loader).get_resources() == resources
+        # 其它进程从共享缓存中获取
+        assert ResourceVersionSnapshotCache().get(key, loader).get_resources() == resources
+        loader.assert_called_once_with()
+
+    def test_get_shared_error(self, mocker, settings, resources):
+        settings.RESOURCE_VERSION_SNAPSHOT_SHARED_CACHE_ENABLED = True
+        mocker.patch(
+            "apigateway.core.resource_version_cache.get_default_redis_client",
+            side_effect=Exception("redis error"),
+        )
+
+        assert ResourceVersionSnapshotCache().get("1:a", lambda: resources).get_resources() == resources
+
+
+def test_get_resource_version_snapshot_cache():
+    assert get_resource_version_snapshot_cache() is get_resource_version_snapshot_cache()
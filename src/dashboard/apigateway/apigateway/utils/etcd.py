@@ -15,9 +15,23 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 #
+from typing import Dict
+
 import etcd3
 from django.conf import settings
 
+# 进程内复用的 etcd client，仅在调用 use_process_etcd_client 后启用
+_process_etcd_client: Dict[str, etcd3.Etcd3Client] = {}
+
 
 def get_etcd_client() -> etcd3.Etcd3Client:
+    client = _process_etcd_client.get("default")
+    if client is not None:
+        return client
+
     return etcd3.client(**settings.ETCD_CONFIG)
+
+
+def use_process_etcd_client():
+    """当前进程内的后续 get_etcd_client 均返回同一个 client，用于批量同步等场景，避免每次发布重复建立连接"""
+    _process_etcd_client["default"] = etcd3.client(**settings.ETCD_CONFIG)
@@ -8,5 +8,8 @@ if [ -f "${envfile}" ]; then
     set +a
 fi
 
-command="gunicorn wsgi --env prometheus_multiproc_dir=/tmp/ -k gevent -w 16 -b [::]:${PORT:-6010} --max-requests ${GUNICORN_MAX_REQUESTS:-10000} --max-requests-jitter ${GUNICORN_MAX_REQUESTS_JITTER:-2000} --timeout 600 --graceful-timeout ${GUNICORN_GRACEFUL_TIMEOUT:-30} --access-logfile - --error-logfile - --access-logformat '[%(h)s] %({request_id}i)s %(u)s %(t)s \"%(r)s\" %(s)s %(D)s %(b)s \"%(f)s\" \"%(a)s\"'"
+# 生成组件清单，worker 根据清单注册组件，无需各自导入全部组件模块；生成失败时，worker 退化为遍历导入组件
+python manage.py generate_components_manifest || echo "generate components manifest failed, skip"
+
+command="gunicorn wsgi -c gunicorn_config.py --env prometheus_multiproc_dir=/tmp/ -k gevent -w 16 -b [::]:${PORT:-6010} --max-requests ${GUNICORN_MAX_REQUESTS:-10000} --max-requests-jitter ${GUNICORN_MAX_REQUESTS_JITTER:-2000} --timeout 600 --graceful-timeout ${GUNICORN_GRACEFUL_TIMEOUT:-30} --access-logfile - --error-logfile - --access-logformat '[%(h)s] %({request_id}i)s %(u)s %(t)s \"%(r)s\" %(s)s %(D)s %(b)s \"%(f)s\" \"%(a)s\"'"
 exec bash -c "$command"
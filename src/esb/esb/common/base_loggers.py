@@ -20,8 +20,11 @@
 import copy
 import json
 
+from django.conf import settings
+
 from common.base_utils import datetime_format
-from common.log import logger, logger_api
+from common.constants import COMPONENT_STATUSES
+from common.log import LazyJSONMessage, logger_api
 
 
 class BasicRequestLogger:
@@ -30,42 +33,55 @@ class BasicRequestLogger:
     """
 
     def write(self, request, response):
+        method, g = request.method, request.g
+
         # 记录原始的请求参数，而不是被修改过的kwargs
-        if "kwargs_copy" in request.g:
-            kwargs = request.g.kwargs_copy
+        if "kwargs_copy" in g:
+            kwargs = g.kwargs_copy
         else:
-            kwargs = request.g.kwargs
+            kwargs = g.kwargs
 
-        if request.g.system_name == "CMSI" and request.g.component_alias_name == "send_mail":
-            kwargs = copy.copy(kwargs)
+        # 日志内容在写入时才构建，先复制请求参数，避免后续修改参数影响日志内容
+        kwargs = copy.copy(kwargs)
+        if g.system_name == "CMSI" and g.component_alias_name == "send_mail":
             kwargs.pop("attachments", None)
 
-        msecs_cost = (request.g.ts_request_end - request.g.ts_request_start) * 1000
+        msecs_cost = (g.ts_request_end - g.ts_request_start) * 1000
         if isinstance(response, dict):
             message = response and response.get("message", "")
         else:
             message = ""
 
-        try:
+        def build_request_log():
             request_log = {
                 "message": "ESB request finished, method=%s system=%s component=%s"
-                % (request.method, request.g.system_name, request.g.component_alias_name),
+                % (method, g.system_name, g.component_alias_name),
                 "type": "pyls-comp-request",
-                "request_id": request.g.request_id,
-                "req_app_code": request.g.get("app_code", ""),
-                "req_username": request.g.get("current_user_username", ""),
-                "req_system_name": request.g.system_name,
-                "req_component_name": request.g.component_alias_name,
-                "req_client_ip": request.g.client_ip,
+                "request_id": g.request_id,
+                "req_app_code": g.get("app_code", ""),
+                "req_username": g.get("current_user_username", ""),
+                "req_system_name": g.system_name,
+                "req_component_name": g.component_alias_name,
+                "req_client_ip": g.client_ip,
                 "req_params": json.dumps(kwargs),
-                "req_use_test_env": request.g.use_test_env,
-                "req_status": request.g.component_status,
+                "req_use_test_env": g.use_test_env,
+                "req_status": g.component_status,
                 "req_message": message,
                 "req_msecs_cost": int(msecs_cost),
-                "req_start_time": datetime_format(request.g.ts_request_start),
-                "req_end_time": datetime_format(request.g.ts_request_end),
+                "req_start_time": datetime_format(g.ts_request_start),
+                "req_end_time": datetime_format(g.ts_request_end),
             }
-            # Log to logstash, type="pyls-comp-request"
-            logger_api.info(json.dumps(request_log))
-        except Exception as e:
-            logger.warning("logger request exception: %s" % e)
+            # 开启请求合并时，记录响应来源：leader、shared 或 cached
+            if "coalescing_source" in g:
+                request_log["req_coalescing"] = g.coalescing_source
+            return request_log
+
+        # Log to logstash, type="pyls-comp-request"，日志内容在写入时才构建
+        logger_api.info(
+            LazyJSONMessage(
+                build_request_log,
+                truncate_fields=("req_params",),
+                max_length=settings.ESB_API_LOG_FIELD_MAX_LENGTH,
+                important=g.component_status != COMPONENT_STATUSES.SUCCESS,
+            )
+        )
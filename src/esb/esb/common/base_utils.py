@@ -98,6 +98,34 @@ class FancyDict(dict):
             raise AttributeError(k)
 
 
+class FrozenDict(dict):
+    """只读字典，用于在多个请求间共享的配置，deepcopy 时直接返回自身"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("'%s' object is read-only" % self.__class__.__name__)
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self),))
+
+
+def freeze(value):
+    """将配置数据递归转换为只读结构：dict 转为 FrozenDict，list 转为 tuple"""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
 def smart_lower(value):
     """
     >>> smart_lower('RequestFriendHandler')
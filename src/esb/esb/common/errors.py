@@ -106,6 +106,25 @@ class RequestBlockedException(BaseException):
     pass
 
 
+class RequestRejectedException(BaseException):
+    """
+    后端系统熔断或并发请求数超过上限，请求未发送即被拒绝时抛出的异常
+    """
+
+    def __init__(self, system_name, reason):
+        self.system_name = system_name
+        self.reason = reason
+        super(RequestRejectedException, self).__init__(self.get_message())
+
+    def get_message(self):
+        if self.reason == "concurrency_limit":
+            return "Too many concurrent requests to third-party system [%s], please try again later" % self.system_name
+        return (
+            "Third-party system [%s] keeps failing, requests are rejected temporarily, please try again later"
+            % self.system_name
+        )
+
+
 class APIError(BaseException):
     """
     API Error
@@ -182,6 +201,7 @@ class ErrorCodes(object):
         ErrorCode("REQUEST_BLOCKED", 1306207, "Request to the third-party system is blocked"),
         ErrorCode("THIRD_PARTY_RESULT_ERROR", 1306208, "%s system interface results in an unknown format"),
         ErrorCode("REQUEST_DEST_METHOD_ERROR", 1306209, "The system interface does not support the request method"),
+        ErrorCode("REQUEST_REJECTED", 1306210, "Request to the third-party system is rejected"),
     )
 
     # Init dict
@@ -17,14 +17,17 @@
 # to the current version of the project delivered to anyone in the future.
 #
 
+import copy
 import json
 import re
 
 from django import forms
+from django.conf import settings
 from django.core import validators
 from django.core.exceptions import ValidationError
-from django.forms import Field
-from django.forms.utils import ErrorDict
+from django.forms import Field, FileField
+from django.forms.utils import ErrorDict, pretty_name
+from django.forms.widgets import Widget
 from django.utils.encoding import force_text, smart_text
 
 from common.base_utils import FancyDict, str_bool
@@ -53,6 +56,78 @@ def get_error_prompt(form):
     return force_text(content[0])
 
 
+class CompiledFormSchema:
+    """
+    表单类编译后的结构，每个表单类只编译一次，之后各次校验共享：
+
+    - 合并 base_fields 与 field_collections 中的字段，字段对象只读共享，不再每次深拷贝
+    - 预先确定各字段取值、clean_<field> 方法，以及错误提示所需的字段顺序、标签和默认错误信息
+
+    表单类重写了 __init__ 时，可能修改字段对象，此时每次校验仍深拷贝字段
+    """
+
+    def __init__(self, form_class):
+        fields = copy.deepcopy(form_class.base_fields)
+        for collection in form_class.field_collections:
+            for name, field in collection.fields:
+                fields[name] = field
+
+        self.fields = fields
+        self.shared_fields = form_class.__init__ is BaseComponentForm.__init__
+        self.field_index = {name: index for index, name in enumerate(fields)}
+        self.labels = {}
+        self.default_error_messages = {}
+        for name, field in fields.items():
+            self.labels[name] = pretty_name(name) if field.label is None else field.label
+            self.default_error_messages[name] = self._get_default_error_messages(field)
+
+        self.field_cleaners = self._compile_field_cleaners(form_class)
+
+    def _compile_field_cleaners(self, form_class):
+        """字段共享且均为普通字段时，按预先确定的步骤清洗，否则使用 django 默认的 _clean_fields"""
+        if not self.shared_fields:
+            return None
+
+        field_cleaners = []
+        for name, field in self.fields.items():
+            if field.disabled or isinstance(field, FileField):
+                return None
+
+            get_value = None
+            if type(field.widget).value_from_datadict is not Widget.value_from_datadict:
+                get_value = field.widget.value_from_datadict
+            field_cleaners.append((name, field, get_value, getattr(form_class, "clean_%s" % name, None)))
+        return field_cleaners
+
+    @staticmethod
+    def _get_default_error_messages(field):
+        # 错误信息可能是延迟翻译的字符串，比较时才按当前语言取值
+        messages = {}
+        for c in reversed(field.__class__.__mro__):
+            messages.update(getattr(c, "default_error_messages", {}))
+        return tuple(messages.values())
+
+    def make_fields(self):
+        if self.shared_fields:
+            return self.fields.copy()
+        return copy.deepcopy(self.fields)
+
+    def get_error_prompt(self, form):
+        name, errors = min(form.errors.items(), key=lambda item: self.field_index.get(item[0], -1))
+        message = force_text(errors[0])
+        if name in self.field_index and message in self.default_error_messages[name]:
+            return u"%s [%s] %s" % (self.labels[name], name, message)
+        return message
+
+
+def get_compiled_schema(form_class):
+    schema = form_class.__dict__.get("_compiled_schema")
+    if schema is None:
+        schema = CompiledFormSchema(form_class)
+        form_class._compiled_schema = schema
+    return schema
+
+
 class BaseComponentForm(forms.Form):
     """
     Base class for component form with some useful methods
@@ -61,12 +136,25 @@ class BaseComponentForm(forms.Form):
     field_collections = ()
 
     def __init__(self, *args, **kwargs):
+        if not settings.ESB_COMPILED_FORMS_ENABLED:
+            self._schema = None
+            super(BaseComponentForm, self).__init__(*args, **kwargs)
+            for collection in self.field_collections:
+                for name, field in collection.fields:
+                    self.fields[name] = field
+            return
+
+        self._schema = get_compiled_schema(type(self))
+        # 字段已在编译时复制，使用空的 base_fields 跳过 django 对字段的深拷贝
+        self.base_fields = {}
         super(BaseComponentForm, self).__init__(*args, **kwargs)
-        for collection in self.field_collections:
-            for name, field in collection.fields:
-                self.fields[name] = field
+        del self.base_fields
+        self.fields = self._schema.make_fields()
 
-    get_error_prompt = get_error_prompt
+    def get_error_prompt(self):
+        if self._schema is None or not self._schema.shared_fields:
+            return get_error_prompt(self)
+        return self._schema.get_error_prompt(self)
 
     def _safe_get_field(self, field):
         return self[field] if field in self.fields else None
@@ -121,6 +209,23 @@ class BaseComponentForm(forms.Form):
         if self._errors:
             del self.cleaned_data
 
+    def _clean_fields(self):
+        field_cleaners = self._schema and self._schema.field_cleaners
+        if field_cleaners is None or self.prefix is not None:
+            return super(BaseComponentForm, self)._clean_fields()
+
+        for name, field, get_value, clean_hook in field_cleaners:
+            if get_value is None:
+                value = self.data.get(name)
+            else:
+                value = get_value(self.data, self.files, name)
+            try:
+                self.cleaned_data[name] = field.clean(value)
+                if clean_hook is not None:
+                    self.cleaned_data[name] = clean_hook(self)
+            except ValidationError as e:
+                self.add_error(name, e)
+
     def get_cleaned_data_when_exist(self, keys=[]):
         """
         Get cleaned_data of key when key in self.data
@@ -18,6 +18,7 @@
 #
 
 # 使用python的logging模块，配合settings的LOGGING属性
+import json
 import logging
 
 # the root logger, 用于整个project的logger
@@ -25,3 +26,33 @@ logger = logging.getLogger("root")
 
 # request and api log
 logger_api = logging.getLogger("api")
+
+
+class LazyJSONMessage:
+    """延迟构建的 JSON 日志内容
+
+    日志被 handler 格式化时才调用 builder 构建日志字典，截断过长的字段后序列化为 JSON 字符串；
+    使用异步日志 handler 时，这些操作在后台线程中执行，不占用请求的处理时间
+
+    :param builder: 返回日志字典的函数
+    :param truncate_fields: 需截断的字段，截断后长度不超过 max_length，max_length 为 0 时不截断
+    :param important: 是否为重要日志（如请求失败），日志队列繁忙需采样时，重要日志不会被丢弃
+    """
+
+    def __init__(self, builder, truncate_fields=(), max_length=0, important=False):
+        self.builder = builder
+        self.truncate_fields = truncate_fields
+        self.max_length = max_length
+        self.important = important
+        self._message = None
+
+    def __str__(self):
+        if self._message is None:
+            data = self.builder()
+            if self.max_length:
+                for field in self.truncate_fields:
+                    value = data.get(field)
+                    if isinstance(value, str) and len(value) > self.max_length:
+                        data[field] = value[: self.max_length]
+            self._message = json.dumps(data)
+        return self._message
@@ -124,6 +124,7 @@ class ProcRunCommand(Component):
         )
         client.connect()
         if not client.supports_command(data["cmd"]):
+            client.close()
             raise CommonAPIError("Does not support the command action: %s" % data["cmd"])
 
         resp = self.run_command(client, cmd)
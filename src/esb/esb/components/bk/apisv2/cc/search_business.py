@@ -34,6 +34,7 @@ class SearchBusiness(Component):
 
     sys_name = configs.SYSTEM_NAME
     api_type = API_TYPE_Q
+    is_response_shareable = True
 
     host = configs.host
 
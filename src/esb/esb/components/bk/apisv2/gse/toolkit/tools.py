@@ -27,6 +27,7 @@ from common.bkerrors import bk_error_codes
 from common.errors import CommonAPIError, RequestThirdPartyException
 from common.log import logger
 from esb.outgoing import RequestHelperClient
+from esb.utils.thrift_pool import ThriftConnection, get_thrift_connection_pool
 from lib.gse.cacheApi import CacheAPI
 from lib.gse.procServer import ProcService
 from . import configs
@@ -49,6 +50,7 @@ class BaseGSEClient(object):
         :param bool use_test_env: Use test env or not
         """
         self.thrift_client = None
+        self.connection = None
 
         self.use_test_env = use_test_env
         self.thrift_host = host
@@ -63,10 +65,14 @@ class BaseGSEClient(object):
             raise CommandDoesNotExist()
 
         req_helper_client = RequestHelperClient(self.component)
+        # 请求异常时，连接中可能残留未读取的响应，不能归还到连接池
+        broken = True
         try:
-            return req_helper_client.request(
+            response = req_helper_client.request(
                 self.thrift_client, action=command, args=args, kwargs=kwargs, is_response_parse=False
             )
+            broken = False
+            return response
         except RequestThirdPartyException as e:
             raise e
         except Exception:
@@ -75,15 +81,19 @@ class BaseGSEClient(object):
                 "An exception occurred while requesting GSE service, please contact the GSE developer to handle it."
             )  # noqa
         finally:
-            self.close()
+            self.close(discard=broken)
 
     def connect(self):
         self.close()
 
+        pool = get_thrift_connection_pool()
         for _ in range(self.MAX_CONNECT_RETRIES):
             ip = self.thrift_host.get_value(self.use_test_env)
             try:
-                self.thrift_client = self.open_thrift_connect(ip, self.thrift_port)
+                connection = pool.acquire(
+                    self.get_pool_key(ip, self.thrift_port),
+                    lambda: self.open_thrift_connect(ip, self.thrift_port),
+                )
             except Exception:
                 logger.exception(
                     "%s Cann't connect to GSE thrift server, host=%s:%s",
@@ -94,15 +104,24 @@ class BaseGSEClient(object):
                 self.thrift_client = None
                 self.thrift_host.shift_host(use_test_env=self.use_test_env)
                 continue
+
+            self.connection = connection
+            self.transport = connection.transport
+            self.thrift_client = connection.client
             break
         else:
             raise CommonAPIError("Fail to connect GSE service. Please check if GSE service is normal.")
 
-    def close(self):
+    def close(self, discard=False):
+        """将连接归还到连接池，discard 为 True 时直接关闭连接"""
         if self.thrift_client:
-            self.transport.close()
+            get_thrift_connection_pool().release(self.connection, discard=discard)
+            self.connection = None
             self.thrift_client = None
 
+    def get_pool_key(self, ip, port):
+        return (self.client_module.__name__.rsplit(".", 1)[-1], self.transport_class.__name__, ip, int(port))
+
     def open_thrift_connect(self, ip, port):
         # 使用双向证书保证安全性
         socket = TSSLSocket.TSSLSocket(
@@ -115,12 +134,12 @@ class BaseGSEClient(object):
         )
 
         socket.setTimeout(socket_timeout)
-        self.transport = self.transport_class(socket)
-        protocol = TBinaryProtocol.TBinaryProtocol(self.transport)
-        self.thrift_client = self.client_module.Client(protocol)
+        transport = self.transport_class(socket)
+        protocol = TBinaryProtocol.TBinaryProtocol(transport)
+        thrift_client = self.client_module.Client(protocol)
 
-        self.transport.open()
-        return self.thrift_client
+        transport.open()
+        return ThriftConnection(self.get_pool_key(ip, port), socket, transport, thrift_client)
 
     def supports_command(self, cmd):
         """Determine if client supports given command"""
@@ -28,6 +28,7 @@ class FeListUsers(Component, SetupConfMixin):
 
     sys_name = configs.SYSTEM_NAME
     api_type = API_TYPE_Q
+    is_response_shareable = True
 
     def handle(self):
         comp_obj = self.prepare_other(
@@ -31,6 +31,7 @@ class FsListUsers(Component, SetupConfMixin):
 
     sys_name = configs.SYSTEM_NAME
     api_type = API_TYPE_Q
+    is_response_shareable = True
 
     def _get_list_users_params(self):
         params = copy.deepcopy(self.request.kwargs)
@@ -30,6 +30,7 @@ class GetAllUsers(Component):
 
     sys_name = configs.SYSTEM_NAME
     api_type = API_TYPE_Q
+    is_response_shareable = True
 
     def handle(self):
         comp_obj = self.prepare_other(
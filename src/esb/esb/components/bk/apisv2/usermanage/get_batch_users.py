@@ -31,6 +31,7 @@ class GetBatchUsers(Component):
 
     sys_name = configs.SYSTEM_NAME
     api_type = API_TYPE_Q
+    is_response_shareable = True
 
     class Form(BaseComponentForm):
         bk_username_list = ListField(label="username list", required=True)
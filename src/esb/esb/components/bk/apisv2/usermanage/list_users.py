@@ -29,6 +29,7 @@ class ListUsers(Component, SetupConfMixin):
 
     sys_name = configs.SYSTEM_NAME
     api_type = API_TYPE_Q
+    is_response_shareable = True
 
     def handle(self):
         comp_obj = self.prepare_other(
@@ -18,9 +18,12 @@
 #
 
 from django import forms
+from django.conf import settings
+from gevent.pool import Pool
 
 from common.constants import API_TYPE_OP, HTTP_METHOD
 from common.forms import BaseComponentForm, DefaultBooleanField, ListField, TypeCheckField
+from common.log import logger
 from components.component import Component, SetupConfMixin
 from esb.channel import get_channel_manager
 from .toolkit import configs
@@ -36,8 +39,10 @@ class SendMsg(Component, SetupConfMixin):
     msg_type_map = configs.msg_type_map
 
     class Form(BaseComponentForm):
-        msg_type = forms.CharField(label="msg type", required=True)
-        receiver__username = ListField(label="recipients", required=True)
+        msg_type = forms.CharField(label="msg type", required=False)
+        msg_types = ListField(label="msg types", required=False)
+        targets = TypeCheckField(label="targets", promise_type=list, required=False)
+        receiver__username = ListField(label="recipients", required=False)
         sender = forms.CharField(label="mail sender", required=False)
         cc__username = ListField(label="CC", required=False)
         title = forms.CharField(label="subject", required=True)
@@ -54,33 +59,98 @@ class SendMsg(Component, SetupConfMixin):
 
         def clean(self):
             data = self.cleaned_data
-            if data["msg_type"] == "voice":
-                data["auto_read_message"] = data["content"]
-
-            if data["msg_type"] == "weixin":
-                data["data"] = {
-                    "heading": data["title"],
-                    "message": data["content"],
-                    "date": data["date"],
-                    "remark": data["remark"],
-                    "is_message_base64": data["is_content_base64"],
-                }
+            if data["targets"]:
+                for index, target in enumerate(data["targets"]):
+                    if not isinstance(target, dict):
+                        raise forms.ValidationError("Item %s of param [targets] should be a dict" % index)
+                data["targets"] = [
+                    SendMsg.TargetForm(target).get_cleaned_data_or_error() for target in data["targets"]
+                ]
+            elif data["msg_types"]:
+                if not data["receiver__username"]:
+                    raise forms.ValidationError("Receiver [receiver__username] shall not be empty")
+                data["targets"] = [
+                    {"msg_type": msg_type, "receiver__username": data["receiver__username"]}
+                    for msg_type in data["msg_types"]
+                ]
+            elif not (data["msg_type"] and data["receiver__username"]):
+                raise forms.ValidationError(
+                    "Param [msg_type, receiver__username] is required when msg_types or targets is not specified"
+                )
 
             return data
 
+    class TargetForm(BaseComponentForm):
+        msg_type = forms.CharField(label="msg type", required=True)
+        receiver__username = ListField(label="recipients", required=True)
+        cc__username = ListField(label="CC", required=False)
+
     def handle(self):
         data = self.form_data
         msg_type = data.pop("msg_type")
+        data.pop("msg_types")
+        targets = data.pop("targets")
 
-        channel_manager = get_channel_manager()
+        if targets:
+            self.response.payload = self.send_to_targets(targets, data)
+            return
 
         if msg_type not in configs.msg_type_map:
             self.response.payload = {"result": False, "message": "Unsupported type of msg type"}
             return
 
+        self.response.payload = self.send(msg_type, data)
+
+    def send(self, msg_type, data):
+        """通过 msg_type 对应的组件发送消息"""
+        data = self.get_msg_kwargs(msg_type, data)
+
         path = "/cmsi/%s/" % self.msg_type_map[msg_type]
-        channel_conf = channel_manager.get_channel_by_path(path, "POST")
+        channel_conf = get_channel_manager().get_channel_by_path(path, "POST")
         comp_conf = channel_conf.get("comp_conf") or {} if channel_conf else {}
         comp_obj = self.prepare_other("generic.cmsi.%s" % self.msg_type_map[msg_type], kwargs=data)
         comp_obj.setup_conf(comp_conf)
-        self.response.payload = comp_obj.invoke()
+        return comp_obj.invoke()
+
+    def send_to_targets(self, targets, data):
+        """并发发送多个目标的消息，每个目标的结果单独返回，任一目标失败不影响其它目标"""
+
+        def send_to_target(target):
+            msg_type = target["msg_type"]
+            if msg_type not in configs.msg_type_map:
+                result = {"result": False, "message": "Unsupported type of msg type"}
+            else:
+                target_data = dict(data, receiver__username=target["receiver__username"])
+                if target.get("cc__username"):
+                    target_data["cc__username"] = target["cc__username"]
+
+                try:
+                    result = self.send(msg_type, target_data)
+                except Exception:
+                    logger.exception("send msg to target failed, msg_type=%s", msg_type)
+                    result = {"result": False, "message": "Failed to send message of msg type %s" % msg_type}
+
+            return dict(result, msg_type=msg_type, receiver__username=target["receiver__username"])
+
+        pool = Pool(settings.ESB_CMSI_SEND_MSG_CONCURRENCY)
+        results = pool.map(send_to_target, targets)
+
+        if all(result["result"] for result in results):
+            return {"result": True, "message": "OK", "data": results}
+        return {"result": False, "message": "Failed to send messages to some targets", "data": results}
+
+    def get_msg_kwargs(self, msg_type, data):
+        data = dict(data)
+        if msg_type == "voice":
+            data["auto_read_message"] = data["content"]
+
+        if msg_type == "weixin":
+            data["data"] = {
+                "heading": data["title"],
+                "message": data["content"],
+                "date": data["date"],
+                "remark": data["remark"],
+                "is_message_base64": data["is_content_base64"],
+            }
+
+        return data
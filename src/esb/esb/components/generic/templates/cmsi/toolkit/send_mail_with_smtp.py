@@ -20,18 +20,23 @@
 import base64
 import mimetypes
 import smtplib
+import time
 from builtins import object
+from concurrent import futures
 from email.header import Header
 from email.mime.image import MIMEImage
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.utils import COMMASPACE  # type: ignore
 
+from django.conf import settings
 from django.utils.encoding import force_text
 
 from common.base_utils import smart_str
 from common.bkerrors import bk_error_codes
 from common.log import logger
+from esb.metrics import smtp_messages_total, smtp_send_duration_seconds
+from esb.utils.smtp_pool import get_smtp_delivery_queue, get_smtp_session_pool
 
 
 class SMTPClient(object):
@@ -66,9 +71,7 @@ class SMTPClient(object):
         self.add_attachment_to_msg(msg, kwargs.get("attachments"))
 
         try:
-            smtp = self.get_smtp_client()
-            smtp.sendmail(mail_sender, all_receiver, msg.as_string())
-            smtp.quit()
+            self.sendmail(mail_sender, all_receiver, msg.as_string())
         except Exception:
             logger.exception(
                 "%s send mail exception, server: %s:%s",
@@ -80,6 +83,47 @@ class SMTPClient(object):
         else:
             return {"result": True, "message": "Succeeded to send mail"}
 
+    def sendmail(self, from_addr, to_addrs, msg):
+        """根据配置，直接发送、复用连接池中的会话发送，或放入队列合并发送"""
+        if settings.ESB_SMTP_QUEUE_ENABLED:
+            mode = "queued"
+        elif settings.ESB_SMTP_POOL_ENABLED:
+            mode = "pooled"
+        else:
+            mode = "direct"
+
+        start_time = time.time()
+        try:
+            if mode == "queued":
+                future = get_smtp_delivery_queue().submit(
+                    self.pool_key, self.get_smtp_client, from_addr, to_addrs, msg
+                )
+                try:
+                    future.result(timeout=settings.ESB_SMTP_QUEUE_WAIT_TIMEOUT)
+                except futures.TimeoutError:
+                    # 等待超时后取消投递，避免返回失败后邮件仍被发送，调用方重试时重复发送；
+                    # 邮件已在发送中、无法取消时，等待其发送结果（受 SMTP 连接超时限制）
+                    if future.cancel():
+                        raise
+                    future.result()
+            elif mode == "pooled":
+                get_smtp_session_pool().sendmail(self.pool_key, self.get_smtp_client, from_addr, to_addrs, msg)
+            else:
+                smtp = self.get_smtp_client()
+                smtp.sendmail(from_addr, to_addrs, msg)
+                smtp.quit()
+        except Exception:
+            smtp_messages_total.labels(mode=mode, result="failure").inc()
+            raise
+        else:
+            smtp_messages_total.labels(mode=mode, result="success").inc()
+        finally:
+            smtp_send_duration_seconds.labels(mode=mode).observe(time.time() - start_time)
+
+    @property
+    def pool_key(self):
+        return (self.smtp_host, int(self.smtp_port), self.smtp_user, bool(self.smtp_usessl), bool(self.smtp_usetls))
+
     def add_content_to_msg(self, mail_msg, content, body_format):
         body_format = "plain" if body_format == "Text" else "html"
         msgtxt = MIMEText(smart_str(content), body_format, "utf-8")
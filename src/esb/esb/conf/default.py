@@ -181,11 +181,24 @@ if not BK_PAAS2_ENABLED:
 
 # log 配置
 LOG_DIR = env.str("BK_ESB_LOG_PATH", "")
+# 请求日志、API 日志放入队列，由后台线程批量序列化、写入；队列已满时丢弃日志，
+# 队列中日志数达到 BUSY_RATIO 比例时，请求成功的日志按 SAMPLE_RATE 采样
+ESB_ASYNC_API_LOG_ENABLED = env.bool("BK_ESB_ASYNC_API_LOG_ENABLED", True)
+ESB_ASYNC_API_LOG_QUEUE_OPTIONS = {
+    "queue_size": env.int("BK_ESB_ASYNC_API_LOG_QUEUE_SIZE", 10000),
+    "batch_size": env.int("BK_ESB_ASYNC_API_LOG_BATCH_SIZE", 100),
+    "flush_interval": env.float("BK_ESB_ASYNC_API_LOG_FLUSH_INTERVAL", 1.0),
+    "busy_ratio": env.float("BK_ESB_ASYNC_API_LOG_BUSY_RATIO", 0.8),
+    "sample_rate": env.float("BK_ESB_ASYNC_API_LOG_SAMPLE_RATE", 1.0),
+}
+# 请求日志、API 日志中请求参数、响应内容的最大长度，为 0 时不截断
+ESB_API_LOG_FIELD_MAX_LENGTH = env.int("BK_ESB_API_LOG_FIELD_MAX_LENGTH", 10240)
 LOGGING = get_logging_config(
     env.str("LOG_LEVEL", "WARNING"),
     LOG_DIR,
     log_to_file=env.bool("BK_ESB_LOG_TO_FILE", False) and bool(LOG_DIR),
     log_api_log_to_file=bool(LOG_DIR),
+    api_log_queue_options=ESB_ASYNC_API_LOG_QUEUE_OPTIONS if ESB_ASYNC_API_LOG_ENABLED else None,
 )
 makedirs_when_not_exists(LOG_DIR)
 
@@ -200,9 +213,67 @@ DATA_UPLOAD_MAX_MEMORY_SIZE = env.str("BK_ESB_DATA_UPLOAD_MAX_MEMORY_SIZE", 1048
 # component esb_conf
 ESB_SITE_ESB_CONF = "components.esb_conf.config"
 
+# 组件清单，由 generate_components_manifest 命令生成；清单有效时，worker 根据清单注册组件，组件模块在首次使用时导入；
+# ESB_WARM_UP_COMPONENTS 开启后，gunicorn worker 启动后、处理请求前，提前导入全部组件
+ESB_COMPONENTS_MANIFEST_PATH = env.str(
+    "BK_ESB_COMPONENTS_MANIFEST_PATH", os.path.join(BASE_DIR, "components_manifest.json")
+)
+ESB_WARM_UP_COMPONENTS = env.bool("BK_ESB_WARM_UP_COMPONENTS", False)
+
 # 默认超时时间
 REQUEST_TIMEOUT_SECS = 30
 
+# 组件表单类的字段、错误提示等只编译一次，校验请求参数时不再深拷贝字段
+ESB_COMPILED_FORMS_ENABLED = env.bool("BK_ESB_COMPILED_FORMS_ENABLED", True)
+
+# 按系统、组件记录请求处理各阶段（校验、组件调用、请求后端、渲染响应）的耗时指标
+ESB_COMPONENT_STAGE_METRICS_ENABLED = env.bool("BK_ESB_COMPONENT_STAGE_METRICS_ENABLED", True)
+
+# 组件对外请求的 keep-alive 连接池；ESB_HTTP_POOL_SYSTEM_CONFIGS 按系统名覆盖默认配置，
+# 如 {"CC": {"pool_maxsize": 50, "idle_timeout": 30, "pool_block": false}}
+ESB_HTTP_POOL_ENABLED = env.bool("BK_ESB_HTTP_POOL_ENABLED", True)
+ESB_HTTP_POOL_MAXSIZE = env.int("BK_ESB_HTTP_POOL_MAXSIZE", 10)
+ESB_HTTP_POOL_IDLE_TIMEOUT = env.int("BK_ESB_HTTP_POOL_IDLE_TIMEOUT", 60)
+ESB_HTTP_POOL_SYSTEM_CONFIGS = env.json("BK_ESB_HTTP_POOL_SYSTEM_CONFIGS", {})
+
+# 按系统熔断，并根据请求耗时自适应调整访问系统的并发上限；ESB_CIRCUIT_BREAKER_SYSTEM_CONFIGS 按系统名覆盖默认配置，
+# 如 {"CC": {"enabled": true, "open_seconds": 10, "max_concurrency": 200}}
+ESB_CIRCUIT_BREAKER_ENABLED = env.bool("BK_ESB_CIRCUIT_BREAKER_ENABLED", False)
+ESB_CIRCUIT_BREAKER_WINDOW_SIZE = env.int("BK_ESB_CIRCUIT_BREAKER_WINDOW_SIZE", 100)
+ESB_CIRCUIT_BREAKER_MIN_REQUESTS = env.int("BK_ESB_CIRCUIT_BREAKER_MIN_REQUESTS", 20)
+ESB_CIRCUIT_BREAKER_FAILURE_RATE_THRESHOLD = env.float("BK_ESB_CIRCUIT_BREAKER_FAILURE_RATE_THRESHOLD", 0.5)
+ESB_CIRCUIT_BREAKER_OPEN_SECONDS = env.int("BK_ESB_CIRCUIT_BREAKER_OPEN_SECONDS", 30)
+ESB_CIRCUIT_BREAKER_HALF_OPEN_MAX_REQUESTS = env.int("BK_ESB_CIRCUIT_BREAKER_HALF_OPEN_MAX_REQUESTS", 3)
+ESB_CIRCUIT_BREAKER_SYSTEM_CONFIGS = env.json("BK_ESB_CIRCUIT_BREAKER_SYSTEM_CONFIGS", {})
+ESB_CONCURRENCY_LIMIT_MIN = env.int("BK_ESB_CONCURRENCY_LIMIT_MIN", 5)
+ESB_CONCURRENCY_LIMIT_MAX = env.int("BK_ESB_CONCURRENCY_LIMIT_MAX", 500)
+ESB_CONCURRENCY_LIMIT_LATENCY_TOLERANCE = env.float("BK_ESB_CONCURRENCY_LIMIT_LATENCY_TOLERANCE", 2.0)
+
+# 组件访问 thrift 服务（如 GSE）时复用已打开的连接，避免每次请求都进行 TLS 握手；
+# ESB_THRIFT_POOL_MAXSIZE 为每个服务地址保留的空闲连接数上限
+ESB_THRIFT_POOL_ENABLED = env.bool("BK_ESB_THRIFT_POOL_ENABLED", True)
+ESB_THRIFT_POOL_MAXSIZE = env.int("BK_ESB_THRIFT_POOL_MAXSIZE", 10)
+ESB_THRIFT_POOL_IDLE_TIMEOUT = env.int("BK_ESB_THRIFT_POOL_IDLE_TIMEOUT", 60)
+
+# 发送邮件时复用已认证的 SMTP 会话；ESB_SMTP_QUEUE_ENABLED 开启后，
+# 邮件放入队列，由每个 SMTP 服务的 ESB_SMTP_QUEUE_WORKERS 个会话依次发送
+ESB_SMTP_POOL_ENABLED = env.bool("BK_ESB_SMTP_POOL_ENABLED", True)
+ESB_SMTP_POOL_MAXSIZE = env.int("BK_ESB_SMTP_POOL_MAXSIZE", 5)
+ESB_SMTP_POOL_IDLE_TIMEOUT = env.int("BK_ESB_SMTP_POOL_IDLE_TIMEOUT", 30)
+ESB_SMTP_POOL_MAX_MESSAGES_PER_SESSION = env.int("BK_ESB_SMTP_POOL_MAX_MESSAGES_PER_SESSION", 100)
+ESB_SMTP_QUEUE_ENABLED = env.bool("BK_ESB_SMTP_QUEUE_ENABLED", False)
+ESB_SMTP_QUEUE_WORKERS = env.int("BK_ESB_SMTP_QUEUE_WORKERS", 2)
+ESB_SMTP_QUEUE_WAIT_TIMEOUT = env.int("BK_ESB_SMTP_QUEUE_WAIT_TIMEOUT", 60)
+ESB_SMTP_QUEUE_MAXSIZE = env.int("BK_ESB_SMTP_QUEUE_MAXSIZE", 1000)
+
+# channel 配置中开启请求合并（{"request_coalescing": {"enabled": true, "cache_ttl": 1}}）时，
+# 复用结果的缓存条目上限，以及等待相同请求结果的最长时间，超时后直接调用组件
+ESB_REQUEST_COALESCING_CACHE_MAXSIZE = env.int("BK_ESB_REQUEST_COALESCING_CACHE_MAXSIZE", 1000)
+ESB_REQUEST_COALESCING_WAIT_TIMEOUT = env.int("BK_ESB_REQUEST_COALESCING_WAIT_TIMEOUT", 30)
+
+# 通用消息发送组件 (cmsi.send_msg) 指定多个发送目标时，并发调用消息组件的数量上限
+ESB_CMSI_SEND_MSG_CONCURRENCY = env.int("BK_ESB_CMSI_SEND_MSG_CONCURRENCY", 5)
+
 ESB_TOKEN = env.str("ESB_TOKEN")
 ESB_COMPONENTS_SWAGGER_TOKEN = env.str("ESB_COMPONENTS_SWAGGER_TOKEN", "673919d2d8714252a40d148601187e70")
 
@@ -218,9 +289,30 @@ LIST_APP_SECRETS_CACHE_MAXSIZE = env.int("LIST_APP_SECRETS_CACHE_MAXSIZE", 2000)
 LIST_APP_SECRETS_CACHE_TTL = env.int("LIST_APP_SECRETS_CACHE_TTL", 300)
 VERIFY_APP_SECRET_RESULT_CACHE_MAXSIZE = env.int("VERIFY_APP_SECRET_RESULT_CACHE_MAXSIZE", 2000)
 VERIFY_APP_SECRET_RESULT_CACHE_TTL = env.int("VERIFY_APP_SECRET_RESULT_CACHE_TTL", 300)
+# 认证相关数据使用两级缓存：数据过期后 ESB_AUTH_CACHE_STALE_TTL 秒内先返回旧数据，同时在后台刷新；
+# ESB_AUTH_SHARED_CACHE_ALIAS 设置为 CACHES 中的缓存别名（如 Redis、数据库缓存）后，多个进程共享缓存数据
+ESB_AUTH_CACHE_STALE_TTL = env.int("BK_ESB_AUTH_CACHE_STALE_TTL", 30)
+ESB_AUTH_CACHE_REFRESH_CONCURRENCY = env.int("BK_ESB_AUTH_CACHE_REFRESH_CONCURRENCY", 10)
+ESB_AUTH_SHARED_CACHE_ALIAS = env.str("BK_ESB_AUTH_SHARED_CACHE_ALIAS", "")
+CACHES = env.json("BK_ESB_CACHES", {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+# 无效的 bk_token、access_token 校验结果在进程内缓存的时长，期间相同凭证的请求不再访问后端
+ESB_AUTH_NEGATIVE_CACHE_MAXSIZE = env.int("BK_ESB_AUTH_NEGATIVE_CACHE_MAXSIZE", 5000)
+BK_TOKEN_NEGATIVE_CACHE_TTL_SECONDS = env.int("BK_TOKEN_NEGATIVE_CACHE_TTL_SECONDS", 10)
+BK_SSM_ACCESS_TOKEN_NEGATIVE_CACHE_TTL_SECONDS = env.int("BK_SSM_ACCESS_TOKEN_NEGATIVE_CACHE_TTL_SECONDS", 10)
+# 应用的同一客户端 IP 在窗口内 bk_token 校验失败达到上限后，其请求直接校验失败，直到窗口内不再有新的失败；上限为 0 时不限制
+ESB_USER_AUTH_FAILURE_THROTTLE_WINDOW = env.int("BK_ESB_USER_AUTH_FAILURE_THROTTLE_WINDOW", 60)
+ESB_USER_AUTH_FAILURE_THROTTLE_LIMIT = env.int("BK_ESB_USER_AUTH_FAILURE_THROTTLE_LIMIT", 100)
 DB_CHANNEL_REFRESH_INTERVAL = env.int("DB_CHANNEL_REFRESH_INTERVAL", 300)
+# 通常只在数据版本变化时增量刷新 channel，每隔该时长强制全量刷新一次，兜底未更新 updated_time 的批量修改
+DB_CHANNEL_FULL_REFRESH_INTERVAL = env.int("DB_CHANNEL_FULL_REFRESH_INTERVAL", 3600)
 BK_ESB_JWT_PUBLIC_KEY_CACHE_MAXSIZE = env.int("BK_ESB_JWT_PUBLIC_KEY_CACHE_MAXSIZE", 100)
 BK_ESB_JWT_PUBLIC_KEY_CACHE_TTL = env.int("BK_ESB_JWT_PUBLIC_KEY_CACHE_TTL", 86400)
+# 网关转发请求中已校验的 X-Bkapi-JWT 内容缓存，缓存内容不会超过 JWT 的过期时间
+BK_ESB_GATEWAY_JWT_CACHE_MAXSIZE = env.int("BK_ESB_GATEWAY_JWT_CACHE_MAXSIZE", 5000)
+BK_ESB_GATEWAY_JWT_CACHE_TTL = env.int("BK_ESB_GATEWAY_JWT_CACHE_TTL", 60)
+# 组件请求后端时生成的 X-Bkapi-JWT 会被缓存复用，直到过期前 EXPIRE_MARGIN 秒
+BK_ESB_SIGNED_JWT_CACHE_MAXSIZE = env.int("BK_ESB_SIGNED_JWT_CACHE_MAXSIZE", 5000)
+BK_ESB_SIGNED_JWT_CACHE_EXPIRE_MARGIN = env.int("BK_ESB_SIGNED_JWT_CACHE_EXPIRE_MARGIN", 120)
 
 # ==============================================================================
 # 第三方接口配置
@@ -17,13 +17,27 @@
 # to the current version of the project delivered to anyone in the future.
 #
 import os
+from typing import Optional
 
 LOG_MAX_BYTES = 500 * 1024 * 1024
 LOG_BACKUP_COUNT = 3
 LOG_CLASS = "concurrent_log_handler.ConcurrentRotatingFileHandler"
 
 
-def get_logging_config(log_level: str, log_dir: str, log_to_file: bool = False, log_api_log_to_file: bool = True):
+def get_logging_config(
+    log_level: str,
+    log_dir: str,
+    log_to_file: bool = False,
+    log_api_log_to_file: bool = True,
+    api_log_queue_options: Optional[dict] = None,
+):
+    """
+    :param api_log_queue_options: 不为 None 时，请求日志、API 日志通过异步队列批量写入，值为队列配置
+    """
+    api_handler = _get_logging_handler(log_api_log_to_file, os.path.join(log_dir, "esb_api.log"), "simple")
+    if api_log_queue_options is not None:
+        api_handler = _get_queue_logging_handler(api_handler, api_log_queue_options)
+
     return {
         "version": 1,
         "disable_existing_loggers": False,
@@ -53,7 +67,7 @@ def get_logging_config(log_level: str, log_dir: str, log_to_file: bool = False,
                 "formatter": "simple",
             },
             "root": _get_logging_handler(log_to_file, os.path.join(log_dir, "esb.log"), "verbose"),
-            "api": _get_logging_handler(log_api_log_to_file, os.path.join(log_dir, "esb_api.log"), "simple"),
+            "api": api_handler,
             "mysql": _get_logging_handler(log_to_file, os.path.join(log_dir, "esb_mysql.log"), "verbose"),
         },
         "loggers": {
@@ -119,3 +133,14 @@ def _get_logging_handler(log_to_file: bool, filename: str, formatter: str):
         "class": "logging.StreamHandler",
         "formatter": formatter,
     }
+
+
+def _get_queue_logging_handler(handler: dict, queue_options: dict):
+    target_kwargs = {key: value for key, value in handler.items() if key not in ("class", "formatter")}
+    return {
+        "class": "esb.utils.log_queue.BatchingQueueHandler",
+        "formatter": handler["formatter"],
+        "target_class": handler["class"],
+        "target_kwargs": target_kwargs,
+        **queue_options,
+    }
@@ -23,6 +23,7 @@ from django.conf import settings
 
 from esb.bkcore.models import AppAccount
 from esb.paas2.models import App
+from esb.utils.two_tier_cache import TwoTierCache, two_tier_cached
 
 
 class AppSecureInfo:
@@ -51,8 +52,9 @@ class AppSecureInfo:
 
 class BKAuthHelper:
     @classmethod
-    @cached(
-        cache=TTLCache(
+    @two_tier_cached(
+        TwoTierCache(
+            "list_app_secrets",
             maxsize=settings.LIST_APP_SECRETS_CACHE_MAXSIZE,
             ttl=settings.LIST_APP_SECRETS_CACHE_TTL,
         )
@@ -82,8 +84,9 @@ class BKAuthHelper:
         return app_secrets, "ok"
 
     @classmethod
-    @cached(
-        cache=TTLCache(
+    @two_tier_cached(
+        TwoTierCache(
+            "verify_app_secret",
             maxsize=settings.VERIFY_APP_SECRET_RESULT_CACHE_MAXSIZE,
             ttl=settings.VERIFY_APP_SECRET_RESULT_CACHE_TTL,
         )
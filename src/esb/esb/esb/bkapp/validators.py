@@ -22,7 +22,6 @@ import hashlib
 import hmac
 import time
 
-from cachetools import TTLCache, cached
 from django.conf import settings
 from django.utils.encoding import force_bytes
 
@@ -31,6 +30,7 @@ from common.base_validators import BaseValidator, ValidationError
 from common.errors import error_codes
 from common.log import logger
 from esb.bkapp.helpers import BKAuthHelper
+from esb.utils.two_tier_cache import TwoTierCache, two_tier_cached
 
 
 class AppAuthValidator(BaseValidator):
@@ -116,10 +116,13 @@ class AccessTokenValidator(BaseValidator):
         return self.validated_data["bk_username"]
 
     @staticmethod
-    @cached(
-        cache=TTLCache(
+    @two_tier_cached(
+        TwoTierCache(
+            "verify_access_token",
             maxsize=settings.BK_SSM_ACCESS_TOKEN_CACHE_MAXSIZE,
             ttl=settings.BK_SSM_ACCESS_TOKEN_CACHE_TTL_SECONDS,
+            negative_ttl=settings.BK_SSM_ACCESS_TOKEN_NEGATIVE_CACHE_TTL_SECONDS,
+            negative_exceptions=(ValidationError,),
         )
     )
     def _verify_access_token(access_token):
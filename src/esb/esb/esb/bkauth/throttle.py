@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import threading
+from typing import Hashable
+
+from cachetools import TTLCache
+
+
+class AuthFailureThrottle:
+    """统计每个 key（如应用及客户端 IP）在窗口内的认证失败次数，达到上限后直接拒绝，直到窗口内不再有新的失败
+
+    用于拦截持续使用无效凭证的客户端，避免每次请求都访问登录、SSM 等后端服务
+    """
+
+    def __init__(self, maxsize: int, window: int, limit: int):
+        """
+        :param window: 统计窗口，秒；每次失败都会重新开始计时
+        :param limit: 窗口内允许的失败次数，为 0 时不限制
+        """
+        self.limit = limit
+        self._failures: TTLCache = TTLCache(maxsize=maxsize, ttl=window)
+        self._lock = threading.Lock()
+
+    def is_throttled(self, key: Hashable) -> bool:
+        if self.limit <= 0:
+            return False
+
+        with self._lock:
+            return self._failures.get(key, 0) >= self.limit
+
+    def record_failure(self, key: Hashable):
+        if self.limit <= 0:
+            return
+
+        with self._lock:
+            self._failures[key] = self._failures.get(key, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._failures.clear()
@@ -17,19 +17,54 @@
 # to the current version of the project delivered to anyone in the future.
 #
 
-from cachetools import TTLCache, cached
 from django.conf import settings
 
 from common.base_utils import get_first_not_empty_value
 from common.base_validators import BaseValidator, ValidationError
 from esb.bkapp.validators import AccessTokenValidator
+from esb.bkauth.throttle import AuthFailureThrottle
 from esb.bkcore.models import AccessToken
+from esb.metrics import user_auth_failure_throttled_total
 from esb.utils.func_ctrl import FunctionControllerClient
+from esb.utils.two_tier_cache import TwoTierCache, two_tier_cached
+
+bk_token_failure_throttle = AuthFailureThrottle(
+    maxsize=settings.ESB_AUTH_NEGATIVE_CACHE_MAXSIZE,
+    window=settings.ESB_USER_AUTH_FAILURE_THROTTLE_WINDOW,
+    limit=settings.ESB_USER_AUTH_FAILURE_THROTTLE_LIMIT,
+)
+
+
+class InvalidBkTokenError(ValidationError):
+    """登录服务确认 bk_token 无效，会被短时缓存，并计入认证失败次数"""
+
+
+class AuthFailureThrottledError(ValidationError):
+    """客户端近期认证失败次数过多，请求被直接拒绝；不在 bk_token 的校验缓存中缓存"""
+
+
+def is_login_service_error(check_result):
+    """请求登录服务失败（如：服务不可用、被熔断），此时无法确定 bk_token 是否有效；错误码为 ESB 的 13062xx"""
+    code = check_result.get("code")
+    return isinstance(code, int) and code // 100 == 13062
 
 
 class BaseUserAuthValidator(BaseValidator):
     def validate_bk_token(self, request, bk_token):
-        username = self._verify_bk_token(bk_token, request.g.app_code)
+        # 按应用及客户端 IP 统计失败次数，避免个别客户端持续提供无效的 bk_token，导致同一应用的其它客户端被拒绝
+        throttle_key = (request.g.app_code, request.g.get("client_ip", ""))
+        if bk_token_failure_throttle.is_throttled(throttle_key):
+            user_auth_failure_throttled_total.labels(token_type="bk_token").inc()
+            raise AuthFailureThrottledError(
+                "User authentication failed, too many invalid bk_token were provided recently, please try again later"
+            )
+
+        try:
+            username = self._verify_bk_token(bk_token, request.g.app_code)
+        except InvalidBkTokenError:
+            bk_token_failure_throttle.record_failure(throttle_key)
+            raise
+
         self.sync_current_username(request, username, verified=True)
 
     def validate_access_token(self, request, app_code, access_token):
@@ -53,10 +88,13 @@ class BaseUserAuthValidator(BaseValidator):
         request.g.current_user_verified = verified
 
     @staticmethod
-    @cached(
-        cache=TTLCache(
+    @two_tier_cached(
+        TwoTierCache(
+            "verify_bk_token",
             maxsize=settings.BK_TOKEN_CACHE_MAXSIZE,
             ttl=settings.BK_TOKEN_CACHE_TTL_SECONDS,
+            negative_ttl=settings.BK_TOKEN_NEGATIVE_CACHE_TTL_SECONDS,
+            negative_exceptions=(InvalidBkTokenError,),
         )
     )
     def _verify_bk_token(bk_token, app_code):
@@ -64,7 +102,11 @@ class BaseUserAuthValidator(BaseValidator):
 
         check_result = IsLogin().invoke(kwargs={"bk_token": bk_token}, app_code=app_code)
         if not check_result["result"]:
-            raise ValidationError("User authentication failed, please check if the bk_token is valid")
+            if is_login_service_error(check_result):
+                raise ValidationError(
+                    "User authentication failed, request login service error: %s" % check_result.get("message", "")
+                )
+            raise InvalidBkTokenError("User authentication failed, please check if the bk_token is valid")
 
         return check_result.get("data", {}).get("username", "")
 
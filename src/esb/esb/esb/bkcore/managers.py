@@ -16,14 +16,22 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 #
-from typing import Dict, List, Optional
+import datetime
+from typing import Dict, List, Optional, Tuple
 
 from django.db import models
 
 from esb.bkcore.constants import DataTypeEnum
 
 
-class SystemManager(models.Manager):
+class DataVersionManagerMixin:
+    def get_data_version(self) -> Tuple[int, Optional[datetime.datetime]]:
+        """获取数据的版本：记录数和最近的更新时间，用于低成本地判断数据是否有变更"""
+        result = self.aggregate(count=models.Count("id"), updated_time=models.Max("updated_time"))
+        return result["count"], result["updated_time"]
+
+
+class SystemManager(DataVersionManagerMixin, models.Manager):
     def get_name_to_obj_map(self):
         return {system.name: system for system in self.all()}
 
@@ -34,7 +42,7 @@ class SystemManager(models.Manager):
         return list(self.exclude(data_type=DataTypeEnum.CUSTOM.value).values_list("id", flat=True))
 
 
-class ESBChannelManager(models.Manager):
+class ESBChannelManager(DataVersionManagerMixin, models.Manager):
     def get_best_matched_channel(self, method: str, paths: List[str]):
         """
         获取最匹配给定条件的 channel
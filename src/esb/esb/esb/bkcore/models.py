@@ -154,6 +154,7 @@ class ESBChannel(ModelWithBoard, TimestampedModelMixin, OperatorModelMixin):
         return {
             "id": self.id,
             "permission_level": self.permission_level,
+            "request_coalescing": self.config.get("request_coalescing"),
         }
 
     @property
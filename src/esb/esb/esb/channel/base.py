@@ -18,19 +18,28 @@
 #
 
 import copy
+import hashlib
 import json
 import re
 import time
 import uuid
 from builtins import object, str
 from collections import defaultdict
+from contextlib import contextmanager
 from dataclasses import dataclass
 from typing import Optional
 
 from django.conf import settings
 from django.http import HttpResponse
 
-from common.base_utils import FancyDict, get_client_ip, get_first_not_empty_value, get_request_params, str_bool
+from common.base_utils import (
+    FancyDict,
+    freeze,
+    get_client_ip,
+    get_first_not_empty_value,
+    get_request_params,
+    str_bool,
+)
 from common.base_validators import ValidationError
 from common.constants import COMPONENT_STATUSES
 from common.django_utils import JsonResponse
@@ -39,15 +48,19 @@ from common.errors import (
     CommonAPIError,
     HostNotFoundException,
     RequestBlockedException,
+    RequestRejectedException,
     RequestSSLException,
     RequestThirdPartyException,
     error_codes,
 )
 from common.log import logger
-from esb.component import CompRequest
+from esb.channel.path_router import PathTemplateRouter
+from esb.component import CompRequest, get_components_manager
 from esb.gateway.helpers import JWTClient, is_from_gateway_with_jwt
+from esb.metrics import component_stage_duration_seconds, request_coalescing_total
 from esb.response import format_resp_dict
-from esb.utils.base import PathVars, has_path_vars, preprocess_path_tmpl
+from esb.utils.base import has_path_vars
+from esb.utils.request_coalescing import CoalescingConfig, get_request_coalescer
 
 
 class BaseChannel(object):
@@ -120,10 +133,31 @@ class BaseChannel(object):
         """
         for validator in self.request_validators:
             try:
-                validator.validate(request)
+                with self.stage_timer("validate:%s" % type(validator).__name__):
+                    validator.validate(request)
             except ValidationError as e:
                 raise CommonAPIError(e.message)
 
+    @contextmanager
+    def stage_timer(self, stage):
+        """
+        记录请求处理各阶段的耗时，组件只能是已注册的组件，因此指标的标签数量有限
+        """
+        if not settings.ESB_COMPONENT_STAGE_METRICS_ENABLED:
+            yield
+            return
+
+        started_at = time.time()
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, time.time() - started_at)
+
+    def observe_stage(self, stage, seconds):
+        component_stage_duration_seconds.labels(
+            system=self.comp.sys_name, component=self.comp.get_alias_name(), stage=stage
+        ).observe(seconds)
+
     def log_request(self, request, response):
         """
         Write request logs if needed
@@ -207,7 +241,8 @@ class BaseChannel(object):
 
                 self.comp.set_request(CompRequest(wsgi_request=request))
 
-                response = self.comp.invoke()
+                with self.stage_timer("invoke"):
+                    response = self.invoke_component(request)
         except APIError as e:
             response = e.code.as_dict()
             request.g.component_status = COMPONENT_STATUSES.ARGUMENT_ERROR
@@ -225,6 +260,9 @@ class BaseChannel(object):
         except RequestBlockedException as e:
             response = error_codes.REQUEST_BLOCKED.format_prompt(e.message).code.as_dict()
             request.g.component_status = COMPONENT_STATUSES.EXCEPTION
+        except RequestRejectedException as e:
+            response = error_codes.REQUEST_REJECTED.format_prompt(e.get_message(), replace=True).code.as_dict()
+            request.g.component_status = COMPONENT_STATUSES.EXCEPTION
         except Exception:
             logger.exception("Request exception, request_id=%s, path=%s" % (request.g.request_id, request.path))
             response = CommonAPIError(
@@ -245,9 +283,63 @@ class BaseChannel(object):
         # Hook after request
         self.after_handle_request()
 
-        self.response = self.render_to_response(self.response, request)
+        with self.stage_timer("render"):
+            self.response = self.render_to_response(self.response, request)
+
+        if settings.ESB_COMPONENT_STAGE_METRICS_ENABLED:
+            self.observe_stage("total", time.time() - self.request.g.ts_request_start)
         return self.response
 
+    def invoke_component(self, request):
+        """
+        调用组件；channel 开启了请求合并，且组件声明其响应可共享时，相同的并发请求只调用一次组件
+        """
+        config = CoalescingConfig.from_channel_conf(self.channel_conf)
+        if not (config.enabled and self.comp.is_response_shareable):
+            return self.comp.invoke()
+
+        key = self.get_coalescing_key(request)
+        if not key:
+            return self.comp.invoke()
+
+        response, source = get_request_coalescer().call(
+            key,
+            self.comp.invoke,
+            cache_ttl=config.cache_ttl,
+            cacheable=lambda response: isinstance(response, dict) and bool(response.get("result")),
+        )
+        request.g.coalescing_source = source
+        request_coalescing_total.labels(
+            system=self.comp.sys_name, component=self.comp.get_alias_name(), result=source
+        ).inc()
+        return response
+
+    def get_coalescing_key(self, request):
+        """
+        根据系统、channel、组件、请求参数、应用、用户等生成合并请求的 key，请求参数中的认证信息不参与；参数无法序列化时不合并
+        """
+        g = request.g
+        params = g.kwargs_copy if "kwargs_copy" in g else g.kwargs
+        try:
+            data = json.dumps(
+                [
+                    g.get("system_name", ""),
+                    self.path,
+                    g.component_name,
+                    {key: value for key, value in params.items() if key not in RequestHandler.AUTHORIZATION_KEYS},
+                    g.get("path_vars"),
+                    g.get("app_code", ""),
+                    g.get("current_user_username", ""),
+                    g.use_test_env,
+                    g.headers.get("Blueking-Language", ""),
+                ],
+                sort_keys=True,
+            )
+        except (TypeError, ValueError):
+            return ""
+
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
     def render_to_response(self, response, request):
         # Turn dict response to django response
         if isinstance(response, dict):
@@ -363,6 +455,60 @@ class ChannelRoute:
     append_request_validators: Optional[list] = None
 
 
+@dataclass(frozen=True)
+class PreparedRoute:
+    """已解析完成的 channel 路由，在 channel 数据刷新前可被多个请求共享，因此其中数据均为只读"""
+
+    channel_class: type
+    comp_class: type
+    comp_conf: Optional[dict]
+    channel_conf: dict
+    request_validators: list
+    timeout: Optional[int] = None
+
+    @classmethod
+    def from_channel_conf(cls, channel_type: str, channel_conf: dict) -> "PreparedRoute":
+        channel_route = channel_conf["channel_route"]
+        # Check if channel is active
+        if not channel_route.is_active:
+            raise error_codes.INACTIVE_CHANNEL
+
+        # Check if channel's component class exists
+        comp_class = get_components_manager().get_comp_by_name(channel_route.component_codename)
+        if not comp_class:
+            raise error_codes.COMPONENT_NOT_FOUND.format_prompt(channel_route.component_codename)
+
+        channel_class = channel_conf["classes"][channel_type]
+
+        # 判断该channel是否拥有自定义的validators
+        request_validators = channel_class.request_validators
+        if channel_route.request_validators is not None:
+            request_validators = channel_route.request_validators
+        if channel_route.append_request_validators is not None:
+            request_validators = request_validators + channel_route.append_request_validators
+
+        return cls(
+            channel_class=channel_class,
+            comp_class=comp_class,
+            comp_conf=freeze(channel_conf.get("comp_conf")),
+            channel_conf=freeze(channel_conf.get("channel_conf") or {}),
+            request_validators=request_validators,
+            timeout=channel_route.timeout,
+        )
+
+    def make_channel(self, path: str) -> BaseChannel:
+        """创建处理本次请求的 channel 对象，只读的 comp_conf 在 setup_conf 时无需再深拷贝"""
+        channel = self.channel_class(
+            self.comp_class,
+            path=path,
+            is_active=True,
+            comp_conf=self.comp_conf,
+            channel_conf=self.channel_conf,
+        )
+        channel.set_request_validators(self.request_validators)
+        return channel
+
+
 class BaseChannelManager(object):
     """
     Manager for Channels, query database to find the matching channel.
@@ -374,8 +520,8 @@ class BaseChannelManager(object):
         {
             "GET": {
                 "/cc/add_plat_id/": {
-                    "re_path": re_obj,
-                    "channel": esb_channel_obj,
+                    "path": "/cc/add_plat_id/",
+                    "channel_route": channel_route_obj,
                     "classes": {"api": None},
                     "comp_conf": {},
                     "channel_conf": {},
@@ -385,9 +531,15 @@ class BaseChannelManager(object):
         """
         self.preset_channels = defaultdict(dict)
         self.preset_channels_with_path_vars = defaultdict(dict)
+        # 由 preset_channels_with_path_vars 构建，按请求方法分组的路径模板前缀树
+        self.path_vars_routers = {}
         self.default_channel_classes = None
         self.rewrite_channels = {}
 
+        # channel 数据每次变更时递增，已缓存的 PreparedRoute 随之失效
+        self.generation = 0
+        self._prepared_routes = {}
+
     def __str__(self):
         return "<BaseChannelManager>"
 
@@ -419,7 +571,7 @@ class BaseChannelManager(object):
 
     def search_channel_by_repath(self, path, method):
         """
-        根据正则匹配来查找对应的channel
+        根据路径模板匹配来查找对应的channel
 
         :param str path: 需要查询的路径
         :param str method: HTTP请求的方法
@@ -430,14 +582,29 @@ class BaseChannelManager(object):
         if not path.startswith("/"):
             path = "/%s" % path
 
-        channels = self.preset_channels_with_path_vars.get(method, {})
-        for value in list(channels.values()):
-            matched_obj = value["re_path"].match(path)
-            if matched_obj:
-                # 把匹配到的path变量作为结果返回
-                return value, PathVars.from_matched_obj(matched_obj)
+        router = self.path_vars_routers.get(method)
+        if router is None:
+            return None, None
 
-        return None, None
+        return router.match(path)
+
+    def get_prepared_route(self, channel_type, method, channel_conf):
+        """获取 channel 对应的 PreparedRoute，同一份 channel 数据只解析一次
+
+        :param str channel_type: channel 类型，如 api
+        :param str method: HTTP请求的方法
+        :param dict channel_conf: get_channel_by_path 或 search_channel_by_repath 查询到的 channel
+        """
+        key = (channel_conf["path"], method, channel_type, self.generation)
+        prepared_route = self._prepared_routes.get(key)
+        if prepared_route is None:
+            prepared_route = PreparedRoute.from_channel_conf(channel_type, channel_conf)
+            self._prepared_routes[key] = prepared_route
+        return prepared_route
+
+    def reset_prepared_routes(self):
+        self.generation += 1
+        self._prepared_routes = {}
 
     def get_rewrite_path_by_path(self, path):
         """不同版本 path 指向同一组件；现统一为重定向后的path"""
@@ -461,6 +628,9 @@ class BaseChannelManager(object):
         for method, channels in preset_channels_with_path_vars.items():
             self.preset_channels_with_path_vars[method].update(channels)
 
+        self.path_vars_routers = self._build_path_vars_routers(self.preset_channels_with_path_vars)
+        self.reset_prepared_routes()
+
     def _generate_channel_groups(self, channel_classes, channels):
         preset_channels = defaultdict(dict)
         preset_channels_with_path_vars = defaultdict(dict)
@@ -484,6 +654,7 @@ class BaseChannelManager(object):
 
             for method in methods:
                 preset_channel = {
+                    "path": path,
                     "channel_route": channel_route,
                     "classes": value.get("channel_classes") or channel_classes,
                     "comp_conf": value.get("comp_conf"),
@@ -491,7 +662,16 @@ class BaseChannelManager(object):
                 }
                 preset_channels[method][path] = preset_channel
                 if has_path_vars(path):
-                    preset_channel["re_path"] = re.compile(r"^%s$" % preprocess_path_tmpl(path))
                     preset_channels_with_path_vars[method][path] = preset_channel
 
         return preset_channels, preset_channels_with_path_vars
+
+    def _build_path_vars_routers(self, preset_channels_with_path_vars):
+        """按注册顺序构建路径模板前缀树，多个模板都能匹配时，与原正则逐个匹配一样优先返回先注册的"""
+        routers = {}
+        for method, channels in preset_channels_with_path_vars.items():
+            router = PathTemplateRouter()
+            for path, preset_channel in channels.items():
+                router.add(path, preset_channel)
+            routers[method] = router
+        return routers
@@ -16,17 +16,42 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 #
-from typing import List, Tuple
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
 
 from django.conf import settings
+from django.db.models import Q
 
 from common.singleton import SingletonMeta
 from esb.bkcore.models import ESBChannel, System
 from esb.channel.base import BaseChannelManager
+from esb.metrics import db_channel_refresh_duration_seconds, db_channel_refresh_skipped_total
+from esb.utils.base import has_path_vars
 from esb.utils.esb_config import EsbConfigParser
 from esb.utils.thread import PeriodicTimer
 
 
+@dataclass(frozen=True)
+class ChannelDataVersion:
+    """channel 相关数据的版本，版本不变时无需刷新 channel"""
+
+    channel_version: tuple
+    system_version: tuple
+
+    @classmethod
+    def from_db(cls) -> "ChannelDataVersion":
+        return cls(
+            channel_version=ESBChannel.objects.get_data_version(),
+            system_version=System.objects.get_data_version(),
+        )
+
+    @property
+    def channel_updated_time(self):
+        return self.channel_version[1]
+
+
 class DBChannelManager(BaseChannelManager, metaclass=SingletonMeta):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -40,6 +65,16 @@ class DBChannelManager(BaseChannelManager, metaclass=SingletonMeta):
         # 为不单独处理 rewrite_channels, 因此将其配置到此处
         self.update_rewrite_channels(self._esb_config_parser.get_rewrite_channels())
 
+        # 最近一次刷新时加载的数据，用于增量刷新
+        self._channels: Dict[int, Tuple[str, dict]] = {}
+        # channel id -> {请求方法: preset_channel}，增量刷新时只重新生成变更的 channel
+        self._channel_entries: Dict[int, Dict[str, dict]] = {}
+        # (请求方法, 路径) -> 注册了该路径的 channel id；多个 channel 路径相同时，与全量生成一致，id 最大的生效
+        self._path_channel_ids: Dict[Tuple[str, str], Set[int]] = defaultdict(set)
+        self._system_id_to_timeout: Dict[int, Optional[int]] = {}
+        self._data_version: Optional[ChannelDataVersion] = None
+        self._last_full_refreshed_at = 0.0
+
         # 初始化数据，防止第一次请求时无数据
         self._refresh_channel_groups()
 
@@ -50,48 +85,183 @@ class DBChannelManager(BaseChannelManager, metaclass=SingletonMeta):
         return "<DBChannelManager>"
 
     def _refresh_channel_groups(self):
+        started_at = time.perf_counter()
+        refresh_type = self._refresh_channel_groups_by_data_version()
+        db_channel_refresh_duration_seconds.labels(refresh_type=refresh_type).observe(time.perf_counter() - started_at)
+
+    def _refresh_channel_groups_by_data_version(self) -> str:
+        """根据数据版本决定刷新方式，返回刷新类型：full、incremental、skipped"""
+        # 先获取版本再加载数据，加载过程中发生的变更会在下次刷新时被发现
+        data_version = ChannelDataVersion.from_db()
+        now = time.time()
+        full_refresh_due = now - self._last_full_refreshed_at >= settings.DB_CHANNEL_FULL_REFRESH_INTERVAL
+
+        if data_version == self._data_version and not full_refresh_due:
+            db_channel_refresh_skipped_total.inc()
+            return "skipped"
+
+        if full_refresh_due or not self._can_refresh_incrementally(data_version):
+            self._system_id_to_timeout = System.objects.get_system_id_to_timeout()
+            channels = self._get_channels_from_db()
+            refresh_type = "full"
+            self._last_full_refreshed_at = now
+        else:
+            channels = self._get_changed_channels_from_db()
+            refresh_type = "incremental"
+
+        self._set_channels(channels)
+        self._data_version = data_version
+        return refresh_type
+
+    def _can_refresh_incrementally(self, data_version: ChannelDataVersion) -> bool:
+        """系统数据变更会影响所有 channel 的超时时间，只有 channel 数据变更时才可增量刷新"""
+        return (
+            self._data_version is not None
+            and self._data_version.system_version == data_version.system_version
+            and self._data_version.channel_updated_time is not None
+        )
+
+    def _set_channels(self, channels: Dict[int, Tuple[str, dict]]):
         # 刷新 db channel 时，加载的数据应与 db 中数据保持一致，
         # 并且应在生成数据后，再替换 `preset_channels`，防止因生成过程中部分数据未加载导致请求出错
-        channels = self._get_channels_from_db()
+        # 增量加载时，未变更的 channel 沿用上次加载的对象，据此找出变更的 channel
+        changed_ids = {
+            channel_id for channel_id, channel in channels.items() if channel is not self._channels.get(channel_id)
+        }
+        removed_ids = set(self._channels) - set(channels)
+        if len(changed_ids) == len(channels):
+            self._rebuild_channel_groups(channels)
+        else:
+            self._update_channel_groups(channels, changed_ids, removed_ids)
 
-        preset_channels, preset_channels_with_path_vars = self._generate_channel_groups(
-            self.get_default_channel_classes(),
-            channels,
-        )
+        self._channels = channels
+        self.reset_prepared_routes()
+
+    def _rebuild_channel_groups(self, channels: Dict[int, Tuple[str, dict]]):
+        self._channel_entries = {}
+        self._path_channel_ids = defaultdict(set)
+        preset_channels: Dict[str, dict] = defaultdict(dict)
+        preset_channels_with_path_vars: Dict[str, dict] = defaultdict(dict)
+
+        # 按 id 排序，使增量刷新与全量刷新时，路径模板的匹配优先级一致
+        for channel_id in sorted(channels):
+            path = channels[channel_id][0]
+            entries = self._channel_entries[channel_id] = self._generate_channel_entries(channels[channel_id])
+            for method, entry in entries.items():
+                self._path_channel_ids[(method, path)].add(channel_id)
+                preset_channels[method][path] = entry
+                if has_path_vars(path):
+                    preset_channels_with_path_vars[method][path] = entry
+
+        path_vars_routers = self._build_path_vars_routers(preset_channels_with_path_vars)
+
+        self.preset_channels = preset_channels
+        self.preset_channels_with_path_vars = preset_channels_with_path_vars
+        self.path_vars_routers = path_vars_routers
+
+    def _update_channel_groups(
+        self, channels: Dict[int, Tuple[str, dict]], changed_ids: Set[int], removed_ids: Set[int]
+    ):
+        """只重新生成变更的 channel，并只更新受影响的 (请求方法, 路径)；仅路径模板变化的请求方法重建前缀树"""
+        affected_keys = set()
+        for channel_id in changed_ids | removed_ids:
+            if channel_id not in self._channel_entries:
+                continue
+            path = self._channels[channel_id][0]
+            for method in self._channel_entries.pop(channel_id):
+                self._path_channel_ids[(method, path)].discard(channel_id)
+                affected_keys.add((method, path))
+
+        for channel_id in changed_ids:
+            path = channels[channel_id][0]
+            self._channel_entries[channel_id] = self._generate_channel_entries(channels[channel_id])
+            for method in self._channel_entries[channel_id]:
+                self._path_channel_ids[(method, path)].add(channel_id)
+                affected_keys.add((method, path))
+
+        # 只复制受影响的请求方法下的数据，其它请求方法沿用原有对象
+        preset_channels = defaultdict(dict, self.preset_channels)
+        preset_channels_with_path_vars = defaultdict(dict, self.preset_channels_with_path_vars)
+        path_vars_routers = dict(self.path_vars_routers)
+
+        for method in {method for method, _ in affected_keys}:
+            preset_channels[method] = dict(preset_channels[method])
+        path_vars_paths = defaultdict(set)
+        for method, path in affected_keys:
+            channel_ids = self._path_channel_ids.get((method, path))
+            if channel_ids:
+                preset_channels[method][path] = self._channel_entries[max(channel_ids)][method]
+            else:
+                self._path_channel_ids.pop((method, path), None)
+                preset_channels[method].pop(path, None)
+            if has_path_vars(path):
+                path_vars_paths[method].add(path)
+
+        for method, paths in path_vars_paths.items():
+            paths.update(preset_channels_with_path_vars.get(method, {}))
+            # 与全量生成一致，路径模板按最先注册该路径的 channel id 排序
+            ordered_paths = sorted(
+                (min(self._path_channel_ids[(method, path)]), path)
+                for path in paths
+                if self._path_channel_ids.get((method, path))
+            )
+            channels_with_path_vars = {path: preset_channels[method][path] for _, path in ordered_paths}
+            if channels_with_path_vars:
+                preset_channels_with_path_vars[method] = channels_with_path_vars
+                path_vars_routers.update(self._build_path_vars_routers({method: channels_with_path_vars}))
+            else:
+                preset_channels_with_path_vars.pop(method, None)
+                path_vars_routers.pop(method, None)
 
         self.preset_channels = preset_channels
         self.preset_channels_with_path_vars = preset_channels_with_path_vars
+        self.path_vars_routers = path_vars_routers
+
+    def _generate_channel_entries(self, channel: Tuple[str, dict]) -> Dict[str, dict]:
+        preset_channels, _ = self._generate_channel_groups(self.get_default_channel_classes(), [channel])
+        return {method: channels[channel[0]] for method, channels in preset_channels.items()}
+
+    def _get_channels_from_db(self) -> Dict[int, Tuple[str, dict]]:
+        return {channel.id: self._make_channel(channel) for channel in ESBChannel.objects.all()}
+
+    def _get_changed_channels_from_db(self) -> Dict[int, Tuple[str, dict]]:
+        """在上次加载的数据基础上，只重新加载新增、变更的 channel，并去除已删除的 channel"""
+        channel_ids = set(ESBChannel.objects.values_list("id", flat=True))
+        channels = {channel_id: value for channel_id, value in self._channels.items() if channel_id in channel_ids}
 
-    def _get_channels_from_db(self) -> List[Tuple[str, dict]]:
-        system_id_to_timeout = System.objects.get_system_id_to_timeout()
-
-        channels = []
-        for channel in ESBChannel.objects.all():
-            value = {
-                "comp_codename": channel.component_codename,
-                "method": channel.method,
-                "is_active": channel.is_active,
-                "comp_conf": channel.config,
-                "channel_conf": channel.channel_conf,
-                "timeout": channel.get_real_timeout(system_id_to_timeout.get(channel.system_id)),
-            }
-
-            # 复用 esb_conf 中的  validators 和 channel_classes
-            channel_key = self._esb_config_parser.get_channel_key(channel.method, channel.path)
-            channel_from_config = self._esb_channels_mapping.get(channel_key)
-            if channel_from_config:
-                value.update(
-                    {
-                        "request_validators": channel_from_config.get("request_validators"),
-                        "append_request_validators": channel_from_config.get("append_request_validators"),
-                        "channel_classes": channel_from_config.get("channel_classes"),
-                    }
-                )
-
-            channels.append((channel.path, value))
+        # 更新时间与上次版本相同的数据可能在上次加载后才写入，因此包含边界；新增 id 兜底 updated_time 为空的数据
+        changed_channels = ESBChannel.objects.filter(
+            Q(updated_time__gte=self._data_version.channel_updated_time) | Q(id__in=channel_ids - set(self._channels))
+        )
+        for channel in changed_channels:
+            channels[channel.id] = self._make_channel(channel)
 
         return channels
 
+    def _make_channel(self, channel: ESBChannel) -> Tuple[str, dict]:
+        value = {
+            "comp_codename": channel.component_codename,
+            "method": channel.method,
+            "is_active": channel.is_active,
+            "comp_conf": channel.config,
+            "channel_conf": channel.channel_conf,
+            "timeout": channel.get_real_timeout(self._system_id_to_timeout.get(channel.system_id)),
+        }
+
+        # 复用 esb_conf 中的  validators 和 channel_classes
+        channel_key = self._esb_config_parser.get_channel_key(channel.method, channel.path)
+        channel_from_config = self._esb_channels_mapping.get(channel_key)
+        if channel_from_config:
+            value.update(
+                {
+                    "request_validators": channel_from_config.get("request_validators"),
+                    "append_request_validators": channel_from_config.get("append_request_validators"),
+                    "channel_classes": channel_from_config.get("channel_classes"),
+                }
+            )
+
+        return channel.path, value
+
 
 def get_db_channel_manager() -> DBChannelManager:
     return DBChannelManager()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from esb.utils.base import RE_PATH_VARIABLE, PathVars, preprocess_path_tmpl
+
+# 路径模板的普通片段中若包含这些字符，原正则匹配会将其视为正则语法，需按正则处理以保持一致
+REGEX_META_CHARS = frozenset(".^$*+?{}[]\\|()")
+
+
+class _Node:
+    def __init__(self):
+        # 普通片段，按片段内容精确匹配
+        self.static_children: Dict[str, "_Node"] = {}
+        # 含路径变量的片段，按片段正则匹配，保持注册顺序：(片段正则, 变量名列表, 子节点)
+        self.pattern_children: List[Tuple[Any, List[str], "_Node"]] = []
+        # 以当前节点结尾的路由：(注册顺序, 路由值)
+        self.route: Optional[Tuple[int, Any]] = None
+        # 子树中最早注册的路由顺序，用于剪枝
+        self.min_order = float("inf")
+
+
+class PathTemplateRouter:
+    """按路径片段构建的前缀树，用于匹配形如 "/users/{username}/" 的路径模板
+
+    与逐个尝试正则的方式结果一致：路径变量不能跨越 "/"，且同一路径能匹配多个模板时，
+    返回最先注册的模板；但匹配耗时只与路径长度相关，不再随模板数量增长
+    """
+
+    def __init__(self):
+        self._root = _Node()
+        self._count = 0
+        self._pattern_cache: Dict[str, Any] = {}
+
+    def __len__(self):
+        return self._count
+
+    def add(self, path_tmpl: str, value: Any):
+        order = self._count
+        self._count += 1
+
+        node = self._root
+        node.min_order = min(node.min_order, order)
+        for segment in path_tmpl.split("/"):
+            node = self._get_or_create_child(node, segment)
+            node.min_order = min(node.min_order, order)
+
+        # 同一模板重复添加时，保留最先添加的
+        if node.route is None:
+            node.route = (order, value)
+
+    def match(self, path: str) -> Tuple[Optional[Any], Optional[PathVars]]:
+        """
+        :returns tuple:
+            - value: 匹配到的模板对应的值，无匹配时为 None
+            - path_vars(PathVars object): 路径匹配中获得的变量
+        """
+        matched = self._search(self._root, path.split("/"), 0, [], None)
+        if matched is None:
+            return None, None
+
+        _, value, variables = matched
+        return value, PathVars(val_dict=dict(variables), val_list=[v for _, v in variables])
+
+    def _get_or_create_child(self, node: _Node, segment: str) -> _Node:
+        if not self._is_pattern_segment(segment):
+            return node.static_children.setdefault(segment, _Node())
+
+        pattern = self._pattern_cache.get(segment)
+        if pattern is None:
+            pattern = self._pattern_cache[segment] = re.compile(preprocess_path_tmpl(segment))
+
+        for child_pattern, _, child in node.pattern_children:
+            if child_pattern is pattern:
+                return child
+
+        child = _Node()
+        group_names = sorted(pattern.groupindex, key=pattern.groupindex.get)
+        node.pattern_children.append((pattern, group_names, child))
+        return child
+
+    @staticmethod
+    def _is_pattern_segment(segment: str) -> bool:
+        return bool(RE_PATH_VARIABLE.search(segment)) or not REGEX_META_CHARS.isdisjoint(segment)
+
+    def _search(self, node: _Node, segments: List[str], index: int, variables: list, best):
+        """深度优先查找注册顺序最小的匹配，best 为目前找到的最优结果 (order, value, variables)"""
+        if best is not None and node.min_order >= best[0]:
+            return best
+
+        if index == len(segments):
+            if node.route is not None and (best is None or node.route[0] < best[0]):
+                return node.route[0], node.route[1], list(variables)
+            return best
+
+        segment = segments[index]
+        child = node.static_children.get(segment)
+        if child is not None:
+            best = self._search(child, segments, index + 1, variables, best)
+
+        for pattern, group_names, child in node.pattern_children:
+            matched_obj = pattern.fullmatch(segment)
+            if matched_obj is None:
+                continue
+
+            size = len(variables)
+            variables.extend((name, matched_obj.group(name)) for name in group_names)
+            best = self._search(child, segments, index + 1, variables, best)
+            del variables[size:]
+
+        return best
@@ -18,11 +18,14 @@
 #
 
 import copy
+import hashlib
 import json
 import os
+import time
 from builtins import object
 from importlib import import_module
 
+from django.conf import settings
 from django.utils.encoding import force_bytes
 
 from common.base_utils import FancyDict, smart_lower, str_bool
@@ -30,6 +33,7 @@ from common.bkerrors import bk_error_codes
 from common.errors import APIError, error_codes
 from common.log import logger
 from esb.bkauth.models import AnonymousBKUser, BKUser
+from esb.metrics import components_manager_init_duration_seconds
 from esb.outgoing import HttpClient
 from esb.response import CompResponse
 from esb.utils import fpath_to_module, is_py_file
@@ -49,6 +53,10 @@ class BaseComponent(object):
     # 如果定义一个Form，请求将会使用这个Form来验证输入参数的有效性
     Form = None
 
+    # 只读组件的响应只取决于请求参数、应用及用户时，可设为 True，
+    # channel 开启请求合并后，相同的并发请求共享同一次调用的响应
+    is_response_shareable = False
+
     def __init__(self, request=None, current_user=None):
         self.request = request
         self.response = CompResponse()
@@ -355,11 +363,15 @@ class ComponentsManager(object):
         "component.pyc",
     ]
 
+    MANIFEST_VERSION = 1
+
     def __init__(
         self,
     ):
         self.name_component_map = {}
         self.path_configs = {}
+        # 根据组件清单注册、但尚未导入的组件，codename -> 清单中的组件信息
+        self.lazy_components = {}
 
     def __str__(self):
         return "<ComponentsManager: path_configs=%s>" % self.path_configs
@@ -375,6 +387,8 @@ class ComponentsManager(object):
 
     def get_comp_by_name(self, name):
         ret = self.name_component_map.get(name)
+        if ret is None and name in self.lazy_components:
+            ret = self._load_lazy_component(name)
         return ret
 
     def register_by_module(self, module, config={}):
@@ -420,6 +434,99 @@ class ComponentsManager(object):
                             fpath,
                         )
 
+    def register_by_manifest(self, manifest, config_list):
+        """
+        根据组件清单注册组件，组件模块在首次使用时才导入；
+        清单与当前组件文件不一致时，不注册并返回 False
+
+        :param dict manifest: 由 dump_manifest 生成的组件清单
+        :param list config_list: 来自配置文件的组件配置
+        """
+        if manifest.get("version") != self.MANIFEST_VERSION:
+            return False
+
+        if manifest.get("fingerprint") != self.get_fingerprint(config_list):
+            logger.warning("components manifest is outdated, register components by walking the components path")
+            return False
+
+        for comp_config in config_list:
+            if comp_config:
+                self.path_configs[comp_config["path"]] = comp_config.copy()
+
+        for item in manifest["components"]:
+            self.lazy_components[item["codename"]] = item
+        return True
+
+    def dump_manifest(self, config_list):
+        """
+        生成已注册组件的清单，包含组件 codename 与其模块、类名的对应关系
+        """
+        components = [
+            {
+                "codename": name,
+                "module": comp_class.__module__,
+                "class_name": comp_class.__name__,
+                "name_prefix": comp_class.name_prefix,
+            }
+            for name, comp_class in sorted(self.get_registed_components().items())
+        ]
+        return {
+            "version": self.MANIFEST_VERSION,
+            "fingerprint": self.get_fingerprint(config_list),
+            "components": components,
+        }
+
+    def get_fingerprint(self, config_list):
+        """
+        根据组件配置及组件文件的路径、大小、修改时间生成指纹，用于判断组件清单是否过期；
+        仅需遍历目录，不导入任何模块
+        """
+        if not isinstance(config_list, (list, tuple)):
+            config_list = [config_list]
+
+        sha256 = hashlib.sha256()
+        for comp_config in config_list:
+            if not comp_config:
+                continue
+            sha256.update(force_bytes(json.dumps(comp_config, sort_keys=True)))
+            for current_folder, folders, files in sorted(os.walk(comp_config["path"])):
+                for filename in sorted(files):
+                    if not self.should_register(current_folder, filename):
+                        continue
+                    fpath = os.path.join(current_folder, filename)
+                    stat = os.stat(fpath)
+                    sha256.update(force_bytes("%s:%s:%s\n" % (fpath, stat.st_size, int(stat.st_mtime))))
+        return sha256.hexdigest()
+
+    def load_lazy_components(self):
+        """
+        导入所有根据组件清单注册、但尚未导入的组件
+        """
+        for name in list(self.lazy_components.keys()):
+            self._load_lazy_component(name)
+
+    def _load_lazy_component(self, name):
+        item = self.lazy_components.get(name)
+        if not item:
+            return self.name_component_map.get(name)
+
+        try:
+            module = import_module(item["module"])
+            comp_class = getattr(module, item["class_name"])
+        except Exception:
+            logger.exception(
+                "%s Error when register component %s from module %s, skip",
+                bk_error_codes.COMPONENT_REGISTER_ERROR.code,
+                name,
+                item["module"],
+            )
+            self.lazy_components.pop(name, None)
+            return None
+
+        self.register(comp_class, config={"name_prefix": item["name_prefix"]})
+        self.lazy_components.pop(name, None)
+        return self.name_component_map.get(name)
+
     def should_register(self, file_folder, filename):
         """
         Determine if `filename` should be registered
@@ -457,19 +564,46 @@ class ComponentsManager(object):
         return
 
     def get_registed_components(self):
+        self.load_lazy_components()
         return self.name_component_map
 
 
 _components_manager = None
 
 
+def load_components_manifest(path):
+    if not path or not os.path.isfile(path):
+        return None
+
+    try:
+        with open(path) as fp:
+            return json.load(fp)
+    except Exception:
+        logger.exception("load components manifest from %s failed", path)
+        return None
+
+
 def get_components_manager():
     """
-    获取当前注册的components_manager
+    获取当前注册的components_manager；
+    存在有效的组件清单时，根据清单注册组件，避免每个 worker 启动后导入全部组件模块
     """
     global _components_manager
     if _components_manager is None:
+        start_time = time.time()
+        config_list = EsbConfigParser().get_component_groups()
+
         manager = ComponentsManager()
-        manager.register_by_config(EsbConfigParser().get_component_groups())
+        manifest = load_components_manifest(settings.ESB_COMPONENTS_MANIFEST_PATH)
+        if manifest and manager.register_by_manifest(manifest, config_list):
+            source = "manifest"
+        else:
+            manager.register_by_config(config_list)
+            source = "scan"
+
+        duration = time.time() - start_time
+        components_manager_init_duration_seconds.labels(source=source).observe(duration)
+        logger.info("components manager initialized by %s, cost %.3fs", source, duration)
+
         _components_manager = manager
     return _components_manager
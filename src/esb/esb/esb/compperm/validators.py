@@ -18,13 +18,14 @@
 #
 from typing import Optional
 
-from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
 from django.conf import settings
 
 from common.base_validators import BaseValidator
 from common.errors import error_codes
 from esb.bkcore.constants import PermissionLevelEnum
 from esb.bkcore.models import AppComponentPermission
+from esb.utils.two_tier_cache import TwoTierCache, two_tier_cached
 
 
 class ComponentPermValidator(BaseValidator):
@@ -58,11 +59,14 @@ class ComponentPermValidator(BaseValidator):
 
         return True
 
-    @cached(
-        cache=TTLCache(
+    @two_tier_cached(
+        TwoTierCache(
+            "component_permission",
             maxsize=getattr(settings, "ESB_COMPONENT_PERMISSION_CACHE_MAXSIZE", 2000),
             ttl=getattr(settings, "ESB_COMPONENT_PERMISSION_CACHE_TTL_SECONDS", 300),
-        )
+        ),
+        # 缓存 key 不包含 self，以便在进程间共享
+        key=lambda self, app_code, component_id: hashkey(app_code, component_id),
     )
     def _has_permission(self, app_code: str, component_id: int) -> bool:
         return AppComponentPermission.objects.has_permission(app_code, component_id)
@@ -17,18 +17,73 @@
 # to the current version of the project delivered to anyone in the future.
 #
 import abc
+import copy
+import hashlib
+import threading
+import time
 from abc import ABCMeta
 
 import jwt
+from cachetools import TTLCache
+from django.conf import settings
+from django.utils.encoding import force_bytes
 
 from common.errors import error_codes
 from common.log import logger
-from esb.utils.jwt_utils import JWTKey
+from esb.metrics import gateway_jwt_cache_requests_total
+from esb.utils.jwt_utils import JWTKey, load_public_key
 
 HEADER_BKAPI_JWT = "HTTP_X_BKAPI_JWT"
 HEADER_BKAPI_REQUEST_ID = "HTTP_X_BKAPI_REQUEST_ID"
 
 
+class VerifiedJWTCache:
+    """已校验通过的 X-Bkapi-JWT 内容缓存，网关会在多个请求中复用同一个 JWT
+
+    缓存的 key 包含公钥，密钥轮换后需重新校验；缓存内容在 JWT 过期后不再返回
+    """
+
+    def __init__(self, maxsize, ttl):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, token, public_key):
+        key = self._make_key(token, public_key)
+        with self._lock:
+            value = self._cache.get(key)
+
+        if value is None or value[1] <= time.time():
+            gateway_jwt_cache_requests_total.labels(result="miss").inc()
+            return None
+
+        gateway_jwt_cache_requests_total.labels(result="hit").inc()
+        # 返回副本，防止调用方修改缓存内容
+        return copy.deepcopy(value[0])
+
+    def set(self, token, public_key, payload):
+        # 无过期时间的 JWT 不缓存
+        exp = payload.get("exp")
+        if not isinstance(exp, (int, float)):
+            return
+
+        key = self._make_key(token, public_key)
+        with self._lock:
+            self._cache[key] = (copy.deepcopy(payload), exp)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _make_key(self, token, public_key):
+        return hashlib.sha256(force_bytes(token)).hexdigest(), public_key
+
+
+verified_jwt_cache = VerifiedJWTCache(
+    maxsize=settings.BK_ESB_GATEWAY_JWT_CACHE_MAXSIZE,
+    ttl=settings.BK_ESB_GATEWAY_JWT_CACHE_TTL,
+)
+
+
 def is_from_gateway_with_jwt(request):
     """Detect if this request is from BK API Gateway with JWT way"""
     return bool(request.META.get(HEADER_BKAPI_JWT))
@@ -76,8 +131,14 @@ class JWTClient(APIGWBase):
                 "get jwt public_key fail. please contact the component developer to handle"
             )
 
+        payload = verified_jwt_cache.get(self._jwt_payload, jwt_public_key)
+        if payload is not None:
+            self.payload = payload
+            return
+
         try:
-            self.payload = jwt.decode(self._jwt_payload, jwt_public_key, algorithms=["RS512"])
+            self.payload = jwt.decode(self._jwt_payload, load_public_key(jwt_public_key), algorithms=["RS512"])
+            verified_jwt_cache.set(self._jwt_payload, jwt_public_key, self.payload)
             logger.debug("valid jwt success, %s, request_id: %s" % (self._jwt_payload, self._apigw_request_id))
         except jwt.DecodeError:
             logger.error(
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from esb.component.base import ComponentsManager
+from esb.utils.esb_config import EsbConfigParser
+
+
+class Command(BaseCommand):
+    """生成组件清单，worker 根据清单注册组件，无需在启动后导入全部组件模块"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("-o", "--output", default=settings.ESB_COMPONENTS_MANIFEST_PATH, help="manifest file path")
+
+    def handle(self, *args, **options):
+        config_list = EsbConfigParser().get_component_groups()
+
+        manager = ComponentsManager()
+        manager.register_by_config(config_list)
+        manifest = manager.dump_manifest(config_list)
+
+        # 先写入临时文件再替换，避免 worker 读取到不完整的清单
+        output = options["output"]
+        tmp_output = "%s.tmp" % output
+        with open(tmp_output, "w") as fp:
+            json.dump(manifest, fp, indent=2)
+        os.replace(tmp_output, output)
+
+        self.stdout.write("write %d components to manifest %s" % (len(manifest["components"]), output))
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+"""
+Prometheus metrics of ESB, exported by django_prometheus through the default registry
+"""
+from prometheus_client import Counter, Gauge, Histogram
+
+ESB_METRICS_NAMESPACE = "esb"
+
+http_pool_session_requests_total = Counter(
+    "http_pool_session_requests_total",
+    "Outgoing HTTP requests grouped by whether a pooled keep-alive session was reused",
+    ["system", "result"],
+    namespace=ESB_METRICS_NAMESPACE,
+)
+
+http_pool_session_evictions_total = Counter(
+    "http_pool_session_evictions_total",
+    "Pooled HTTP sessions closed after exceeding the keep-alive idle timeout",
+    ["system"],
+    namespace=ESB_METRICS_NAMESPACE,
+)
+
+db_channel_refresh_duration_seconds = Histogram(
+    "db_channel_refresh_duration_seconds",
+    "Duration of refreshing channels from database, grouped by refresh type: full, incremental or skipped",
+    ["refresh_type"],
+    namespace=ESB_METRICS_NAMESPACE,
+)
+
+db_channel_refresh_skipped_total = Counter(
+    "db_channel_refresh_skipped_total",
+    "Channel refreshes skipped because the channel and system data were unchanged",
+    namespace=ESB_METRICS_NAMESPACE,
+)
+
+gateway_jwt_cache_requests_total = Counter(
+    "gateway_jwt_cache_requests_total",
+    "X-Bkapi-JWT verifications of requests from API Gateway, grouped by whether the verified payload was cached",
+    ["result"],
+    namespace=ESB_METRICS_NAMESPACE,
+)
+
+thrift_pool_connection_requests_total = Counter(
+    "thrift_pool_connection_requests_total",
+    "Thrift connections borrowed from the pool, grouped by whether an idle connection was reused",
+    ["service", "result"],
+    namespace=ESB_METRICS_NAMESPACE,
+)
+
+thrift_pool_connection_evictions_total = Counter(
+    "thrift_pool_connection_evictions_total",
+    "Idle thrift connections closed instead of being reused, grouped by reason: idle or broken",
+    ["service", "reason"],
+    namespace=ESB_METRICS_NAMESPACE,
+)
+
+smtp_pool_session_requests_total = Counter(
+    "smtp_pool_session_requests_total",
+    "SMTP sessions borrowed from the pool, grouped by whether an authenticated session was reused",
+    ["result"],
+    namespace=ESB_METRICS_NAMESPACE,
+)
+
+smtp_messages_total = Counter(
+    "smtp_messages_total",
+    "Mails sent through SMTP, grouped by delivery mode: direct, pooled or queued, and result",
+    ["mode", "result"],
+    namespace=ESB_METRICS_NAMESPACE,
+)
+
+smtp_send_duration_seconds = Histogram(
+    "smtp_send_duration_seconds",
+    "Duration of sending one mail through SMTP, including waiting in the delivery queue",
+    ["mode"],
+    namespace=ESB_METRICS_NAMESPACE,
+)
+
+two_tier_cache_requests_total = Counter(
+    "two_tier_cache_requests_total",
+    "Lookups of two-tier caches, grouped by cache and result: hit, shared_hit, stale, negative_hit, miss or coalesced",
+    ["cache", "result"],
+    namespace=ESB_METRICS_NAMESPACE,
+)
+
+user_auth_failure_throttled_total = Counter(
+    "user_auth_failure_throttled_total",
+    "User token verifications rejected without calling the backend because the client had too many recent failures",
+    ["token_type"],
+    namespace=ESB_METRICS_NAMESPACE,
+)
+
+components_manager_init_duration_seconds = Histogram(
+    "components_manager_init_duration_seconds",
+    "Duration of registering components in a worker, grouped by source: manifest or scan",
+    ["source"],
+    namespace=ESB_METRICS_NAMESPACE,
+)
+
+circuit_breaker_state = Gauge(
+    "circuit_breaker_state",
+    "Circuit breaker state of backend systems: 0 closed, 1 half open, 2 open",
+    ["system"],
+    namespace=ESB_METRICS_NAMESPACE,
+)
+
+circuit_breaker_rejected_requests_total = Counter(
+    "circuit_breaker_rejected_requests_total",
+    "Requests to backend systems rejected without sending, grouped by reason: circuit_open or concurrency_limit",
+    ["system", "reason"],
+    namespace=ESB_METRICS_NAMESPACE,
+)
+
+concurrency_limit_current = Gauge(
+    "concurrency_limit_current",
+    "Current concurrency limit of requests to backend systems, adapted to observed latency",
+    ["system"],
+    namespace=ESB_METRICS_NAMESPACE,
+)
+
+async_log_records_dropped_total = Counter(
+    "async_log_records_dropped_total",
+    "Log records dropped by the asynchronous log handler, grouped by reason: queue_full, sampled or error",
+    ["logger", "reason"],
+    namespace=ESB_METRICS_NAMESPACE,
+)
+
+async_log_queue_depth = Gauge(
+    "async_log_queue_depth",
+    "Log records waiting in the queue of the asynchronous log handler, sampled when each batch is written",
+    ["logger"],
+    namespace=ESB_METRICS_NAMESPACE,
+)
+
+component_stage_duration_seconds = Histogram(
+    "component_stage_duration_seconds",
+    "Duration of stages handling a component request: validate:<validator>, invoke, outgoing_http, render or total",
+    ["system", "component", "stage"],
+    namespace=ESB_METRICS_NAMESPACE,
+)
+
+request_coalescing_total = Counter(
+    "request_coalescing_total",
+    "Component calls on channels with request coalescing, grouped by result: leader, shared or cached",
+    ["system", "component", "result"],
+    namespace=ESB_METRICS_NAMESPACE,
+)
@@ -20,6 +20,7 @@
 from future import standard_library
 
 standard_library.install_aliases()
+import copy  # noqa: E402
 import json  # noqa: E402
 import socket  # noqa: E402
 import time  # noqa: E402
@@ -36,10 +37,18 @@ from requests.exceptions import ReadTimeout, SSLError  # noqa: E402
 
 from common.base_utils import FancyDict, datetime_format, urljoin  # noqa: E402
 from common.bkerrors import bk_error_codes  # noqa: E402
-from common.errors import HostNotFoundException, RequestSSLException, RequestThirdPartyException  # noqa: E402
-from common.log import logger, logger_api  # noqa: E402
+from common.errors import (  # noqa: E402
+    HostNotFoundException,
+    RequestRejectedException,
+    RequestSSLException,
+    RequestThirdPartyException,
+)
+from common.log import LazyJSONMessage, logger, logger_api  # noqa: E402
 from esb.bkapp.models import BKApp  # noqa: E402
-from esb.utils.jwt_utils import JWTClient  # noqa: E402
+from esb.metrics import component_stage_duration_seconds  # noqa: E402
+from esb.utils.circuit_breaker import get_circuit_breaker_registry  # noqa: E402
+from esb.utils.http_pool import get_http_session_pool  # noqa: E402
+from esb.utils.jwt_utils import get_signed_jwt  # noqa: E402
 from .utils import SmartHost, get_ssl_root_dir  # noqa: E402
 
 """
@@ -49,6 +58,7 @@ All outgoing requests:
 REQUEST_TIMEOUT_SECS = settings.REQUEST_TIMEOUT_SECS
 STATUS_CODE_OK = 200
 RESP_LIMIT_SIZE = 4096
+API_LOG_TRUNCATE_FIELDS = ("req_params", "req_response")
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -58,14 +68,22 @@ class RequestsWrapper(object):
     Wrapper for Requests
     """
 
-    def request(self, *args, **kwargs):
+    def __init__(self, system_name=""):
+        self.system_name = system_name
+
+    def request(self, method, url, **kwargs):
         response_encoding = kwargs.pop("response_encoding", None)
         # 设置超时时间
         timeout = kwargs.get("timeout") or REQUEST_TIMEOUT_SECS
         # 默认不验证证书的正确性
         kwargs.update(timeout=timeout, verify=False)
 
-        resp = requests.request(*args, **kwargs)
+        if settings.ESB_HTTP_POOL_ENABLED:
+            # 复用当前 worker 中到该 host 的 keep-alive 连接
+            with get_http_session_pool().session(url, system_name=self.system_name) as session:
+                resp = session.request(method, url, **kwargs)
+        else:
+            resp = requests.request(method, url, **kwargs)
 
         # 如果指定了返回内容的编码格式，使用之
         if response_encoding:
@@ -78,8 +96,8 @@ class RequestsWrapper(object):
         }
 
 
-def get_current_http_wrapper():
-    return RequestsWrapper()
+def get_current_http_wrapper(system_name=""):
+    return RequestsWrapper(system_name=system_name)
 
 
 def encode_dict(d, encoding="utf-8"):
@@ -100,9 +118,13 @@ class BasicHttpClient(object):
     A very basic HTTP Client
     """
 
+    @property
+    def system_name(self):
+        return ""
+
     @property
     def smart_http_client(self):
-        return get_current_http_wrapper()
+        return get_current_http_wrapper(system_name=self.system_name)
 
     def request(self, *args, **kwargs):
         """
@@ -167,23 +189,48 @@ class BasicHttpClient(object):
             if isinstance(data, dict):
                 data_to_send = encode_dict(data, encoding=request_encoding)
 
+        # 后端系统已熔断或并发请求过多时，不发送请求，也不再重试
+        breaker = get_circuit_breaker_registry().get(self.system_name)
+        is_probe = False
+        if breaker is not None:
+            try:
+                is_probe = breaker.acquire()
+            except RequestRejectedException as e:
+                logger.warning("Request to %s is rejected: %s", url, e.get_message())
+                return FancyDict(
+                    url=url,
+                    resp=None,
+                    resp_status_code=resp_status_code,
+                    resp_text=resp_text,
+                    result=None,
+                    request_exception=e,
+                )
+
+        started_at = time.time()
         try:
             client = self.smart_http_client
             logger.debug(
                 "Starting request to url=%s, params=%s, data=%s, headers=%s", url, params, data, json.dumps(headers)
             )
-            resp = client.request(
-                method,
-                url,
-                params=params_to_send,
-                data=data_to_send,
-                headers=headers,
-                response_encoding=response_encoding,
-                verify=verify,
-                cert=cert,
-                timeout=timeout,
-                files=files,
-            )
+            try:
+                resp = client.request(
+                    method,
+                    url,
+                    params=params_to_send,
+                    data=data_to_send,
+                    headers=headers,
+                    response_encoding=response_encoding,
+                    verify=verify,
+                    cert=cert,
+                    timeout=timeout,
+                    files=files,
+                )
+            finally:
+                # 请求被 gevent.Timeout 等中断时也需释放许可，否则占用的并发数及探测请求名额不再归还；
+                # 未收到响应（连接失败、超时、中断）或后端返回 5xx 时，才认为后端系统异常
+                if breaker is not None:
+                    success = resp is not None and resp["status_code"] < 500
+                    breaker.release(is_probe, time.time() - started_at, success=success)
             resp_text = resp["text"]
             resp_status_code = resp["status_code"]
 
@@ -206,8 +253,8 @@ class BasicHttpClient(object):
             else:
                 request_exception = e
 
-            # 如果请求失败，而且max_retries > 0，尝试重试请求
-            if max_retries > 0:
+            # 如果请求失败，而且max_retries > 0，尝试重试请求；后端系统已熔断时，不再等待重试
+            if max_retries > 0 and not (breaker is not None and breaker.is_open):
                 seconds_wait = 1
                 max_retries -= 1
 
@@ -311,6 +358,10 @@ class HttpClient(BasicHttpClient):
     def __init__(self, component):
         self.component = component
 
+    @property
+    def system_name(self):
+        return self.component.sys_name
+
     def get_default_headers(self):
         try:
             request_headers = self.component.request.headers
@@ -330,10 +381,10 @@ class HttpClient(BasicHttpClient):
             if with_jwt_header:
                 # 如果 X-Bkapi-Jwt 使用来源于 API Gateway 的数据，需注意：
                 # - 前端人员选择器发送的请求，应用的 verified=False，如需替换以下逻辑，ESB 需生成新的 Jwt
-                jwt_client = JWTClient(
+                jwt_token = get_signed_jwt(
                     BKApp(self.component.request.app_code, verified=True), self.component.current_user
                 )
-                bkapi_headers["X-Bkapi-JWT"] = force_text(jwt_client.encode())
+                bkapi_headers["X-Bkapi-JWT"] = force_text(jwt_token)
 
         request_headers = {}
         request_headers.update(self.get_default_headers())
@@ -404,19 +455,24 @@ class HttpClient(BasicHttpClient):
             files=files,
         )
 
-        if r.resp_status_code == 200 and not r.request_exception:
-            response_to_log = r.resp_text[:RESP_LIMIT_SIZE]
-        else:
-            response_to_log = r.resp_text
         params = params or data
-        if not isinstance(params, basestring):
-            params = json.dumps(params)
         datetime_end = timezone.now()
         msecs_cost = (datetime_end - datetime_start).total_seconds() * 1000
+        if settings.ESB_COMPONENT_STAGE_METRICS_ENABLED:
+            component_stage_duration_seconds.labels(
+                system=system_name, component=component_name, stage="outgoing_http"
+            ).observe(msecs_cost / 1000)
         exception_name = force_text(r.request_exception) if r.request_exception else None
+        # 日志内容在写入时才构建，先复制请求参数，避免调用方后续修改参数影响日志内容
+        params = copy.copy(params)
 
-        try:
-            api_log = {
+        def build_api_log():
+            if r.resp_status_code == 200 and not r.request_exception:
+                response_to_log = r.resp_text[:RESP_LIMIT_SIZE]
+            else:
+                response_to_log = r.resp_text
+
+            return {
                 "message": "Request outgoing finished, method=%s url=%s" % (method, r.url),
                 "type": "pyls-comp-api",
                 "request_id": request_id,
@@ -424,7 +480,7 @@ class HttpClient(BasicHttpClient):
                 "req_system_name": system_name,
                 "req_component_name": component_name,
                 "req_url": r.url,
-                "req_params": params,
+                "req_params": params if isinstance(params, basestring) else json.dumps(params),
                 "req_status": r.resp_status_code if r.resp else -1,
                 "req_response": response_to_log,
                 "req_exception": exception_name,
@@ -432,14 +488,22 @@ class HttpClient(BasicHttpClient):
                 "req_start_time": datetime_format(datetime_start),
                 "req_end_time": datetime_format(datetime_end),
             }
-            # 添加访问记录
-            logger_api.info(json.dumps(api_log))
-        except Exception as e:
-            logger.warning("logger api exception: %s" % e)
+
+        # 添加访问记录，日志内容在写入时才构建
+        logger_api.info(
+            LazyJSONMessage(
+                build_api_log,
+                truncate_fields=API_LOG_TRUNCATE_FIELDS,
+                max_length=settings.ESB_API_LOG_FIELD_MAX_LENGTH,
+                important=bool(r.request_exception),
+            )
+        )
 
         # 为了记录这一次请求的api log，延迟抛出异常
         # UPDATE: xx系统xx接口出错,状态码: xx,错误消息:xx
         if r.request_exception:
+            if isinstance(r.request_exception, RequestRejectedException):
+                raise r.request_exception
             if isinstance(r.request_exception, SSLError):
                 r.request_exception.cert = cert
                 r.request_exception.SSL_ROOT_DIR = get_ssl_root_dir()
@@ -502,7 +566,7 @@ class RequestHelperClient(BasicHttpClient):
         # 发送请求
         request_url = ""
         request_exception = None
-        request_params = {"action": action, "args": args, "kwargs": kwargs}
+        request_params = {"action": action, "args": copy.copy(args), "kwargs": copy.copy(kwargs)}
         resp_text = ""
         resp_status_code = -1
         result = None
@@ -545,30 +609,34 @@ class RequestHelperClient(BasicHttpClient):
 
                 result = resp
 
-        # 限制写入日志的response大小不超过一定大小
-        if resp_status_code == 200 and not request_exception:
-            response_to_log = resp_text[:RESP_LIMIT_SIZE]
-        else:
-            response_to_log = resp_text
-        if not isinstance(request_params, basestring):
-            try:
-                request_params = json.dumps(request_params)
-            except Exception:
-                request_params = force_text(request_params)
         datetime_end = timezone.now()
         msecs_cost = (datetime_end - datetime_start).total_seconds() * 1000
         exception_name = force_text(request_exception) if request_exception else None
+        # 日志内容在写入时才构建，先复制请求参数，避免调用方后续修改参数影响日志内容
+        request_params = copy.copy(request_params)
 
-        # Log to logstash, Use type="pyls-comp-api"
-        try:
-            api_log = {
+        def build_api_log():
+            # 限制写入日志的response大小不超过一定大小
+            if resp_status_code == 200 and not request_exception:
+                response_to_log = resp_text[:RESP_LIMIT_SIZE]
+            else:
+                response_to_log = resp_text
+
+            params_to_log = request_params
+            if not isinstance(params_to_log, basestring):
+                try:
+                    params_to_log = json.dumps(params_to_log)
+                except Exception:
+                    params_to_log = force_text(params_to_log)
+
+            return {
                 "message": "Request outgoing finished, method=%s url=%s" % ("POST", request_url),
                 "type": "pyls-comp-api",
                 "request_id": request_id,
                 "req_app_code": app_code,
                 "req_system_name": system_name,
                 "req_component_name": component_name,
-                "req_params": request_params,
+                "req_params": params_to_log,
                 "req_status": resp_status_code,
                 "req_response": response_to_log,
                 "req_exception": exception_name,
@@ -576,10 +644,16 @@ class RequestHelperClient(BasicHttpClient):
                 "req_start_time": datetime_format(datetime_start),
                 "req_end_time": datetime_format(datetime_end),
             }
-            # 添加访问记录
-            logger_api.info(json.dumps(api_log))
-        except Exception as e:
-            logger.warning("logger api exception: %s" % e)
+
+        # Log to logstash, Use type="pyls-comp-api"
+        logger_api.info(
+            LazyJSONMessage(
+                build_api_log,
+                truncate_fields=API_LOG_TRUNCATE_FIELDS,
+                max_length=settings.ESB_API_LOG_FIELD_MAX_LENGTH,
+                important=bool(request_exception),
+            )
+        )
 
         # 为了记录这一次请求的api log，延迟抛出异常
         # UPDATE: xx系统xx接口出错,状态码: xx,错误消息:xx
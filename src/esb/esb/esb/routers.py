@@ -25,7 +25,6 @@ from django.http import Http404
 
 from common.errors import error_codes
 from esb.channel import get_channel_manager
-from esb.component import get_components_manager
 
 # 把当前目录切换到项目目录，因为后面用到的路径都是相对路径
 try:
@@ -35,7 +34,6 @@ except Exception:
 
 
 def router_view(channel_type, request, path):
-    components_manager = get_components_manager()
     channel_manager = get_channel_manager()
 
     path = "/%s/" % path.strip("/")
@@ -44,36 +42,17 @@ def router_view(channel_type, request, path):
 
     # Get ESBChannel by path
     channel_conf = get_channel_conf(path, request)
-    channel_route = channel_conf["channel_route"]
-    # Check if channel is active
-    if not channel_route.is_active:
-        raise error_codes.INACTIVE_CHANNEL
 
-    # Check if channel's component class exists
-    comp_cls = components_manager.get_comp_by_name(channel_route.component_codename)
-    if not comp_cls:
-        raise error_codes.COMPONENT_NOT_FOUND.format_prompt(channel_route.component_codename)
+    # 校验 channel 状态、组件类，并解析 validators 等，解析结果在 channel 数据刷新前复用
+    prepared_route = channel_manager.get_prepared_route(channel_type, request.method, channel_conf)
 
     # Dynamic contribute channel object
-    channel_class = channel_conf["classes"][channel_type]
-    channel_obj = channel_class(
-        comp_cls,
-        path=path,
-        is_active=True,
-        comp_conf=channel_conf.get("comp_conf"),
-        channel_conf=channel_conf.get("channel_conf", {}),
-    )
-
-    # 判断该channel是否拥有自定义的validators
-    if getattr(channel_route, "request_validators", None) is not None:
-        channel_obj.set_request_validators(channel_route.request_validators)
-    if getattr(channel_route, "append_request_validators", None) is not None:
-        channel_obj.append_request_validators(channel_route.append_request_validators)
+    channel_obj = prepared_route.make_channel(path)
 
     # 针对本次请求存储timeout和系统名
     # 系统名用于访问频率控制
-    request.g.timeout = channel_route.timeout
-    request.g.sys_name = comp_cls.sys_name
+    request.g.timeout = prepared_route.timeout
+    request.g.sys_name = prepared_route.comp_class.sys_name
 
     return channel_obj.handle_request(request)
 
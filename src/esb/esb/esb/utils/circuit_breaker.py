@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict
+
+from django.conf import settings
+
+from common.errors import RequestRejectedException
+from common.singleton import SingletonMeta
+from esb.metrics import (
+    circuit_breaker_rejected_requests_total,
+    circuit_breaker_state,
+    concurrency_limit_current,
+)
+
+
+@dataclass
+class CircuitBreakerConfig:
+    """熔断及并发限制配置，默认值来自 settings，可按系统名在 ESB_CIRCUIT_BREAKER_SYSTEM_CONFIGS 中覆盖"""
+
+    enabled: bool
+    window_size: int
+    min_requests: int
+    failure_rate_threshold: float
+    open_seconds: int
+    half_open_max_requests: int
+    min_concurrency: int
+    max_concurrency: int
+    latency_tolerance: float
+
+    @classmethod
+    def from_system(cls, system_name: str) -> "CircuitBreakerConfig":
+        system_config = settings.ESB_CIRCUIT_BREAKER_SYSTEM_CONFIGS.get(system_name) or {}
+        return cls(
+            enabled=system_config.get("enabled", settings.ESB_CIRCUIT_BREAKER_ENABLED),
+            window_size=system_config.get("window_size", settings.ESB_CIRCUIT_BREAKER_WINDOW_SIZE),
+            min_requests=system_config.get("min_requests", settings.ESB_CIRCUIT_BREAKER_MIN_REQUESTS),
+            failure_rate_threshold=system_config.get(
+                "failure_rate_threshold", settings.ESB_CIRCUIT_BREAKER_FAILURE_RATE_THRESHOLD
+            ),
+            open_seconds=system_config.get("open_seconds", settings.ESB_CIRCUIT_BREAKER_OPEN_SECONDS),
+            half_open_max_requests=system_config.get(
+                "half_open_max_requests", settings.ESB_CIRCUIT_BREAKER_HALF_OPEN_MAX_REQUESTS
+            ),
+            min_concurrency=system_config.get("min_concurrency", settings.ESB_CONCURRENCY_LIMIT_MIN),
+            max_concurrency=system_config.get("max_concurrency", settings.ESB_CONCURRENCY_LIMIT_MAX),
+            latency_tolerance=system_config.get("latency_tolerance", settings.ESB_CONCURRENCY_LIMIT_LATENCY_TOLERANCE),
+        )
+
+
+class AdaptiveConcurrencyLimiter:
+    """根据请求耗时调整的并发上限（参考 gradient2）
+
+    以长、短两个窗口的耗时指数移动平均分别作为基准耗时和当前耗时；系统下各组件的耗时差异较大时，
+    均值按各组件的请求占比平滑，个别慢组件的请求不会拉低上限。请求失败时，并发上限乘性减小；
+    当前耗时持续超过基准的 latency_tolerance 倍时，按超出的比例减小；否则每完成约 limit 个请求，并发上限加 1
+    """
+
+    DECREASE_RATIO = 0.9
+    SHORT_WINDOW = 20
+    LONG_WINDOW = 200
+
+    def __init__(self, config: CircuitBreakerConfig):
+        self.config = config
+        self.limit = float(config.max_concurrency)
+        self.in_flight = 0
+        self._samples = 0
+        self._short_latency = 0.0
+        self._long_latency = 0.0
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= int(self.limit):
+            return False
+
+        self.in_flight += 1
+        return True
+
+    def release(self, latency: float, success: bool):
+        self.in_flight -= 1
+
+        if not success:
+            self._set_limit(self.limit * self.DECREASE_RATIO)
+            return
+
+        self._observe(latency)
+        # 样本数不足时，基准耗时尚不可信，不根据耗时减小上限
+        if self._samples >= self.SHORT_WINDOW and self._short_latency > 0:
+            gradient = self.config.latency_tolerance * self._long_latency / self._short_latency
+            if gradient < 1:
+                self._set_limit(self.limit * max(self.DECREASE_RATIO, gradient))
+                return
+
+        self._set_limit(self.limit + 1 / self.limit)
+
+    def _observe(self, latency: float):
+        self._samples += 1
+        if self._samples == 1:
+            self._short_latency = self._long_latency = latency
+            return
+
+        self._short_latency += (latency - self._short_latency) * 2 / (self.SHORT_WINDOW + 1)
+        self._long_latency += (latency - self._long_latency) * 2 / (self.LONG_WINDOW + 1)
+
+    def _set_limit(self, limit: float):
+        self.limit = max(self.config.min_concurrency, min(self.config.max_concurrency, limit))
+
+
+class SystemCircuitBreaker:
+    """一个后端系统的熔断器
+
+    - closed: 窗口内请求数达到 min_requests，且失败率达到阈值时，转为 open
+    - open: 拒绝全部请求，open_seconds 秒后转为 half_open
+    - half_open: 最多放行 half_open_max_requests 个探测请求，全部成功则转为 closed，任一失败则重新 open
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, system_name: str, config: CircuitBreakerConfig):
+        self.system_name = system_name
+        self.config = config
+        self.limiter = AdaptiveConcurrencyLimiter(config)
+
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self._outcomes: deque = deque(maxlen=config.window_size)
+        self._probes = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+
+        self._set_state(self.CLOSED)
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == self.OPEN
+
+    def acquire(self) -> bool:
+        """获取请求许可，返回本次请求是否为 half_open 状态下的探测请求；请求被拒绝时抛出 RequestRejectedException"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.time() - self.opened_at < self.config.open_seconds:
+                    self._reject("circuit_open")
+                self._set_state(self.HALF_OPEN)
+
+            is_probe = self.state == self.HALF_OPEN
+            if is_probe and self._probes >= self.config.half_open_max_requests:
+                self._reject("circuit_open")
+
+            if not self.limiter.try_acquire():
+                self._reject("concurrency_limit")
+
+            if is_probe:
+                self._probes += 1
+            return is_probe
+
+    def release(self, is_probe: bool, latency: float, success: bool):
+        with self._lock:
+            self.limiter.release(latency, success)
+            concurrency_limit_current.labels(system=self.system_name).set(int(self.limiter.limit))
+
+            if is_probe:
+                self._release_probe(success)
+                return
+
+            # 探测期间或熔断后才结束的请求，结果不再计入 closed 状态的统计
+            if self.state != self.CLOSED:
+                return
+
+            self._outcomes.append(success)
+            if len(self._outcomes) < self.config.min_requests:
+                return
+
+            failure_rate = self._outcomes.count(False) / len(self._outcomes)
+            if failure_rate >= self.config.failure_rate_threshold:
+                self._open()
+
+    def _release_probe(self, success: bool):
+        if self.state != self.HALF_OPEN:
+            return
+
+        if not success:
+            self._open()
+            return
+
+        self._probe_successes += 1
+        if self._probe_successes >= self.config.half_open_max_requests:
+            self._set_state(self.CLOSED)
+
+    def _open(self):
+        self.opened_at = time.time()
+        self._set_state(self.OPEN)
+
+    def _set_state(self, state: str):
+        self.state = state
+        self._outcomes.clear()
+        self._probes = 0
+        self._probe_successes = 0
+        circuit_breaker_state.labels(system=self.system_name).set(self.STATE_VALUES[state])
+
+    def _reject(self, reason: str):
+        circuit_breaker_rejected_requests_total.labels(system=self.system_name, reason=reason).inc()
+        raise RequestRejectedException(system_name=self.system_name, reason=reason)
+
+
+class CircuitBreakerRegistry(metaclass=SingletonMeta):
+    """按系统名管理熔断器，每个 worker 进程一个实例"""
+
+    def __init__(self):
+        self._breakers: Dict[str, SystemCircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, system_name: str):
+        """获取系统的熔断器，系统名为空或未开启熔断时，返回 None"""
+        if not system_name:
+            return None
+
+        breaker = self._breakers.get(system_name)
+        if breaker is not None:
+            return breaker
+
+        config = CircuitBreakerConfig.from_system(system_name)
+        if not config.enabled:
+            return None
+
+        with self._lock:
+            return self._breakers.setdefault(system_name, SystemCircuitBreaker(system_name, config))
+
+    def clear(self):
+        with self._lock:
+            self._breakers = {}
+
+
+def get_circuit_breaker_registry() -> CircuitBreakerRegistry:
+    return CircuitBreakerRegistry()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import threading
+import time
+import urllib.parse
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Tuple
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from common.singleton import SingletonMeta
+from esb.metrics import http_pool_session_evictions_total, http_pool_session_requests_total
+
+
+@dataclass
+class HttpPoolConfig:
+    """连接池配置，默认值来自 settings，可按系统名在 ESB_HTTP_POOL_SYSTEM_CONFIGS 中覆盖"""
+
+    pool_maxsize: int
+    idle_timeout: int
+    pool_block: bool = False
+
+    @classmethod
+    def from_system(cls, system_name: str) -> "HttpPoolConfig":
+        system_config = settings.ESB_HTTP_POOL_SYSTEM_CONFIGS.get(system_name) or {}
+        return cls(
+            pool_maxsize=system_config.get("pool_maxsize", settings.ESB_HTTP_POOL_MAXSIZE),
+            idle_timeout=system_config.get("idle_timeout", settings.ESB_HTTP_POOL_IDLE_TIMEOUT),
+            pool_block=system_config.get("pool_block", False),
+        )
+
+
+class PooledSession:
+    """一个 host 对应的 keep-alive 会话"""
+
+    def __init__(self, config: HttpPoolConfig):
+        self.config = config
+        self.session = requests.Session()
+        # 会话在不同应用、用户的请求间共享，不能保存后端返回的 cookie
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.pool_maxsize, pool_block=config.pool_block)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.last_used_at = time.time()
+        self.in_flight = 0
+
+    def is_idle_expired(self, now: float) -> bool:
+        return self.in_flight == 0 and now - self.last_used_at > self.config.idle_timeout
+
+    def close(self):
+        self.session.close()
+
+
+class HttpSessionPool(metaclass=SingletonMeta):
+    """按 (系统, scheme, host) 复用 requests 会话，每个 worker 进程一个实例
+
+    gunicorn fork worker 之后才会首次访问，因此连接不会在进程间共享
+    """
+
+    def __init__(self):
+        self._sessions: Dict[Tuple[str, str, str], PooledSession] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def session(self, url: str, system_name: str = ""):
+        pooled = self._acquire(url, system_name)
+        try:
+            yield pooled.session
+        finally:
+            self._release(pooled)
+
+    def _acquire(self, url: str, system_name: str) -> PooledSession:
+        parsed_url = urllib.parse.urlparse(url)
+        key = (system_name, parsed_url.scheme, parsed_url.netloc)
+        now = time.time()
+
+        with self._lock:
+            pooled = self._sessions.get(key)
+            if pooled is not None and pooled.is_idle_expired(now):
+                # 空闲过久的连接，服务端多半已断开，直接丢弃以免复用到失效连接
+                pooled.close()
+                pooled = None
+                http_pool_session_evictions_total.labels(system=system_name).inc()
+
+            if pooled is None:
+                pooled = PooledSession(HttpPoolConfig.from_system(system_name))
+                self._sessions[key] = pooled
+                http_pool_session_requests_total.labels(system=system_name, result="miss").inc()
+            else:
+                http_pool_session_requests_total.labels(system=system_name, result="hit").inc()
+
+            pooled.in_flight += 1
+            pooled.last_used_at = now
+            return pooled
+
+    def _release(self, pooled: PooledSession):
+        with self._lock:
+            pooled.in_flight -= 1
+            pooled.last_used_at = time.time()
+
+    def clear(self):
+        with self._lock:
+            for pooled in self._sessions.values():
+                pooled.close()
+            self._sessions = {}
+
+
+def get_http_session_pool() -> HttpSessionPool:
+    return HttpSessionPool()
@@ -17,12 +17,16 @@
 # to the current version of the project delivered to anyone in the future.
 #
 
+import threading
 import time
 from builtins import object
 
 import jwt
+from cachetools import LRUCache, TTLCache, cached
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
+from django.conf import settings
+from django.utils.encoding import force_bytes
 
 from esb.utils.func_ctrl import FunctionControllerClient
 
@@ -52,6 +56,13 @@ class JWTKey(object):
             return ""
         return jwt_key.get("private_key", "")
 
+    def get_private_key_object(self):
+        """获取解析后的私钥对象，避免每次签名都重新解析 PEM"""
+        private_key = self.get_private_key()
+        if not private_key:
+            return None
+        return load_private_key(private_key)
+
     def get_public_key(self):
         jwt_key = FunctionControllerClient.get_jwt_key()
         if not jwt_key:
@@ -63,6 +74,8 @@ class JWTClient(object):
 
     ISSUER = "APIGW"
     ALGORITHM = "RS512"
+    # 过期时间，默认15分钟
+    EXPIRES_IN = 900
 
     def __init__(self, app, user, kid="apigw"):
         self.app = app
@@ -88,12 +101,11 @@ class JWTClient(object):
         self.payload["iss"] = self.ISSUER
         # Not Before Time Claim (nbf)
         self.payload["nbf"] = now - 300  # 5 * 60
-        # 过期时间，默认15分钟
-        self.payload["exp"] = now + 900  # 15 * 60
+        self.payload["exp"] = now + self.EXPIRES_IN
 
     def encode(self):
         """生成JWT Token"""
-        private_key = JWTKey().get_private_key()
+        private_key = JWTKey().get_private_key_object()
         if not private_key:
             return ""
 
@@ -103,3 +115,48 @@ class JWTClient(object):
         self.prepare_payload(now)
 
         return jwt.encode(self.payload, private_key, algorithm=self.ALGORITHM, headers=self.headers)
+
+
+@cached(cache=LRUCache(maxsize=10), lock=threading.Lock())
+def load_private_key(private_key):
+    """解析 PEM 格式的私钥，密钥轮换后 PEM 内容变化，会重新解析"""
+    return serialization.load_pem_private_key(force_bytes(private_key), password=None)
+
+
+@cached(cache=LRUCache(maxsize=10), lock=threading.Lock())
+def load_public_key(public_key):
+    """解析 PEM 格式的公钥，密钥轮换后 PEM 内容变化，会重新解析"""
+    return serialization.load_pem_public_key(force_bytes(public_key))
+
+
+_signed_jwt_cache = TTLCache(
+    maxsize=settings.BK_ESB_SIGNED_JWT_CACHE_MAXSIZE,
+    # 在 JWT 过期前预留一段时间，保证发出的 JWT 在后端校验时仍然有效
+    ttl=JWTClient.EXPIRES_IN - settings.BK_ESB_SIGNED_JWT_CACHE_EXPIRE_MARGIN,
+)
+_signed_jwt_cache_lock = threading.Lock()
+
+
+def get_signed_jwt(app, user, kid="apigw"):
+    """获取签名后的 JWT，同一应用、用户的 JWT 在过期前复用，避免每次请求都进行 RSA 签名"""
+    private_key = JWTKey().get_private_key()
+    if not private_key:
+        return ""
+
+    cache_key = (
+        tuple(sorted(app.as_json().items())) if app else (),
+        tuple(sorted(user.as_json().items())) if user else (),
+        kid,
+        # 密钥轮换后，使用新密钥重新签名
+        private_key,
+    )
+    with _signed_jwt_cache_lock:
+        token = _signed_jwt_cache.get(cache_key)
+    if token:
+        return token
+
+    token = JWTClient(app, user, kid=kid).encode()
+    if token:
+        with _signed_jwt_cache_lock:
+            _signed_jwt_cache[cache_key] = token
+    return token
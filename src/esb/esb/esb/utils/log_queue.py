@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+from django.utils.module_loading import import_string
+
+from esb.metrics import async_log_queue_depth, async_log_records_dropped_total
+
+
+class BatchingQueueHandler(logging.Handler):
+    """异步日志 handler：请求处理中只将日志记录放入队列，后台线程批量格式化后，一次写入目标 handler
+
+    - 队列已满时丢弃日志，不阻塞请求
+    - 队列中日志数达到 busy_ratio 比例时，非重要日志按 sample_rate 采样
+    - 目标 handler 使用默认格式（%(message)s），每批日志以换行拼接后写入，减少文件锁的获取次数
+
+    :param target_class: 目标 handler 类的路径，如 logging.StreamHandler
+    :param target_kwargs: 目标 handler 的初始化参数
+    """
+
+    def __init__(
+        self,
+        target_class,
+        target_kwargs=None,
+        queue_size=10000,
+        batch_size=100,
+        flush_interval=1.0,
+        busy_ratio=0.8,
+        sample_rate=1.0,
+    ):
+        super().__init__()
+        self.target = import_string(target_class)(**(target_kwargs or {}))
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.busy_size = int(queue_size * busy_ratio)
+        self.sample_rate = sample_rate
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._worker_pid = None
+        self._worker_lock = threading.Lock()
+
+    def emit(self, record):
+        self._ensure_worker()
+
+        if (
+            self.sample_rate < 1
+            and self._queue.qsize() >= self.busy_size
+            and not getattr(record.msg, "important", False)
+            and random.random() >= self.sample_rate
+        ):
+            async_log_records_dropped_total.labels(logger=record.name, reason="sampled").inc()
+            return
+
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            async_log_records_dropped_total.labels(logger=record.name, reason="queue_full").inc()
+
+    def _ensure_worker(self):
+        # 日志配置可能在 gunicorn master 中完成，fork 后的 worker 进程需重新启动后台线程
+        if self._worker_pid == os.getpid():
+            return
+
+        with self._worker_lock:
+            if self._worker_pid == os.getpid():
+                return
+
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            threading.Thread(target=self._write_forever, daemon=True).start()
+            self._worker_pid = os.getpid()
+
+    def _write_forever(self):
+        while True:
+            self.write_batch(self._get_batch())
+
+    def _get_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                # 已过期时不再等待，但仍取出队列中已有的日志
+                batch.append(self._queue.get(timeout=max(deadline - time.time(), 0)))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def write_batch(self, records):
+        async_log_queue_depth.labels(logger=records[0].name).set(self._queue.qsize())
+
+        messages = []
+        for record in records:
+            try:
+                messages.append(self.format(record))
+            except Exception:
+                async_log_records_dropped_total.labels(logger=record.name, reason="error").inc()
+                logging.getLogger("root").exception("format log record failed, logger=%s", record.name)
+
+        if not messages:
+            return
+
+        batch_record = logging.makeLogRecord(
+            {"name": records[0].name, "levelno": logging.INFO, "levelname": "INFO", "msg": "\n".join(messages)}
+        )
+        self.target.handle(batch_record)
+
+    def flush(self):
+        # 进程退出时（logging.shutdown），将队列中剩余的日志同步写入
+        records = self._drain()
+        for start in range(0, len(records), self.batch_size):
+            self.write_batch(records[start : start + self.batch_size])
+        self.target.flush()
+
+    def close(self):
+        self.target.close()
+        super().close()
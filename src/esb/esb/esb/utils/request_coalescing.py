@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+"""
+合并相同的只读组件请求：同一进程内，参数、应用、用户均相同的并发请求只调用一次后端，
+结果可在 cache_ttl 秒内继续复用
+"""
+import copy
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from cachetools import LRUCache
+from django.conf import settings
+
+from common.singleton import SingletonMeta
+
+
+@dataclass
+class CoalescingConfig:
+    """channel 的请求合并配置，如 channel_conf = {"request_coalescing": {"enabled": true, "cache_ttl": 1}}"""
+
+    enabled: bool = False
+    cache_ttl: float = 0
+
+    @classmethod
+    def from_channel_conf(cls, channel_conf: dict) -> "CoalescingConfig":
+        conf = channel_conf.get("request_coalescing") or {}
+        return cls(enabled=bool(conf.get("enabled", False)), cache_ttl=float(conf.get("cache_ttl", 0)))
+
+
+class _Call:
+    """一次正在进行的调用，其它相同 key 的请求等待其结果"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[Exception] = None
+
+
+class RequestCoalescer(metaclass=SingletonMeta):
+    """每个 worker 进程一个实例；结果在共享前复制一份，各请求拿到的均为独立的副本"""
+
+    LEADER = "leader"
+    SHARED = "shared"
+    CACHED = "cached"
+
+    def __init__(self):
+        # 缓存数据为 (结果, 过期时间)
+        self._cache: LRUCache = LRUCache(maxsize=settings.ESB_REQUEST_COALESCING_CACHE_MAXSIZE)
+        self._cache_lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._calls_lock = threading.Lock()
+
+    def call(
+        self,
+        key: str,
+        func: Callable[[], Any],
+        cache_ttl: float = 0,
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> Tuple[Any, str]:
+        """
+        调用 func 或复用相同 key 的结果，返回 (结果, 来源)，来源为 leader、shared 或 cached
+
+        等待其它请求超过 ESB_REQUEST_COALESCING_WAIT_TIMEOUT 秒时，直接调用 func
+        """
+        value = self._get_cached(key)
+        if value is not None:
+            return copy.deepcopy(value), self.CACHED
+
+        with self._calls_lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+
+        if not is_leader:
+            if not call.event.wait(settings.ESB_REQUEST_COALESCING_WAIT_TIMEOUT):
+                return func(), self.LEADER
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.value), self.SHARED
+
+        try:
+            value = func()
+        except Exception as e:
+            call.error = e
+            raise
+        else:
+            call.value = copy.deepcopy(value)
+            if cache_ttl > 0 and cacheable(value):
+                with self._cache_lock:
+                    self._cache[key] = (call.value, time.time() + cache_ttl)
+            return value, self.LEADER
+        finally:
+            with self._calls_lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def _get_cached(self, key: str) -> Any:
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.time():
+                self._cache.pop(key, None)
+                return None
+            return entry[0]
+
+    def clear(self):
+        with self._cache_lock:
+            self._cache.clear()
+
+
+def get_request_coalescer() -> RequestCoalescer:
+    return RequestCoalescer()
+
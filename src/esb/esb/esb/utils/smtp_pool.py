@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import queue
+import smtplib
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, List, Tuple
+
+from django.conf import settings
+
+from common.log import logger
+from common.singleton import SingletonMeta
+from esb.metrics import smtp_pool_session_requests_total
+
+# (host, port, user, use_ssl, use_tls)
+SMTPPoolKey = Tuple[str, int, str, bool, bool]
+
+
+class PooledSMTPSession:
+    """一个已连接并完成认证的 SMTP 会话"""
+
+    def __init__(self, key: SMTPPoolKey, smtp: smtplib.SMTP):
+        self.key = key
+        self.smtp = smtp
+        self.last_used_at = time.time()
+        self.sent_count = 0
+
+    @property
+    def reused(self) -> bool:
+        return self.sent_count > 0
+
+    def close(self):
+        try:
+            self.smtp.quit()
+        except Exception:
+            self.smtp.close()
+
+
+class SMTPSessionPool(metaclass=SingletonMeta):
+    """按 (host, port, user, ssl, tls) 复用已认证的 SMTP 会话，每个 worker 进程一个实例"""
+
+    def __init__(self):
+        self._idle_sessions: Dict[SMTPPoolKey, Deque[PooledSMTPSession]] = {}
+        self._lock = threading.Lock()
+
+    def sendmail(
+        self, key: SMTPPoolKey, connect: Callable[[], smtplib.SMTP], from_addr: str, to_addrs: List[str], msg: str
+    ):
+        """通过复用的会话发送邮件；复用的会话已被服务端断开时，新建会话重试一次"""
+        while True:
+            session = self.acquire(key, connect)
+            try:
+                session.smtp.sendmail(from_addr, to_addrs, msg)
+            except Exception as e:
+                self.release(session, discard=True)
+                if session.reused and _is_disconnected(e):
+                    logger.warning("smtp session to %s:%s disconnected, reconnect and retry", key[0], key[1])
+                    continue
+                raise
+
+            session.sent_count += 1
+            self.release(session)
+            return
+
+    def acquire(self, key: SMTPPoolKey, connect: Callable[[], smtplib.SMTP]) -> PooledSMTPSession:
+        session = self._pop_idle_session(key)
+        if session is not None:
+            smtp_pool_session_requests_total.labels(result="hit").inc()
+            return session
+
+        smtp_pool_session_requests_total.labels(result="miss").inc()
+        # 连接、TLS 握手及登录耗时较长，不能在锁内进行
+        return PooledSMTPSession(key, connect())
+
+    def release(self, session: PooledSMTPSession, discard: bool = False):
+        # 部分邮件服务器限制单个会话可发送的邮件数，达到上限后主动关闭
+        if discard or session.sent_count >= settings.ESB_SMTP_POOL_MAX_MESSAGES_PER_SESSION:
+            session.close()
+            return
+
+        session.last_used_at = time.time()
+        with self._lock:
+            sessions = self._idle_sessions.setdefault(session.key, deque())
+            if len(sessions) < settings.ESB_SMTP_POOL_MAXSIZE:
+                sessions.append(session)
+                return
+
+        session.close()
+
+    def _pop_idle_session(self, key: SMTPPoolKey):
+        now = time.time()
+
+        while True:
+            with self._lock:
+                sessions = self._idle_sessions.get(key)
+                if not sessions:
+                    return None
+                session = sessions.pop()
+
+            # 邮件服务器会断开空闲过久的会话，超时的会话直接丢弃
+            if now - session.last_used_at <= settings.ESB_SMTP_POOL_IDLE_TIMEOUT:
+                return session
+
+            session.close()
+
+    def clear(self):
+        with self._lock:
+            idle_sessions, self._idle_sessions = self._idle_sessions, {}
+
+        for sessions in idle_sessions.values():
+            for session in sessions:
+                session.close()
+
+
+class SMTPDeliveryQueue(metaclass=SingletonMeta):
+    """将发送请求放入队列，由每个 SMTP 服务对应的少量 worker 依次在同一会话上发送
+
+    突发的大量邮件不再各自建立会话，而是合并到 ESB_SMTP_QUEUE_WORKERS 个会话上连续投递；
+    每个 SMTP 服务的队列长度有上限，队列已满时，提交方等待空位，超时后提交失败
+    """
+
+    def __init__(self):
+        self._queues: Dict[SMTPPoolKey, queue.Queue] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self, key: SMTPPoolKey, connect: Callable[[], smtplib.SMTP], from_addr: str, to_addrs: List[str], msg: str
+    ) -> Future:
+        """提交发送请求；队列已满且等待 ESB_SMTP_QUEUE_WAIT_TIMEOUT 秒后仍无空位时，抛出 queue.Full，邮件不会被发送"""
+        future: Future = Future()
+        self._get_queue(key).put(
+            (connect, from_addr, to_addrs, msg, future), timeout=settings.ESB_SMTP_QUEUE_WAIT_TIMEOUT
+        )
+        return future
+
+    def _get_queue(self, key: SMTPPoolKey) -> queue.Queue:
+        with self._lock:
+            delivery_queue = self._queues.get(key)
+            if delivery_queue is None:
+                delivery_queue = self._queues[key] = queue.Queue(maxsize=settings.ESB_SMTP_QUEUE_MAXSIZE)
+                for _ in range(settings.ESB_SMTP_QUEUE_WORKERS):
+                    threading.Thread(target=self._deliver_forever, args=(key, delivery_queue), daemon=True).start()
+            return delivery_queue
+
+    def _deliver_forever(self, key: SMTPPoolKey, delivery_queue: queue.Queue):
+        pool = get_smtp_session_pool()
+        while True:
+            connect, from_addr, to_addrs, msg, future = delivery_queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                pool.sendmail(key, connect, from_addr, to_addrs, msg)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(None)
+
+
+def _is_disconnected(error: Exception) -> bool:
+    # SMTPException 继承自 OSError，只有连接层面的错误才说明会话已失效
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+def get_smtp_session_pool() -> SMTPSessionPool:
+    return SMTPSessionPool()
+
+
+def get_smtp_delivery_queue() -> SMTPDeliveryQueue:
+    return SMTPDeliveryQueue()
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import select
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Tuple
+
+from django.conf import settings
+
+from common.singleton import SingletonMeta
+from esb.metrics import thrift_pool_connection_evictions_total, thrift_pool_connection_requests_total
+
+# (服务名, transport 类名, ip, port)
+ThriftPoolKey = Tuple[str, str, str, int]
+
+
+class ThriftConnection:
+    """一个已打开的 thrift 连接，包含底层 socket、transport 及 thrift client"""
+
+    def __init__(self, key: ThriftPoolKey, socket, transport, client):
+        self.key = key
+        self.socket = socket
+        self.transport = transport
+        self.client = client
+        self.last_used_at = time.time()
+
+    @property
+    def service(self) -> str:
+        return self.key[0]
+
+    def is_alive(self) -> bool:
+        """空闲连接上不应有可读数据，可读说明服务端已关闭连接或残留了上次请求的响应"""
+        if not self.transport.isOpen():
+            return False
+
+        handle = getattr(self.socket, "handle", None)
+        if handle is None:
+            return False
+
+        try:
+            readable, _, _ = select.select([handle], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+    def close(self):
+        try:
+            self.transport.close()
+        except Exception:
+            pass
+
+
+class ThriftConnectionPool(metaclass=SingletonMeta):
+    """按 (服务, transport, ip, port) 复用已打开的 thrift 连接，每个 worker 进程一个实例
+
+    连接被借出后由调用方独占，归还后才能被其它请求（greenlet）复用
+    """
+
+    def __init__(self):
+        self._idle_connections: Dict[ThriftPoolKey, Deque[ThriftConnection]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: ThriftPoolKey, connect: Callable[[], ThriftConnection]) -> ThriftConnection:
+        """借出一个可用的空闲连接，没有时调用 connect 新建连接"""
+        if settings.ESB_THRIFT_POOL_ENABLED:
+            connection = self._pop_idle_connection(key)
+            if connection is not None:
+                thrift_pool_connection_requests_total.labels(service=key[0], result="hit").inc()
+                return connection
+
+        thrift_pool_connection_requests_total.labels(service=key[0], result="miss").inc()
+        # 新建连接涉及 TLS 握手，不能在锁内进行
+        return connect()
+
+    def release(self, connection: ThriftConnection, discard: bool = False):
+        """归还连接；请求出错的连接，协议状态未知，应丢弃"""
+        if discard or not settings.ESB_THRIFT_POOL_ENABLED:
+            connection.close()
+            return
+
+        connection.last_used_at = time.time()
+        with self._lock:
+            connections = self._idle_connections.setdefault(connection.key, deque())
+            if len(connections) < settings.ESB_THRIFT_POOL_MAXSIZE:
+                connections.append(connection)
+                return
+
+        connection.close()
+
+    def _pop_idle_connection(self, key: ThriftPoolKey):
+        now = time.time()
+        idle_timeout = settings.ESB_THRIFT_POOL_IDLE_TIMEOUT
+
+        while True:
+            with self._lock:
+                connections = self._idle_connections.get(key)
+                if not connections:
+                    return None
+                # 后进先出，优先复用最近使用过的连接，较早的连接更容易因空闲过久被淘汰
+                connection = connections.pop()
+
+            if now - connection.last_used_at > idle_timeout:
+                reason = "idle"
+            elif not connection.is_alive():
+                reason = "broken"
+            else:
+                return connection
+
+            connection.close()
+            thrift_pool_connection_evictions_total.labels(service=key[0], reason=reason).inc()
+
+    def clear(self):
+        with self._lock:
+            idle_connections, self._idle_connections = self._idle_connections, {}
+
+        for connections in idle_connections.values():
+            for connection in connections:
+                connection.close()
+
+
+def get_thrift_connection_pool() -> ThriftConnectionPool:
+    return ThriftConnectionPool()
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+"""
+两级缓存：进程内 TTL/LRU 缓存 + 可选的共享缓存（Django cache，如 Redis、数据库缓存）
+
+- 同一进程内，相同 key 的并发加载合并为一次（single-flight）
+- 数据过期后的一段时间内（stale_ttl），先返回旧数据，同时在后台刷新（stale-while-revalidate）；
+  后台刷新与同步加载共用 single-flight，且进程内同时进行的后台刷新数有上限
+- 可选地将指定类型的异常（如凭证无效）在进程内缓存 negative_ttl 秒，期间直接抛出，不再请求后端
+"""
+import functools
+import hashlib
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Type
+
+from cachetools import TTLCache
+from cachetools.keys import hashkey
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+from common.log import logger
+from esb.metrics import two_tier_cache_requests_total
+
+# (缓存数据, 数据新鲜的截止时间)
+CacheEntry = Tuple[Any, float]
+
+# 进程内同时进行的后台刷新数；达到上限时不再刷新，继续返回旧数据，由后续请求再次触发
+_refresh_slots = threading.BoundedSemaphore(settings.ESB_AUTH_CACHE_REFRESH_CONCURRENCY)
+
+
+class _Call:
+    """一次正在进行的加载，其它相同 key 的请求等待其结果"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[Exception] = None
+
+
+class TwoTierCache:
+    def __init__(
+        self,
+        name: str,
+        maxsize: int,
+        ttl: int,
+        stale_ttl: Optional[int] = None,
+        negative_ttl: int = 0,
+        negative_exceptions: Tuple[Type[Exception], ...] = (),
+    ):
+        """
+        :param name: 缓存名称，用于共享缓存的 key 前缀及指标
+        :param ttl: 数据新鲜的时长
+        :param stale_ttl: 数据过期后，仍可返回旧数据并在后台刷新的时长
+        :param negative_ttl: negative_exceptions 类型的异常被缓存的时长，为 0 时不缓存异常
+        """
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = settings.ESB_AUTH_CACHE_STALE_TTL if stale_ttl is None else stale_ttl
+        self.negative_exceptions = negative_exceptions
+
+        self._local: TTLCache = TTLCache(maxsize=maxsize, ttl=self.ttl + self.stale_ttl)
+        self._negative: Optional[TTLCache] = None
+        if negative_ttl > 0 and negative_exceptions:
+            self._negative = TTLCache(maxsize=settings.ESB_AUTH_NEGATIVE_CACHE_MAXSIZE, ttl=negative_ttl)
+        self._local_lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._calls_lock = threading.Lock()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        error = self._get_negative_entry(key)
+        if error is not None:
+            self._record("negative_hit")
+            raise error
+
+        entry, tier = self._get_entry(key)
+        if entry is None:
+            return self._load(key, loader)
+
+        value, fresh_until = entry
+        if time.time() <= fresh_until:
+            self._record(tier)
+            return value
+
+        self._record("stale")
+        self._refresh_in_background(key, loader)
+        return value
+
+    def clear(self):
+        with self._local_lock:
+            self._local.clear()
+            if self._negative is not None:
+                self._negative.clear()
+
+    def _get_negative_entry(self, key: Hashable) -> Optional[Exception]:
+        if self._negative is None:
+            return None
+
+        try:
+            with self._local_lock:
+                return self._negative[key]
+        except KeyError:
+            return None
+
+    def _get_entry(self, key: Hashable) -> Tuple[Optional[CacheEntry], str]:
+        try:
+            with self._local_lock:
+                return self._local[key], "hit"
+        except KeyError:
+            pass
+
+        entry = self._get_shared_entry(key)
+        if entry is not None:
+            with self._local_lock:
+                self._local[key] = entry
+            return entry, "shared_hit"
+
+        return None, "miss"
+
+    def _load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        with self._calls_lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+
+        if not is_leader:
+            self._record("coalesced")
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        self._record("miss")
+        return self._run(key, call, loader)
+
+    def _run(self, key: Hashable, call: _Call, loader: Callable[[], Any]) -> Any:
+        try:
+            call.value = loader()
+        except Exception as e:
+            # 与 cachetools.cached 一致，异常默认不缓存，仅短时缓存指定类型的异常
+            call.error = e
+            if self._negative is not None and isinstance(e, self.negative_exceptions):
+                with self._local_lock:
+                    self._negative[key] = e
+            raise
+        else:
+            self._set_entry(key, (call.value, time.time() + self.ttl))
+            return call.value
+        finally:
+            with self._calls_lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def _refresh_in_background(self, key: Hashable, loader: Callable[[], Any]):
+        if not _refresh_slots.acquire(blocking=False):
+            return
+
+        # 在当前请求中登记加载，相同 key 的并发请求不会重复发起刷新
+        with self._calls_lock:
+            if key in self._calls:
+                _refresh_slots.release()
+                return
+            call = self._calls[key] = _Call()
+
+        def refresh():
+            try:
+                self._run(key, call, loader)
+            except Exception:
+                # 刷新失败（如凭证已失效）时删除旧数据，下次请求重新加载并得到错误
+                logger.info("refresh cache %s failed, drop the stale entry", self.name)
+                self._delete_entry(key)
+            finally:
+                # 加载数据可能访问数据库，线程结束前关闭其数据库连接，避免连接泄漏
+                connections.close_all()
+                _refresh_slots.release()
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _set_entry(self, key: Hashable, entry: CacheEntry):
+        with self._local_lock:
+            self._local[key] = entry
+
+        shared_cache = self._get_shared_cache()
+        if shared_cache is None:
+            return
+        try:
+            shared_cache.set(self._make_shared_key(key), entry, timeout=self.ttl + self.stale_ttl)
+        except Exception:
+            logger.exception("set shared cache %s failed", self.name)
+
+    def _delete_entry(self, key: Hashable):
+        with self._local_lock:
+            self._local.pop(key, None)
+
+        shared_cache = self._get_shared_cache()
+        if shared_cache is None:
+            return
+        try:
+            shared_cache.delete(self._make_shared_key(key))
+        except Exception:
+            logger.exception("delete shared cache %s failed", self.name)
+
+    def _get_shared_entry(self, key: Hashable) -> Optional[CacheEntry]:
+        shared_cache = self._get_shared_cache()
+        if shared_cache is None:
+            return None
+        try:
+            return shared_cache.get(self._make_shared_key(key))
+        except Exception:
+            # 共享缓存不可用时，退化为仅使用进程内缓存
+            logger.exception("get shared cache %s failed", self.name)
+            return None
+
+    def _get_shared_cache(self):
+        alias = settings.ESB_AUTH_SHARED_CACHE_ALIAS
+        return caches[alias] if alias else None
+
+    def _make_shared_key(self, key: Hashable) -> str:
+        # key 中可能包含 app_secret、token 等敏感数据，仅使用其摘要
+        return "esb:two_tier_cache:%s:%s" % (self.name, hashlib.sha256(repr(key).encode("utf-8")).hexdigest())
+
+    def _record(self, result: str):
+        two_tier_cache_requests_total.labels(cache=self.name, result=result).inc()
+
+
+def two_tier_cached(cache: TwoTierCache, key: Callable[..., Hashable] = hashkey):
+    """与 cachetools.cached 用法一致的装饰器，缓存函数的返回值"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return cache.get_or_load(key(*args, **kwargs), lambda: func(*args, **kwargs))
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
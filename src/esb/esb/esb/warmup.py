@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import time
+
+from django.conf import settings
+
+from common.log import logger
+from esb.channel import get_channel_manager
+from esb.component import get_components_manager
+
+
+def warm_up_worker():
+    """
+    在 worker 处理请求前，提前初始化组件、通道，避免由 worker 的首个请求承担初始化耗时；
+    ESB_WARM_UP_COMPONENTS 开启时，同时导入全部组件模块
+    """
+    start_time = time.time()
+    try:
+        components_manager = get_components_manager()
+        if settings.ESB_WARM_UP_COMPONENTS:
+            components_manager.load_lazy_components()
+
+        get_channel_manager()
+    except Exception:
+        logger.exception("warm up worker failed")
+        return
+
+    logger.info("warm up worker done, cost %.3fs", time.time() - start_time)
@@ -16,6 +16,7 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 #
+import copy
 import datetime
 import json
 
@@ -314,3 +315,44 @@ def test_urljoin(base_url, path, expected):
 def test_smart_upper_v2(value, expected):
     result = base_utils.smart_upper_v2(value)
     assert result == expected
+
+
+class TestFrozenDict:
+    def test_readonly(self):
+        data = base_utils.FrozenDict({"a": 1})
+
+        with pytest.raises(TypeError):
+            data["b"] = 2
+        with pytest.raises(TypeError):
+            data.update({"b": 2})
+        with pytest.raises(TypeError):
+            data.pop("a")
+
+        assert data == {"a": 1}
+
+    def test_copy(self):
+        data = base_utils.FrozenDict({"a": {"b": 1}})
+
+        assert copy.deepcopy(data) is data
+
+        shallow_copied = copy.copy(data)
+        shallow_copied["c"] = 2
+        assert type(shallow_copied) is dict
+        assert data == {"a": {"b": 1}}
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (None, None),
+        ("abc", "abc"),
+        ([1, {"a": [2]}], (1, {"a": (2,)})),
+        ({"host": {"host_prod": "demo"}}, {"host": {"host_prod": "demo"}}),
+    ],
+)
+def test_freeze(value, expected):
+    result = base_utils.freeze(value)
+
+    assert result == expected
+    if isinstance(value, dict):
+        assert isinstance(result, base_utils.FrozenDict)
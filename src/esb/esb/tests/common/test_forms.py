@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import importlib
+import inspect
+import pkgutil
+
+import pytest
+from django import forms
+
+from common.errors import CommonAPIError
+from common.forms import BaseComponentForm, DefaultBooleanField, ListField, TypeCheckField, get_compiled_schema
+
+CC_JOB_COMPONENT_PACKAGES = [
+    "components.bk.apisv2.cc",
+    "components.bk.apisv2.job",
+    "components.bk.apis.job",
+]
+
+
+def collect_form_classes(packages):
+    """收集组件模块中定义的全部表单类，包括组件类中嵌套的表单"""
+    form_classes = []
+    for package_name in packages:
+        package = importlib.import_module(package_name)
+        for module_info in pkgutil.iter_modules(package.__path__):
+            if module_info.ispkg:
+                continue
+            module = importlib.import_module("%s.%s" % (package_name, module_info.name))
+            for _, comp_class in inspect.getmembers(module, inspect.isclass):
+                if comp_class.__module__ != module.__name__:
+                    continue
+                for _, form_class in inspect.getmembers(comp_class, inspect.isclass):
+                    if issubclass(form_class, BaseComponentForm) and form_class not in form_classes:
+                        form_classes.append(form_class)
+    return form_classes
+
+
+def make_valid_value(field):
+    if isinstance(field, forms.ChoiceField):
+        return field.choices[-1][0]
+    if isinstance(field, (forms.IntegerField, forms.FloatField)):
+        return "1"
+    if isinstance(field, forms.DateField):
+        return "2020-01-01"
+    if isinstance(field, (forms.BooleanField, DefaultBooleanField)):
+        return "true"
+    if isinstance(field, ListField):
+        return "1,2"
+    if isinstance(field, TypeCheckField):
+        return field.promise_type() if field.promise_type else "1"
+    return "1"
+
+
+def make_inputs(form_class):
+    fields = get_compiled_schema(form_class).fields
+    return [
+        {},
+        {name: "invalid" for name in fields},
+        {name: make_valid_value(field) for name, field in fields.items()},
+    ]
+
+
+def validate(form_class, data):
+    try:
+        return "ok", form_class(data).get_cleaned_data_or_error()
+    except CommonAPIError as e:
+        return "error", e.code.prompt
+    except Exception as e:
+        return "raise", type(e)
+
+
+FORM_CLASSES = collect_form_classes(CC_JOB_COMPONENT_PACKAGES)
+
+
+class Collection:
+    fields = [("page", forms.IntegerField(label="page", required=False))]
+
+    @staticmethod
+    def refine_data(data):
+        data["page"] = data["page"] or 1
+
+
+class DemoForm(BaseComponentForm):
+    bk_biz_id = forms.IntegerField(label="business id", required=True)
+    ip_list = ListField(required=False)
+    is_enabled = DefaultBooleanField(required=False, default=True)
+    hosts = TypeCheckField(promise_type=list, required=False)
+    name = forms.CharField(required=False)
+
+    field_collections = (Collection,)
+
+    def clean_name(self):
+        return self.cleaned_data["name"].upper()
+
+
+class TestBaseComponentForm:
+    @pytest.fixture(params=[True, False])
+    def compiled_enabled(self, request, settings):
+        settings.ESB_COMPILED_FORMS_ENABLED = request.param
+        return request.param
+
+    def test_cleaned_data(self, compiled_enabled):
+        cleaned_data = DemoForm(
+            {"bk_biz_id": "1", "ip_list": "1.1.1.1;2.2.2.2", "is_enabled": "false", "name": "test"}
+        ).get_cleaned_data_or_error()
+
+        assert cleaned_data == {
+            "bk_biz_id": 1,
+            "ip_list": ["1.1.1.1", "2.2.2.2"],
+            "is_enabled": False,
+            "hosts": [],
+            "name": "TEST",
+            "page": 1,
+        }
+
+    @pytest.mark.parametrize(
+        "data, expected",
+        [
+            ({}, "business id [bk_biz_id] This field is required."),
+            ({"bk_biz_id": "a"}, "business id [bk_biz_id] Enter a whole number."),
+            ({"bk_biz_id": "1", "hosts": {"a": 1}}, "Hosts [hosts] Must be the specified parameter data type list"),
+            ({"bk_biz_id": "1", "page": "a"}, "page [page] Enter a whole number."),
+        ],
+    )
+    def test_error_prompt(self, compiled_enabled, data, expected):
+        with pytest.raises(CommonAPIError) as exc_info:
+            DemoForm(data).get_cleaned_data_or_error()
+
+        assert exc_info.value.code.prompt == expected
+
+    def test_fields_not_shared_when_init_overridden(self, settings):
+        settings.ESB_COMPILED_FORMS_ENABLED = True
+
+        class Form(DemoForm):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.fields["bk_biz_id"].required = False
+
+        assert Form({}).get_cleaned_data_or_error()["bk_biz_id"] is None
+        assert get_compiled_schema(Form).fields["bk_biz_id"].required is True
+        with pytest.raises(CommonAPIError):
+            DemoForm({}).get_cleaned_data_or_error()
+
+
+@pytest.mark.parametrize("form_class", FORM_CLASSES, ids=lambda form_class: form_class.__qualname__)
+def test_compiled_forms_equivalent(settings, form_class):
+    for data in make_inputs(form_class):
+        settings.ESB_COMPILED_FORMS_ENABLED = False
+        expected = validate(form_class, dict(data))
+
+        settings.ESB_COMPILED_FORMS_ENABLED = True
+        assert validate(form_class, dict(data)) == expected
+
+
+@pytest.mark.parametrize("compiled_enabled", [False, True])
+def test_benchmark_cc_job_forms(benchmark, settings, compiled_enabled):
+    """校验 cc、job 全部组件表单各一次的耗时，对比编译前后的差异"""
+    settings.ESB_COMPILED_FORMS_ENABLED = compiled_enabled
+    cases = [(form_class, make_inputs(form_class)[2]) for form_class in FORM_CLASSES]
+
+    def validate_all():
+        for form_class, data in cases:
+            validate(form_class, dict(data))
+
+    benchmark.pedantic(validate_all, rounds=20, warmup_rounds=1)
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import pytest
+
+from common.errors import APIError
+from components.generic.templates.cmsi.send_msg import SendMsg
+
+
+@pytest.fixture
+def mock_prepare_other(mocker):
+    def prepare_other(component_name, kwargs={}, **_):
+        comp_obj = mocker.MagicMock()
+        comp_obj.invoke.return_value = {
+            "result": component_name != "generic.cmsi.send_sms",
+            "message": component_name,
+            "kwargs": kwargs,
+        }
+        return comp_obj
+
+    mocker.patch("components.generic.templates.cmsi.send_msg.get_channel_manager")
+    return mocker.patch.object(SendMsg, "prepare_other", side_effect=prepare_other)
+
+
+class TestSendMsg:
+    def test_send(self, mock_prepare_other):
+        result = SendMsg().invoke(
+            kwargs={"msg_type": "voice", "receiver__username": "admin", "title": "test", "content": "hello"}
+        )
+
+        assert result["result"] is True
+        assert result["message"] == "generic.cmsi.send_voice_msg"
+        assert result["kwargs"]["auto_read_message"] == "hello"
+        assert "targets" not in result["kwargs"]
+
+    def test_send_msg_types(self, mock_prepare_other):
+        result = SendMsg().invoke(
+            kwargs={
+                "msg_types": "mail,weixin",
+                "receiver__username": "admin",
+                "title": "test",
+                "content": "hello",
+            }
+        )
+
+        assert result["result"] is True
+        assert [r["msg_type"] for r in result["data"]] == ["mail", "weixin"]
+        assert result["data"][1]["kwargs"]["data"]["message"] == "hello"
+        assert mock_prepare_other.call_count == 2
+
+    def test_send_targets(self, settings, mock_prepare_other):
+        settings.ESB_CMSI_SEND_MSG_CONCURRENCY = 2
+
+        result = SendMsg().invoke(
+            kwargs={
+                "targets": [
+                    {"msg_type": "mail", "receiver__username": "admin,test"},
+                    {"msg_type": "sms", "receiver__username": ["admin"]},
+                    {"msg_type": "unknown", "receiver__username": ["admin"]},
+                ],
+                "title": "test",
+                "content": "hello",
+            }
+        )
+
+        assert result["result"] is False
+        assert [(r["msg_type"], r["result"]) for r in result["data"]] == [
+            ("mail", True),
+            ("sms", False),
+            ("unknown", False),
+        ]
+        assert result["data"][0]["kwargs"]["receiver__username"] == ["admin", "test"]
+        assert mock_prepare_other.call_count == 2
+
+    def test_send_without_receiver(self, mock_prepare_other):
+        with pytest.raises(APIError):
+            SendMsg().invoke(kwargs={"msg_types": "mail", "title": "test", "content": "hello"})
+
+    @pytest.mark.parametrize("target", ["mail", ["mail", "admin"], None])
+    def test_send_targets_invalid_item(self, mock_prepare_other, target):
+        with pytest.raises(APIError) as exc_info:
+            SendMsg().invoke(
+                kwargs={
+                    "targets": [{"msg_type": "mail", "receiver__username": "admin"}, target],
+                    "title": "test",
+                    "content": "hello",
+                }
+            )
+
+        assert "Item 1 of param [targets]" in exc_info.value.code.prompt
+        mock_prepare_other.assert_not_called()
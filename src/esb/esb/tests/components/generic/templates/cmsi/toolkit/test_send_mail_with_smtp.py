@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+from concurrent import futures
+
+import pytest
+
+from components.generic.templates.cmsi.toolkit.send_mail_with_smtp import SMTPClient
+
+
+class TestSMTPClient:
+    @pytest.fixture
+    def future(self, settings, mocker):
+        settings.ESB_SMTP_QUEUE_ENABLED = True
+        future = mocker.MagicMock()
+        delivery_queue = mocker.MagicMock()
+        delivery_queue.submit.return_value = future
+        mocker.patch(
+            "components.generic.templates.cmsi.toolkit.send_mail_with_smtp.get_smtp_delivery_queue",
+            return_value=delivery_queue,
+        )
+        return future
+
+    def test_sendmail_queued_timeout_cancelled(self, future):
+        future.result.side_effect = futures.TimeoutError()
+        future.cancel.return_value = True
+
+        # 邮件仍在队列中，取消投递后返回失败，不会再被发送
+        with pytest.raises(futures.TimeoutError):
+            SMTPClient("smtp.example.com", 25).sendmail("admin@example.com", ["a@example.com"], "msg")
+        future.cancel.assert_called_once_with()
+
+    def test_sendmail_queued_timeout_sending(self, future):
+        future.result.side_effect = [futures.TimeoutError(), None]
+        future.cancel.return_value = False
+
+        # 邮件已在发送中，无法取消，等待发送结果
+        SMTPClient("smtp.example.com", 25).sendmail("admin@example.com", ["a@example.com"], "msg")
+        assert future.result.call_count == 2
@@ -23,7 +23,14 @@ from ddf import G
 
 from common.base_utils import FancyDict
 from common.base_validators import ValidationError
-from esb.bkauth.validators import BaseUserAuthValidator, UserAuthValidator, VerifiedUserRequiredValidator
+from esb.bkauth.validators import (
+    AuthFailureThrottledError,
+    BaseUserAuthValidator,
+    InvalidBkTokenError,
+    UserAuthValidator,
+    VerifiedUserRequiredValidator,
+    bk_token_failure_throttle,
+)
 from esb.bkcore.models import AccessToken
 
 pytestmark = pytest.mark.django_db
@@ -40,18 +47,74 @@ class TestBaseUserAuthValidator:
 
     def test_verify_bk_token(self, fake_request, mocker):
         validator = BaseUserAuthValidator()
+        validator._verify_bk_token.cache.clear()
 
-        mocker.patch("components.bk.apis.bk_login.is_login.IsLogin.invoke", return_value={"result": False})
+        mock_invoke = mocker.patch(
+            "components.bk.apis.bk_login.is_login.IsLogin.invoke", return_value={"result": False}
+        )
+        with pytest.raises(ValidationError):
+            validator._verify_bk_token("fake-bk-token", "fake-app-code")
+
+        # 无效的 bk_token 被短时缓存，不再请求登录服务
         with pytest.raises(ValidationError):
             validator._verify_bk_token("fake-bk-token", "fake-app-code")
+        assert mock_invoke.call_count == 1
 
         mocker.patch(
             "components.bk.apis.bk_login.is_login.IsLogin.invoke",
             return_value={"result": True, "data": {"username": "admin"}},
         )
-        result = validator._verify_bk_token("fake-bk-token", "fake-app-code")
+        result = validator._verify_bk_token("another-bk-token", "fake-app-code")
         assert result == "admin"
 
+    def test_validate_bk_token_throttled(self, fake_request, mocker):
+        mocker.patch.object(bk_token_failure_throttle, "limit", 2)
+        bk_token_failure_throttle.clear()
+        BaseUserAuthValidator._verify_bk_token.cache.clear()
+
+        mock_invoke = mocker.patch(
+            "components.bk.apis.bk_login.is_login.IsLogin.invoke", return_value={"result": False}
+        )
+        validator = BaseUserAuthValidator()
+        fake_request.g = FancyDict({"app_code": "throttled-app", "client_ip": "1.1.1.1"})
+        for i in range(2):
+            with pytest.raises(InvalidBkTokenError):
+                validator.validate_bk_token(fake_request, f"invalid-bk-token-{i}")
+
+        # 失败次数达到上限后，该客户端不再请求登录服务，且拒绝结果不被缓存
+        for i in range(3):
+            with pytest.raises(AuthFailureThrottledError):
+                validator.validate_bk_token(fake_request, f"invalid-bk-token-{i}")
+        assert mock_invoke.call_count == 2
+
+        # 同一应用的其它客户端不受影响
+        fake_request.g = FancyDict({"app_code": "throttled-app", "client_ip": "2.2.2.2"})
+        with pytest.raises(InvalidBkTokenError):
+            validator.validate_bk_token(fake_request, "invalid-bk-token-other")
+        assert mock_invoke.call_count == 3
+        bk_token_failure_throttle.clear()
+
+    def test_validate_bk_token_login_service_error(self, fake_request, mocker):
+        mocker.patch.object(bk_token_failure_throttle, "limit", 1)
+        bk_token_failure_throttle.clear()
+        BaseUserAuthValidator._verify_bk_token.cache.clear()
+
+        mock_invoke = mocker.patch(
+            "components.bk.apis.bk_login.is_login.IsLogin.invoke",
+            return_value={"result": False, "code": 1306201, "message": "Request third-party interface error"},
+        )
+        validator = BaseUserAuthValidator()
+        fake_request.g = FancyDict({"app_code": "fake-app-code", "client_ip": "1.1.1.1"})
+        for _ in range(3):
+            with pytest.raises(ValidationError) as exc_info:
+                validator.validate_bk_token(fake_request, "fake-bk-token")
+            assert not isinstance(exc_info.value, (InvalidBkTokenError, AuthFailureThrottledError))
+
+        # 登录服务异常时，不计入失败次数，也不缓存校验结果
+        assert mock_invoke.call_count == 3
+        assert not bk_token_failure_throttle.is_throttled(("fake-app-code", "1.1.1.1"))
+        bk_token_failure_throttle.clear()
+
     def test_validate_access_token(self, mocker, fake_request, unique_id, faker):
         mocker.patch(
             "esb.bkauth.validators.BaseUserAuthValidator.sync_current_username",
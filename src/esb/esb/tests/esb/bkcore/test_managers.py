@@ -42,6 +42,12 @@ class TestSystemManager:
 
 
 class TestESBChannelManager:
+    def test_get_data_version(self):
+        count, _ = ESBChannel.objects.get_data_version()
+
+        channel = G(ESBChannel)
+        assert ESBChannel.objects.get_data_version() == (count + 1, channel.updated_time)
+
     def test_get_best_matched_channel(self, faker):
         path1 = f"/{faker.unique.pystr()}"
 
@@ -28,7 +28,11 @@ pytestmark = pytest.mark.django_db
 class TestESBChannel:
     def test_channel_conf(self):
         channel = G(ESBChannel, permission_level=PermissionLevelEnum.UNLIMITED.value)
-        assert channel.channel_conf == {"id": channel.id, "permission_level": PermissionLevelEnum.UNLIMITED.value}
+        assert channel.channel_conf == {
+            "id": channel.id,
+            "permission_level": PermissionLevelEnum.UNLIMITED.value,
+            "request_coalescing": None,
+        }
 
     @pytest.mark.parametrize(
         "path, expected",
@@ -17,17 +17,24 @@
 # to the current version of the project delivered to anyone in the future.
 #
 import json
-import re
+import time
 
 import pytest
 
 from common import errors
-from common.base_utils import FancyDict
+from common.base_utils import FancyDict, FrozenDict
 from common.base_validators import ValidationError
 from common.constants import COMPONENT_STATUSES
 from common.errors import error_codes
-from esb.channel.base import ApiChannel, BaseChannel, BaseChannelManager, RequestHandler
-from esb.utils.base import preprocess_path_tmpl
+from esb.channel import base as channel_base
+from esb.channel.base import (
+    ApiChannel,
+    BaseChannel,
+    BaseChannelManager,
+    ChannelRoute,
+    PreparedRoute,
+    RequestHandler,
+)
 
 
 class TestBaseChannelManager:
@@ -82,16 +89,14 @@ class TestBaseChannelManager:
     )
     def test_search_channel_by_repath(self, method, path, expected):
         manager = BaseChannelManager()
-        manager.preset_channels_with_path_vars = {
-            "GET": {
-                "/color/{name}": {
-                    "re_path": re.compile(r"^%s$" % preprocess_path_tmpl("/color/{name}")),
-                },
-                "/foo/{bar}/{id}/": {
-                    "re_path": re.compile(r"^%s$" % preprocess_path_tmpl("/foo/{bar}/{id}/")),
-                },
-            }
-        }
+        manager.register_channel_groups(
+            {},
+            [
+                ("/color/{name}", {"comp_codename": "generic.demo.color", "method": "GET"}),
+                ("/foo/{bar}/{id}/", {"comp_codename": "generic.demo.foo", "method": "GET"}),
+            ],
+            {},
+        )
 
         _, path_vars = manager.search_channel_by_repath(path, method)
         if expected:
@@ -113,11 +118,98 @@ class TestBaseChannelManager:
         assert list(manager.preset_channels_with_path_vars.keys()) == ["POST"]
         assert manager.preset_channels_with_path_vars["POST"]["/color/{name}/"] is not None
 
+    def test_get_prepared_route(self, mocker):
+        from_channel_conf = mocker.patch.object(PreparedRoute, "from_channel_conf")
+        manager = BaseChannelManager()
+        manager.register_channel_groups({}, [("/color/red/", {"comp_codename": "generic.demo.red"})], {})
+        channel_conf = manager.get_channel_by_path("/color/red/", "GET")
+
+        prepared_route = manager.get_prepared_route("api", "GET", channel_conf)
+        assert manager.get_prepared_route("api", "GET", channel_conf) is prepared_route
+        from_channel_conf.assert_called_once_with("api", channel_conf)
+
+        # 重新注册 channel 后，缓存失效
+        manager.register_channel_groups({}, [("/color/red/", {"comp_codename": "generic.demo.red"})], {})
+        manager.get_prepared_route("api", "GET", channel_conf)
+        assert from_channel_conf.call_count == 2
+
+
+class TestPreparedRoute:
+    @pytest.fixture(autouse=True)
+    def setup_fixtures(self, mocker):
+        self.components_manager = mocker.patch.object(channel_base, "get_components_manager").return_value
+        self.comp_class = self.components_manager.get_comp_by_name.return_value
+
+        self.channel_class = mocker.MagicMock(request_validators=[1])
+        self.channel_route = ChannelRoute(is_active=True, component_codename="generic.demo.red", timeout=10)
+        self.channel_conf = {
+            "path": "/color/red/",
+            "channel_route": self.channel_route,
+            "classes": {"api": self.channel_class},
+            "comp_conf": {"host": {"host_prod": "http://demo.example.com"}, "fields": ["a"]},
+            "channel_conf": None,
+        }
+
+    def test_from_channel_conf(self):
+        prepared_route = PreparedRoute.from_channel_conf("api", self.channel_conf)
+
+        assert prepared_route.channel_class is self.channel_class
+        assert prepared_route.comp_class is self.comp_class
+        assert prepared_route.comp_conf == {"host": {"host_prod": "http://demo.example.com"}, "fields": ("a",)}
+        assert isinstance(prepared_route.comp_conf["host"], FrozenDict)
+        assert prepared_route.channel_conf == {}
+        assert prepared_route.request_validators == [1]
+        assert prepared_route.timeout == 10
+
+    @pytest.mark.parametrize(
+        "request_validators, append_request_validators, expected",
+        [
+            (None, None, [1]),
+            ([2], None, [2]),
+            (None, [3], [1, 3]),
+            ([2], [3], [2, 3]),
+        ],
+    )
+    def test_from_channel_conf_validators(self, request_validators, append_request_validators, expected):
+        self.channel_route.request_validators = request_validators
+        self.channel_route.append_request_validators = append_request_validators
+
+        prepared_route = PreparedRoute.from_channel_conf("api", self.channel_conf)
+        assert prepared_route.request_validators == expected
+
+    def test_channel_is_not_active(self):
+        self.channel_route.is_active = False
+
+        with pytest.raises(errors.APIError, match=r".*inactive channel.*"):
+            PreparedRoute.from_channel_conf("api", self.channel_conf)
+
+    def test_comp_cls_not_found(self):
+        self.components_manager.get_comp_by_name.return_value = None
+
+        with pytest.raises(errors.APIError, match=r".*component class not found.*"):
+            PreparedRoute.from_channel_conf("api", self.channel_conf)
+
+    def test_make_channel(self):
+        prepared_route = PreparedRoute.from_channel_conf("api", self.channel_conf)
+
+        channel = prepared_route.make_channel("/color/red/")
+
+        self.channel_class.assert_called_once_with(
+            self.comp_class,
+            path="/color/red/",
+            is_active=True,
+            comp_conf=prepared_route.comp_conf,
+            channel_conf=prepared_route.channel_conf,
+        )
+        channel.set_request_validators.assert_called_once_with([1])
+
 
 class TestBaseChannel:
     @pytest.fixture(autouse=True)
     def setup_fixtures(self, mocker):
         self.request = mocker.MagicMock(META={"REMOTE_ADDR": "127.0.0.1"}, body="")
+        # 由 esb.middlewares 在请求开始时设置
+        self.request.g.ts_request_start = time.time()
         self.comp_class = mocker.MagicMock()
         self.comp = self.comp_class.return_value
         self.path = "/"
@@ -164,6 +256,11 @@ class TestBaseChannel:
                 COMPONENT_STATUSES.EXCEPTION,
                 error_codes.REQUEST_BLOCKED,
             ),
+            (
+                errors.RequestRejectedException("test", "circuit_open"),
+                COMPONENT_STATUSES.EXCEPTION,
+                error_codes.REQUEST_REJECTED,
+            ),
             (
                 Exception(),
                 COMPONENT_STATUSES.EXCEPTION,
@@ -200,6 +297,80 @@ class TestBaseChannel:
         assert self.request.g.component_status == COMPONENT_STATUSES.ARGUMENT_ERROR
         assert result["code"] == error_codes.COMMON_ERROR.code.code
 
+    def test_stage_metrics(self, settings, mocker):
+        settings.ESB_COMPONENT_STAGE_METRICS_ENABLED = True
+        self.comp.sys_name = "CC"
+        self.comp.get_alias_name.return_value = "search_business"
+        self.comp.invoke.return_value = {"result": True}
+        mock_observe_stage = mocker.patch.object(BaseChannel, "observe_stage")
+
+        request_validator = mocker.MagicMock()
+        channel = BaseChannel(self.comp_class, self.path, request_validators=[request_validator])
+        channel.handle_request(self.request)
+
+        stages = [call[0][0] for call in mock_observe_stage.call_args_list]
+        assert stages == ["validate:MagicMock", "invoke", "render", "total"]
+
+    def test_stage_metrics_disabled(self, settings, mocker):
+        settings.ESB_COMPONENT_STAGE_METRICS_ENABLED = False
+        self.comp.invoke.return_value = {"result": True}
+        mock_observe_stage = mocker.patch.object(BaseChannel, "observe_stage")
+
+        self.channel.handle_request(self.request)
+
+        mock_observe_stage.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "channel_conf, is_response_shareable, expected_calls",
+        [
+            ({}, True, 2),
+            ({"request_coalescing": {"enabled": True, "cache_ttl": 10}}, False, 2),
+            ({"request_coalescing": {"enabled": True, "cache_ttl": 10}}, True, 1),
+        ],
+    )
+    def test_invoke_component(self, mocker, channel_conf, is_response_shareable, expected_calls):
+        mocker.patch.object(BaseChannel, "get_coalescing_key", return_value="test-coalescing-key")
+        channel_base.get_request_coalescer().clear()
+        self.comp.sys_name = "CC"
+        self.comp.get_alias_name.return_value = "search_business"
+        self.comp.is_response_shareable = is_response_shareable
+        self.comp.invoke.return_value = {"result": True}
+
+        channel = BaseChannel(self.comp_class, self.path, channel_conf=channel_conf)
+        assert channel.invoke_component(self.request) == {"result": True}
+        assert channel.invoke_component(self.request) == {"result": True}
+
+        assert self.comp.invoke.call_count == expected_calls
+        channel_base.get_request_coalescer().clear()
+
+    def test_get_coalescing_key(self):
+        def make_request(**kwargs):
+            g = FancyDict(
+                system_name="CC",
+                component_name="search_business",
+                kwargs={"bk_app_code": "test", "bk_app_secret": "secret", "bk_biz_id": 1},
+                app_code="test",
+                current_user_username="admin",
+                use_test_env=False,
+                headers={},
+            )
+            g.update(kwargs)
+            return FancyDict(g=g)
+
+        key = self.channel.get_coalescing_key(make_request())
+        assert key
+        # 认证信息不参与
+        assert key == self.channel.get_coalescing_key(
+            make_request(kwargs={"bk_app_code": "test", "bk_app_secret": "other", "bk_biz_id": 1})
+        )
+        assert key != self.channel.get_coalescing_key(make_request(kwargs={"bk_biz_id": 2}))
+        assert key != self.channel.get_coalescing_key(make_request(system_name="JOB"))
+        other_channel = BaseChannel(self.comp_class, "/cc/other_path/")
+        assert key != other_channel.get_coalescing_key(make_request())
+        assert key != self.channel.get_coalescing_key(make_request(current_user_username="guest"))
+        assert key != self.channel.get_coalescing_key(make_request(headers={"Blueking-Language": "en"}))
+        assert self.channel.get_coalescing_key(make_request(kwargs={"file": object()})) == ""
+
     @pytest.mark.parametrize(
         "header, expected",
         [
@@ -19,7 +19,7 @@
 import pytest
 from ddf import G
 
-from esb.bkcore.models import ESBChannel
+from esb.bkcore.models import ESBChannel, System
 from esb.channel.db_channel import DBChannelManager, get_db_channel_manager
 
 pytestmark = pytest.mark.django_db
@@ -34,27 +34,107 @@ def mock_periodic_timer(mocker):
 
 
 class TestDBChannelManager:
-    def test_get_channels_from_db(self, mocker):
-        G(ESBChannel)
+    @pytest.fixture
+    def manager(self, settings):
+        settings.DB_CHANNEL_FULL_REFRESH_INTERVAL = 3600
+        return DBChannelManager()
+
+    def test_get_channels_from_db(self, manager):
+        channel = G(ESBChannel)
 
-        manager = DBChannelManager()
         channels = manager._get_channels_from_db()
-        assert len(channels) >= 1
+        assert channels[channel.id][0] == channel.path
 
-    def test_refresh_channel_groups(self, mocker):
+    def test_refresh_channel_groups(self, mocker, manager):
         mocker.patch.object(
             DBChannelManager,
             "_get_channels_from_db",
-            return_value=[
-                ("/color/red", {"comp_codename": "generic.color.red"}),
-                ("/color/{name}", {"comp_codename": "generic.color.name"}),
-            ],
+            return_value={
+                1: ("/color/red", {"comp_codename": "generic.color.red"}),
+                2: ("/color/{name}", {"comp_codename": "generic.color.name"}),
+            },
         )
-        manager = DBChannelManager()
+        manager._last_full_refreshed_at = 0
+        generation = manager.generation
         manager._refresh_channel_groups()
 
         assert len(manager.preset_channels) > 0
         assert len(manager.preset_channels_with_path_vars) > 0
+        assert manager.generation == generation + 1
+
+    def test_refresh_channel_groups_skipped(self, manager):
+        G(ESBChannel)
+        assert manager._refresh_channel_groups_by_data_version() == "full"
+
+        generation = manager.generation
+        assert manager._refresh_channel_groups_by_data_version() == "skipped"
+        assert manager.generation == generation
+
+    def test_refresh_channel_groups_incrementally(self, manager, unique_id):
+        system = G(System)
+        red = G(ESBChannel, system=system, method="GET", path=f"/{unique_id}/red/")
+        green = G(ESBChannel, system=system, method="GET", path=f"/{unique_id}/green/")
+        manager._refresh_channel_groups_by_data_version()
+
+        # 变更 red，删除 green，新增 blue
+        red.path = f"/{unique_id}/red/v2/"
+        red.save()
+        green.delete()
+        G(ESBChannel, system=system, method="GET", path=f"/{unique_id}/blue/")
+
+        assert manager._refresh_channel_groups_by_data_version() == "incremental"
+        assert manager.get_channel_by_path(f"/{unique_id}/red/", "GET") is None
+        assert manager.get_channel_by_path(f"/{unique_id}/red/v2/", "GET") is not None
+        assert manager.get_channel_by_path(f"/{unique_id}/green/", "GET") is None
+        assert manager.get_channel_by_path(f"/{unique_id}/blue/", "GET") is not None
+        assert manager._channels == manager._get_channels_from_db()
+
+    def test_set_channels_incrementally(self, manager):
+        channels = {
+            1: ("/color/{name}/", {"comp_codename": "generic.color.name", "method": "GET"}),
+            2: ("/color/red/", {"comp_codename": "generic.color.red", "method": "GET"}),
+            3: ("/shape/{name}/", {"comp_codename": "generic.shape.name", "method": "POST"}),
+            4: ("/shape/{id}/", {"comp_codename": "generic.shape.id", "method": "POST"}),
+        }
+        manager._set_channels(channels)
+        get_router = manager.path_vars_routers["GET"]
+
+        # 变更 1，删除 4，新增 5；未变更的 channel 沿用原对象
+        channels = dict(channels)
+        channels[1] = ("/color/{name}/", {"comp_codename": "generic.color.name.v2", "method": "GET"})
+        channels.pop(4)
+        channels[5] = ("/shape/{id}/v2/", {"comp_codename": "generic.shape.id.v2", "method": "POST"})
+        manager._set_channels(channels)
+
+        value, _ = manager.search_channel_by_repath("/color/blue/", "GET")
+        assert value["channel_route"].component_codename == "generic.color.name.v2"
+        assert manager.get_channel_by_path("/color/red/", "GET") is not None
+        value, _ = manager.search_channel_by_repath("/shape/circle/", "POST")
+        assert value["channel_route"].component_codename == "generic.shape.name"
+        value, _ = manager.search_channel_by_repath("/shape/1/v2/", "POST")
+        assert value["channel_route"].component_codename == "generic.shape.id.v2"
+        assert manager.get_channel_by_path("/shape/{id}/", "POST") is None
+        assert manager.path_vars_routers["GET"] is not get_router
+
+        # 结果与全量生成一致
+        full_manager = DBChannelManager.__new__(DBChannelManager)
+        full_manager.__dict__.update(manager.__dict__)
+        full_manager._channels = {}
+        full_manager._set_channels({channel_id: (path, dict(value)) for channel_id, (path, value) in channels.items()})
+        for method in ["GET", "POST"]:
+            assert list(manager.preset_channels_with_path_vars[method]) == list(
+                full_manager.preset_channels_with_path_vars[method]
+            )
+            assert set(manager.preset_channels[method]) == set(full_manager.preset_channels[method])
+
+    def test_refresh_channel_groups_fully_when_system_changed(self, manager):
+        channel = G(ESBChannel)
+        manager._refresh_channel_groups_by_data_version()
+
+        channel.system.timeout = 10
+        channel.system.save()
+
+        assert manager._refresh_channel_groups_by_data_version() == "full"
 
 
 def test_get_db_channel_manager():
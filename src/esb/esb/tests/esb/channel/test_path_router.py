@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import re
+
+import pytest
+
+from esb.channel.path_router import PathTemplateRouter
+from esb.utils.base import PathVars, preprocess_path_tmpl
+
+
+def regex_scan(path_tmpls, path):
+    """原 search_channel_by_repath 的实现：按注册顺序逐个尝试正则"""
+    for path_tmpl in path_tmpls:
+        matched_obj = re.compile(r"^%s$" % preprocess_path_tmpl(path_tmpl)).match(path)
+        if matched_obj:
+            return path_tmpl, PathVars.from_matched_obj(matched_obj)
+    return None, None
+
+
+def make_router(path_tmpls):
+    router = PathTemplateRouter()
+    for path_tmpl in path_tmpls:
+        router.add(path_tmpl, path_tmpl)
+    return router
+
+
+class TestPathTemplateRouter:
+    @pytest.mark.parametrize(
+        "path_tmpls, path, expected, expected_vars",
+        [
+            (["/color/{name}"], "/color/red", "/color/{name}", {"name": "red"}),
+            (["/color/{name}"], "/color/red/", None, None),
+            (["/color/{name}/"], "/color/red", None, None),
+            (["/color/{name}"], "/color/", None, None),
+            (["/foo/{bar}/{id}/"], "/foo/bar/1/", "/foo/{bar}/{id}/", {"bar": "bar", "id": "1"}),
+            (["/foo/{bar}-{id}/"], "/foo/a-b-c/", "/foo/{bar}-{id}/", {"bar": "a-b", "id": "c"}),
+            (["/v2/{name}.json"], "/v2/abc.json", "/v2/{name}.json", {"name": "abc"}),
+            # 普通片段中的 "." 与原正则一样匹配任意字符
+            (["/v2/a.b/{name}"], "/v2/axb/c", "/v2/a.b/{name}", {"name": "c"}),
+            # 先注册的模板优先，而不是普通片段优先
+            (["/a/{x}/c", "/a/b/{y}"], "/a/b/c", "/a/{x}/c", {"x": "b"}),
+            (["/a/b/{y}", "/a/{x}/c"], "/a/b/c", "/a/b/{y}", {"y": "c"}),
+            (["/a/{x}/d", "/a/b/{y}"], "/a/b/c", "/a/b/{y}", {"y": "c"}),
+        ],
+    )
+    def test_match(self, path_tmpls, path, expected, expected_vars):
+        value, path_vars = make_router(path_tmpls).match(path)
+
+        assert value == expected
+        if expected_vars is None:
+            assert path_vars is None
+        else:
+            assert path_vars.val_dict == expected_vars
+            assert path_vars.val_list == list(expected_vars.values())
+
+        regex_value, _ = regex_scan(path_tmpls, path)
+        assert value == regex_value
+
+    def test_duplicated_path_tmpl(self):
+        router = PathTemplateRouter()
+        router.add("/color/{name}", 1)
+        router.add("/color/{name}", 2)
+
+        assert router.match("/color/red")[0] == 1
+        assert len(router) == 2
+
+
+def make_path_tmpls(count):
+    return ["/system_%d/{resource}/item_%d/{id}/" % (i % 50, i) for i in range(count)]
+
+
+@pytest.mark.parametrize("count", [1000, 10000])
+def test_benchmark_regex_scan(benchmark, count):
+    path_tmpls = make_path_tmpls(count)
+    compiled = [(tmpl, re.compile(r"^%s$" % preprocess_path_tmpl(tmpl))) for tmpl in path_tmpls]
+    path = "/system_%d/host/item_%d/1/" % ((count - 1) % 50, count - 1)
+
+    def scan():
+        for tmpl, re_path in compiled:
+            if re_path.match(path):
+                return tmpl
+
+    assert benchmark.pedantic(scan, rounds=20) == path_tmpls[-1]
+
+
+@pytest.mark.parametrize("count", [1000, 10000])
+def test_benchmark_path_template_router(benchmark, count):
+    path_tmpls = make_path_tmpls(count)
+    router = make_router(path_tmpls)
+    path = "/system_%d/host/item_%d/1/" % ((count - 1) % 50, count - 1)
+
+    value, _ = benchmark.pedantic(router.match, args=(path,), rounds=20)
+    assert value == path_tmpls[-1]
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import json
+import time
+
+import pytest
+
+from esb.component import base
+from esb.component.base import ComponentsManager, get_components_manager
+from esb.utils.esb_config import EsbConfigParser
+
+
+@pytest.fixture(scope="module")
+def config_list():
+    return EsbConfigParser().get_component_groups()
+
+
+@pytest.fixture(scope="module")
+def manifest(config_list):
+    manager = ComponentsManager()
+    manager.register_by_config(config_list)
+    return manager.dump_manifest(config_list)
+
+
+class TestComponentsManager:
+    def test_dump_manifest(self, manifest):
+        assert manifest["version"] == ComponentsManager.MANIFEST_VERSION
+        assert {
+            "codename": "generic.cmsi.send_msg",
+            "module": "components.generic.templates.cmsi.send_msg",
+            "class_name": "SendMsg",
+            "name_prefix": "generic.",
+        } in manifest["components"]
+
+    def test_register_by_manifest(self, manifest, config_list):
+        manager = ComponentsManager()
+        assert manager.register_by_manifest(manifest, config_list) is True
+        assert manager.name_component_map == {}
+
+        comp_class = manager.get_comp_by_name("generic.cmsi.send_msg")
+        assert comp_class.__name__ == "SendMsg"
+        assert "generic.cmsi.send_msg" not in manager.lazy_components
+        assert manager.get_comp_by_name("generic.not_exist.test") is None
+
+        manager.load_lazy_components()
+        assert manager.lazy_components == {}
+        assert len(manager.get_registed_components()) == len(manifest["components"])
+
+    def test_register_by_manifest_outdated(self, manifest, config_list):
+        manager = ComponentsManager()
+
+        assert manager.register_by_manifest(dict(manifest, fingerprint="outdated"), config_list) is False
+        assert manager.register_by_manifest(dict(manifest, version=0), config_list) is False
+        assert manager.lazy_components == {}
+
+    def test_load_lazy_component_error(self, config_list):
+        manager = ComponentsManager()
+        manager.lazy_components["generic.test.error"] = {
+            "codename": "generic.test.error",
+            "module": "components.not_exist",
+            "class_name": "Error",
+            "name_prefix": "generic.",
+        }
+
+        assert manager.get_comp_by_name("generic.test.error") is None
+        assert manager.lazy_components == {}
+
+
+def test_get_components_manager(settings, mocker, tmp_path, manifest):
+    manifest_path = tmp_path / "components_manifest.json"
+    manifest_path.write_text(json.dumps(manifest))
+    settings.ESB_COMPONENTS_MANIFEST_PATH = str(manifest_path)
+
+    mocker.patch.object(base, "_components_manager", None)
+    register_by_config = mocker.spy(ComponentsManager, "register_by_config")
+
+    manager = get_components_manager()
+    assert register_by_config.call_count == 0
+    assert len(manager.lazy_components) == len(manifest["components"])
+
+
+def test_cold_start_benchmark(settings, mocker, tmp_path, manifest):
+    """对比遍历导入全部组件与根据清单注册组件的耗时，组件模块已被导入，仅作粗略对比"""
+    manifest_path = tmp_path / "components_manifest.json"
+    manifest_path.write_text(json.dumps(manifest))
+
+    def init(path):
+        settings.ESB_COMPONENTS_MANIFEST_PATH = path
+        mocker.patch.object(base, "_components_manager", None)
+        start_time = time.perf_counter()
+        get_components_manager()
+        return time.perf_counter() - start_time
+
+    scan_cost = init("")
+    manifest_cost = init(str(manifest_path))
+    assert manifest_cost < scan_cost
@@ -28,6 +28,10 @@ pytestmark = pytest.mark.django_db
 
 
 class TestComponentPermValidator:
+    @pytest.fixture(autouse=True)
+    def clear_permission_cache(self):
+        ComponentPermValidator._has_permission.cache.clear()
+
     @pytest.mark.parametrize(
         "apigw_enabled, mock_esb_skip_comp_perm, mock_component_permission_required, mock_has_permission, will_error",
         [
@@ -20,7 +20,11 @@ import jwt
 import pytest
 
 from common.errors import APIError
-from esb.gateway.helpers import JWTClient, is_from_gateway_with_jwt
+from esb.bkapp.models import BKApp
+from esb.bkauth.models import BKUser
+from esb.gateway.helpers import JWTClient, VerifiedJWTCache, is_from_gateway_with_jwt, verified_jwt_cache
+from esb.utils.jwt_utils import JWTClient as JWTEncoder
+from esb.utils.jwt_utils import JWTKey
 
 
 @pytest.mark.parametrize(
@@ -37,6 +41,12 @@ def test_is_from_gateway_with_jwt(mocker, meta, expected):
 
 
 class TestJWTClient:
+    @pytest.fixture(autouse=True)
+    def clear_verified_jwt_cache(self):
+        verified_jwt_cache.clear()
+        yield
+        verified_jwt_cache.clear()
+
     @pytest.fixture
     def mock_request(self, mocker):
         request = mocker.MagicMock(META={})
@@ -82,11 +92,14 @@ class TestJWTClient:
 
         # decode error
         mock_get_public_key = mocker.patch("esb.gateway.helpers.JWTKey.get_public_key", return_value=jwt_public_key)
+        mock_load_public_key = mocker.patch("esb.gateway.helpers.load_public_key")
+        jwt_public_key_object = mock_load_public_key.return_value
         mock_decode = mocker.patch("esb.gateway.helpers.jwt.decode", side_effect=jwt.DecodeError)
         with pytest.raises(APIError):
             client.decode_jwt_content()
         mock_get_public_key.assert_called_once_with()
-        mock_decode.assert_called_once_with(jwt_payload, jwt_public_key, algorithms=["RS512"])
+        mock_load_public_key.assert_called_once_with(jwt_public_key)
+        mock_decode.assert_called_once_with(jwt_payload, jwt_public_key_object, algorithms=["RS512"])
 
         # decode ok
         mock_get_public_key.reset_mock()
@@ -96,5 +109,47 @@ class TestJWTClient:
         )
         client.decode_jwt_content()
         mock_get_public_key.assert_called_once_with()
-        mock_decode.assert_called_once_with(jwt_payload, jwt_public_key, algorithms=["RS512"])
+        mock_decode.assert_called_once_with(jwt_payload, jwt_public_key_object, algorithms=["RS512"])
         assert client.payload == {"app": {"app_code": "my-color", "user": {"username": "admin"}}}
+
+    def test_decode_jwt_content_cached(self, mocker, mock_request):
+        private_key, public_key = JWTKey().generate()
+        mocker.patch("esb.utils.jwt_utils.JWTKey.get_private_key", return_value=private_key.decode())
+        mocker.patch("esb.gateway.helpers.JWTKey.get_public_key", return_value=public_key.decode())
+        token = JWTEncoder(BKApp("test", verified=True), BKUser("admin", verified=True)).encode()
+        mock_request.META = {"HTTP_X_BKAPI_JWT": token}
+
+        client = JWTClient(mock_request)
+        assert client.app["bk_app_code"] == "test"
+
+        mock_decode = mocker.patch("esb.gateway.helpers.jwt.decode")
+        cached_client = JWTClient(mock_request)
+        mock_decode.assert_not_called()
+        assert cached_client.payload == client.payload
+        assert cached_client.payload is not client.payload
+
+
+class TestVerifiedJWTCache:
+    def test_get(self, mocker):
+        cache = VerifiedJWTCache(maxsize=10, ttl=60)
+        now = 1600000000
+        mocker.patch("esb.gateway.helpers.time.time", return_value=now)
+
+        cache.set("token", "public-key", {"app": {}, "exp": now + 1})
+        assert cache.get("token", "public-key") == {"app": {}, "exp": now + 1}
+        assert cache.get("token", "rotated-public-key") is None
+        assert cache.get("other-token", "public-key") is None
+
+    def test_get_expired(self, mocker):
+        cache = VerifiedJWTCache(maxsize=10, ttl=60)
+        now = 1600000000
+        mocker.patch("esb.gateway.helpers.time.time", return_value=now)
+
+        cache.set("token", "public-key", {"app": {}, "exp": now})
+        assert cache.get("token", "public-key") is None
+
+    def test_set_without_exp(self):
+        cache = VerifiedJWTCache(maxsize=10, ttl=60)
+
+        cache.set("token", "public-key", {"app": {}})
+        assert cache.get("token", "public-key") is None
@@ -16,11 +16,15 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 #
+import json
+
 import pytest
 from django.utils.encoding import force_bytes
 
-from esb.outgoing import BasicHttpClient, encode_dict
+from common.errors import RequestRejectedException
+from esb.outgoing import BasicHttpClient, RequestHelperClient, encode_dict
 from esb.utils import SmartHost
+from esb.utils.circuit_breaker import get_circuit_breaker_registry
 
 
 @pytest.mark.parametrize(
@@ -96,3 +100,58 @@ class TestBasicHttpClient(object):
     def test_make_url(self, host, path, use_test_env, expected):
         result = BasicHttpClient.make_url(host, path, use_test_env)
         assert result == expected
+
+    def test_request_rejected_by_circuit_breaker(self, settings, mocker):
+        settings.ESB_CIRCUIT_BREAKER_SYSTEM_CONFIGS = {
+            "CC": {"enabled": True, "min_requests": 2, "failure_rate_threshold": 0.5}
+        }
+        mocker.patch.object(BasicHttpClient, "system_name", new_callable=mocker.PropertyMock, return_value="CC")
+        mock_request = mocker.patch(
+            "esb.outgoing.RequestsWrapper.request",
+            return_value={"text": "", "status_code": 502, "headers": {}, "reason": ""},
+        )
+        mock_sleep = mocker.patch("esb.outgoing.time.sleep")
+        get_circuit_breaker_registry().clear()
+
+        client = BasicHttpClient()
+        client.request("GET", "http://cc.example.com", "/test/")
+        result = client.request("GET", "http://cc.example.com", "/test/", max_retries=1)
+        assert mock_request.call_count == 2
+        assert mock_sleep.call_count == 0
+
+        result = client.request("GET", "http://cc.example.com", "/test/")
+        assert isinstance(result.request_exception, RequestRejectedException)
+        assert mock_request.call_count == 2
+
+        get_circuit_breaker_registry().clear()
+
+    def test_release_circuit_breaker_on_base_exception(self, settings, mocker):
+        settings.ESB_CIRCUIT_BREAKER_SYSTEM_CONFIGS = {"CC": {"enabled": True}}
+        mocker.patch.object(BasicHttpClient, "system_name", new_callable=mocker.PropertyMock, return_value="CC")
+        mocker.patch("esb.outgoing.RequestsWrapper.request", side_effect=KeyboardInterrupt)
+        get_circuit_breaker_registry().clear()
+
+        client = BasicHttpClient()
+        with pytest.raises(KeyboardInterrupt):
+            client.request("GET", "http://cc.example.com", "/test/")
+
+        # 请求被中断时，占用的并发数也需归还
+        assert get_circuit_breaker_registry().get("CC").limiter.in_flight == 0
+
+        get_circuit_breaker_registry().clear()
+
+
+class TestRequestHelperClient:
+    def test_request_log_params_snapshot(self, mocker):
+        mock_logger_api = mocker.patch("esb.outgoing.logger_api")
+        kwargs = {"k1": "v1"}
+
+        client = RequestHelperClient(component=None)
+        result = client.request(lambda **kw: "ok", kwargs=kwargs, is_response_parse=False)
+        assert result == "ok"
+
+        # 日志内容在写入时才构建，请求后修改参数不影响日志内容
+        kwargs["k1"] = "changed"
+        message = mock_logger_api.info.call_args[0][0]
+        log = json.loads(str(message))
+        assert json.loads(log["req_params"]) == {"action": "", "args": [], "kwargs": {"k1": "v1"}}
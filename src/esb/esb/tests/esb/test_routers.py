@@ -28,7 +28,6 @@ class TestGetChannelConf:
     @pytest.fixture(autouse=True)
     def setup_fixtures(self, mocker):
         self.channel_manager = mocker.patch.object(routers, "get_channel_manager").return_value
-        self.components_manager = mocker.patch.object(routers, "get_components_manager").return_value
 
         self.path = ""
         self.request = mocker.MagicMock(method="GET")
@@ -69,20 +68,13 @@ class TestRouterView:
         self.path = "/"
         self.channel_type = "api"
 
-        self.components_manager = mocker.patch.object(routers, "get_components_manager").return_value
         self.channel_manager = mocker.patch.object(routers, "get_channel_manager").return_value
         self.get_channel_conf = mocker.patch.object(routers, "get_channel_conf")
-        self.channel_conf = self.get_channel_conf.return_value = self.make_channel_conf(mocker)
+        self.channel_conf = self.get_channel_conf.return_value
+        self.prepared_route = self.channel_manager.get_prepared_route.return_value
         self.request = mocker.MagicMock(method="GET")
         self.channel_manager.get_rewrite_path_by_path.return_value = None
 
-    def make_channel_conf(self, mocker):
-        channel_conf = mocker.MagicMock()
-
-        channel_conf["channel_route"].is_active = True
-
-        return channel_conf
-
     @pytest.mark.parametrize(
         "path, expected",
         [
@@ -98,53 +90,26 @@ class TestRouterView:
         routers.router_view(self.channel_type, request, path)
         assert request.g.comp_path == expected
 
-    def test_channel_is_not_active(self):
-        self.channel_conf["channel_route"].is_active = False
-        with pytest.raises(APIError, match=r".*inactive channel.*"):
-            routers.router_view(self.channel_type, self.request, self.path)
-
-    def test_comp_cls_not_found(self):
-        self.components_manager.get_comp_by_name.return_value = None
-        esb_channel = self.channel_conf["channel_route"]
-
-        with pytest.raises(APIError, match=r".*component class not found.*"):
-            routers.router_view(self.channel_type, self.request, self.path)
-
-        self.components_manager.get_comp_by_name.assert_called_once()
-
-    def test_set_request_validators(self, mocker):
-        channel_obj = self.channel_conf["classes"][self.channel_type].return_value
-        esb_channel = self.channel_conf["channel_route"]
-        request_validators = [mocker.MagicMock()]
-        esb_channel.request_validators = request_validators
-
+    def test_get_prepared_route(self):
         routers.router_view(self.channel_type, self.request, self.path)
-        channel_obj.set_request_validators.assert_called_once_with(request_validators)
 
-    def test_append_request_validators(self, mocker):
-        channel_obj = self.channel_conf["classes"][self.channel_type].return_value
-        esb_channel = self.channel_conf["channel_route"]
-        request_validators = [mocker.MagicMock()]
-        esb_channel.append_request_validators = request_validators
-
-        routers.router_view(self.channel_type, self.request, self.path)
-        channel_obj.append_request_validators.assert_called_once_with(request_validators)
+        self.channel_manager.get_prepared_route.assert_called_once_with(
+            self.channel_type, self.request.method, self.channel_conf
+        )
+        self.prepared_route.make_channel.assert_called_once_with(self.request.g.comp_path)
 
     def test_timeout_time_from_timeout_handler(self, mocker, faker):
         sys_name = "test"
-        self.components_manager.get_comp_by_name.return_value = mocker.MagicMock(sys_name=sys_name)
-
-        timeout = faker.pyint(min_value=1)
-        esb_channel = self.channel_conf["channel_route"]
-        esb_channel.timeout = timeout
+        self.prepared_route.comp_class = mocker.MagicMock(sys_name=sys_name)
+        self.prepared_route.timeout = faker.pyint(min_value=1)
 
         routers.router_view(self.channel_type, self.request, self.path)
 
-        assert self.request.g.timeout == timeout
+        assert self.request.g.timeout == self.prepared_route.timeout
         assert self.request.g.sys_name == sys_name
 
     def test_handle_request(self):
-        channel_obj = self.channel_conf["classes"][self.channel_type].return_value
+        channel_obj = self.prepared_route.make_channel.return_value
 
         routers.router_view(self.channel_type, self.request, self.path)
 
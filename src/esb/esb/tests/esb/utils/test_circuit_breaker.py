@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import pytest
+
+from common.errors import RequestRejectedException
+from esb.utils.circuit_breaker import (
+    AdaptiveConcurrencyLimiter,
+    CircuitBreakerConfig,
+    CircuitBreakerRegistry,
+    SystemCircuitBreaker,
+)
+
+
+@pytest.fixture
+def config():
+    return CircuitBreakerConfig(
+        enabled=True,
+        window_size=10,
+        min_requests=4,
+        failure_rate_threshold=0.5,
+        open_seconds=30,
+        half_open_max_requests=2,
+        min_concurrency=1,
+        max_concurrency=4,
+        latency_tolerance=2.0,
+    )
+
+
+@pytest.fixture
+def breaker(config):
+    return SystemCircuitBreaker("CC", config)
+
+
+def call(breaker, success=True, latency=0.1):
+    is_probe = breaker.acquire()
+    breaker.release(is_probe, latency, success)
+
+
+class TestCircuitBreakerConfig:
+    def test_from_system(self, settings):
+        settings.ESB_CIRCUIT_BREAKER_ENABLED = False
+        settings.ESB_CIRCUIT_BREAKER_OPEN_SECONDS = 30
+        settings.ESB_CIRCUIT_BREAKER_SYSTEM_CONFIGS = {"CC": {"enabled": True, "open_seconds": 10}}
+
+        cc_config = CircuitBreakerConfig.from_system("CC")
+        assert cc_config.enabled is True
+        assert cc_config.open_seconds == 10
+
+        job_config = CircuitBreakerConfig.from_system("JOB")
+        assert job_config.enabled is False
+        assert job_config.open_seconds == 30
+
+
+class TestAdaptiveConcurrencyLimiter:
+    def test_limit(self, config):
+        limiter = AdaptiveConcurrencyLimiter(config)
+
+        for _ in range(4):
+            assert limiter.try_acquire()
+        assert not limiter.try_acquire()
+
+    def test_decrease_on_failure(self, config):
+        limiter = AdaptiveConcurrencyLimiter(config)
+
+        limiter.try_acquire()
+        limiter.release(0.1, False)
+        assert limiter.limit == pytest.approx(3.6)
+
+    def test_not_decrease_on_occasional_slow_response(self, config):
+        limiter = AdaptiveConcurrencyLimiter(config)
+
+        for latency in [0.1] * 20 + [1] + [0.1] * 5 + [1]:
+            limiter.try_acquire()
+            limiter.release(latency, True)
+
+        assert limiter.limit == 4
+
+    def test_decrease_on_sustained_slow_response(self, config):
+        limiter = AdaptiveConcurrencyLimiter(config)
+
+        for _ in range(20):
+            limiter.try_acquire()
+            limiter.release(0.1, True)
+        assert limiter.limit == 4
+
+        for _ in range(10):
+            limiter.try_acquire()
+            limiter.release(1, True)
+        assert limiter.limit < 4
+
+    def test_increase_on_fast_response(self, config):
+        limiter = AdaptiveConcurrencyLimiter(config)
+        limiter.limit = 2
+
+        limiter.try_acquire()
+        limiter.release(0.1, True)
+        assert limiter.limit == 2.5
+
+    def test_min_limit(self, config):
+        limiter = AdaptiveConcurrencyLimiter(config)
+
+        for _ in range(50):
+            limiter.try_acquire()
+            limiter.release(0.1, False)
+
+        assert limiter.limit == 1
+
+
+class TestSystemCircuitBreaker:
+    def test_open_after_failures(self, breaker):
+        call(breaker, success=True)
+        call(breaker, success=True)
+        call(breaker, success=False)
+        assert breaker.state == SystemCircuitBreaker.CLOSED
+
+        call(breaker, success=False)
+        assert breaker.state == SystemCircuitBreaker.OPEN
+
+        with pytest.raises(RequestRejectedException) as exc_info:
+            breaker.acquire()
+        assert exc_info.value.reason == "circuit_open"
+
+    def test_half_open_probe_succeeded(self, breaker):
+        breaker._open()
+        breaker.opened_at -= 31
+
+        assert breaker.acquire() is True
+        assert breaker.acquire() is True
+        assert breaker.state == SystemCircuitBreaker.HALF_OPEN
+
+        # 探测请求数已达上限
+        with pytest.raises(RequestRejectedException):
+            breaker.acquire()
+
+        breaker.release(True, 0.1, True)
+        assert breaker.state == SystemCircuitBreaker.HALF_OPEN
+        breaker.release(True, 0.1, True)
+        assert breaker.state == SystemCircuitBreaker.CLOSED
+
+    def test_half_open_probe_failed(self, breaker):
+        breaker._open()
+        breaker.opened_at -= 31
+
+        is_probe = breaker.acquire()
+        breaker.release(is_probe, 0.1, False)
+
+        assert breaker.state == SystemCircuitBreaker.OPEN
+        with pytest.raises(RequestRejectedException):
+            breaker.acquire()
+
+    def test_concurrency_limit(self, breaker):
+        for _ in range(4):
+            breaker.acquire()
+
+        with pytest.raises(RequestRejectedException) as exc_info:
+            breaker.acquire()
+        assert exc_info.value.reason == "concurrency_limit"
+
+
+class TestCircuitBreakerRegistry:
+    @pytest.fixture
+    def registry(self):
+        registry = CircuitBreakerRegistry()
+        registry.clear()
+        yield registry
+        registry.clear()
+
+    def test_get(self, settings, registry):
+        settings.ESB_CIRCUIT_BREAKER_ENABLED = False
+        settings.ESB_CIRCUIT_BREAKER_SYSTEM_CONFIGS = {"CC": {"enabled": True}}
+
+        assert registry.get("") is None
+        assert registry.get("JOB") is None
+        assert registry.get("CC") is registry.get("CC")
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import pytest
+import responses
+
+from esb.utils.http_pool import HttpPoolConfig, HttpSessionPool
+
+
+@pytest.fixture
+def session_pool():
+    pool = HttpSessionPool()
+    pool.clear()
+    yield pool
+    pool.clear()
+
+
+class TestHttpPoolConfig:
+    def test_from_system(self, settings):
+        settings.ESB_HTTP_POOL_MAXSIZE = 10
+        settings.ESB_HTTP_POOL_IDLE_TIMEOUT = 60
+        settings.ESB_HTTP_POOL_SYSTEM_CONFIGS = {"CC": {"pool_maxsize": 50, "pool_block": True}}
+
+        assert HttpPoolConfig.from_system("CC") == HttpPoolConfig(pool_maxsize=50, idle_timeout=60, pool_block=True)
+        assert HttpPoolConfig.from_system("JOB") == HttpPoolConfig(pool_maxsize=10, idle_timeout=60)
+
+
+class TestHttpSessionPool:
+    def test_session_reused_by_host(self, session_pool):
+        with session_pool.session("http://cc.example.com/api/a/", system_name="CC") as session_1:
+            pass
+        with session_pool.session("http://cc.example.com/api/b/?x=1", system_name="CC") as session_2:
+            pass
+        with session_pool.session("https://cc.example.com/api/a/", system_name="CC") as session_3:
+            pass
+        with session_pool.session("http://cc.example.com/api/a/", system_name="JOB") as session_4:
+            pass
+
+        assert session_1 is session_2
+        assert session_1 is not session_3
+        assert session_1 is not session_4
+
+    def test_idle_session_evicted(self, settings, session_pool):
+        settings.ESB_HTTP_POOL_IDLE_TIMEOUT = 60
+
+        with session_pool.session("http://cc.example.com/", system_name="CC") as session_1:
+            pass
+
+        pooled = session_pool._sessions[("CC", "http", "cc.example.com")]
+        pooled.last_used_at -= 61
+
+        with session_pool.session("http://cc.example.com/", system_name="CC") as session_2:
+            pass
+
+        assert session_1 is not session_2
+
+    def test_in_flight_session_not_evicted(self, settings, session_pool):
+        settings.ESB_HTTP_POOL_IDLE_TIMEOUT = 60
+
+        with session_pool.session("http://cc.example.com/", system_name="CC") as session_1:
+            pooled = session_pool._sessions[("CC", "http", "cc.example.com")]
+            pooled.last_used_at -= 61
+
+            with session_pool.session("http://cc.example.com/", system_name="CC") as session_2:
+                pass
+
+        assert session_1 is session_2
+
+    @responses.activate
+    def test_cookies_not_persisted(self, session_pool):
+        responses.add(responses.GET, "http://cc.example.com/", headers={"Set-Cookie": "bk_token=leaked; Path=/"})
+
+        with session_pool.session("http://cc.example.com/", system_name="CC") as session:
+            session.get("http://cc.example.com/")
+
+        assert len(session.cookies) == 0
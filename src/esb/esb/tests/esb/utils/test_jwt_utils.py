@@ -22,6 +22,8 @@ import time
 import jwt
 import pytest
 
+from esb.bkapp.models import BKApp
+from esb.bkauth.models import BKUser
 from esb.utils import jwt_utils
 
 
@@ -108,3 +110,43 @@ class TestJWTClient:
             "nbf": now - 300,
             "exp": now + 900,
         }
+
+
+class TestGetSignedJWT:
+    @pytest.fixture(autouse=True)
+    def setup_fixtures(self, mocker):
+        self.private_key, self.public_key = jwt_utils.JWTKey().generate()
+        self.get_private_key = mocker.patch(
+            "esb.utils.jwt_utils.JWTKey.get_private_key",
+            return_value=self.private_key.decode(),
+        )
+        mocker.patch.object(jwt_utils, "_signed_jwt_cache", jwt_utils.TTLCache(maxsize=10, ttl=60))
+
+    def test_cached(self):
+        app = BKApp("test", verified=True)
+
+        token = jwt_utils.get_signed_jwt(app, BKUser("admin", verified=True))
+        assert jwt_utils.get_signed_jwt(app, BKUser("admin", verified=True)) == token
+        assert jwt_utils.get_signed_jwt(app, BKUser("admin", verified=False)) != token
+        assert jwt_utils.get_signed_jwt(app, BKUser("guest", verified=True)) != token
+        assert jwt_utils.get_signed_jwt(BKApp("test", verified=False), BKUser("admin", verified=True)) != token
+
+        payload = jwt.decode(token, self.public_key, algorithms="RS512")
+        assert payload["app"]["bk_app_code"] == "test"
+        assert payload["user"]["bk_username"] == "admin"
+
+    def test_key_rotated(self):
+        app, user = BKApp("test", verified=True), BKUser("admin", verified=True)
+        token = jwt_utils.get_signed_jwt(app, user)
+
+        private_key, public_key = jwt_utils.JWTKey().generate()
+        self.get_private_key.return_value = private_key.decode()
+
+        new_token = jwt_utils.get_signed_jwt(app, user)
+        assert new_token != token
+        assert jwt.decode(new_token, public_key, algorithms="RS512")
+
+    def test_no_private_key(self):
+        self.get_private_key.return_value = ""
+
+        assert jwt_utils.get_signed_jwt(BKApp("test"), BKUser("admin")) == ""
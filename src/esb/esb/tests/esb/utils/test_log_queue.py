@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import json
+import logging
+import time
+
+import pytest
+
+from common.log import LazyJSONMessage
+from esb.utils.log_queue import BatchingQueueHandler
+
+
+def make_record(msg):
+    return logging.makeLogRecord({"name": "api", "levelno": logging.INFO, "msg": msg})
+
+
+class TestLazyJSONMessage:
+    def test_str(self, mocker):
+        builder = mocker.MagicMock(return_value={"a": "x" * 10, "b": "y" * 10})
+
+        message = LazyJSONMessage(builder, truncate_fields=("a",), max_length=5)
+        builder.assert_not_called()
+
+        assert json.loads(str(message)) == {"a": "xxxxx", "b": "y" * 10}
+        assert json.loads(str(message)) == {"a": "xxxxx", "b": "y" * 10}
+        builder.assert_called_once_with()
+
+    def test_str_without_truncate(self):
+        message = LazyJSONMessage(lambda: {"a": "x" * 10}, truncate_fields=("a",), max_length=0)
+        assert json.loads(str(message)) == {"a": "x" * 10}
+
+
+class TestBatchingQueueHandler:
+    @pytest.fixture
+    def handler(self, mocker):
+        mocker.patch.object(BatchingQueueHandler, "_ensure_worker")
+        handler = BatchingQueueHandler("logging.NullHandler", queue_size=4, batch_size=2, flush_interval=0)
+        handler.target = mocker.MagicMock()
+        return handler
+
+    def test_emit_and_flush(self, handler):
+        handler.emit(make_record(LazyJSONMessage(lambda: {"a": 1})))
+        handler.emit(make_record(LazyJSONMessage(lambda: {"a": 2})))
+        handler.emit(make_record("plain"))
+        handler.target.handle.assert_not_called()
+
+        handler.flush()
+
+        messages = [call[0][0].getMessage() for call in handler.target.handle.call_args_list]
+        assert messages == ['{"a": 1}\n{"a": 2}', "plain"]
+
+    def test_emit_queue_full(self, handler):
+        for i in range(6):
+            handler.emit(make_record(str(i)))
+
+        assert handler._queue.qsize() == 4
+
+    def test_emit_sampled(self, handler):
+        handler.sample_rate = 0
+        handler.busy_size = 1
+        handler.emit(make_record("a"))
+        handler.emit(make_record("b"))
+        handler.emit(make_record(LazyJSONMessage(lambda: {}, important=True)))
+
+        assert handler._queue.qsize() == 2
+
+    def test_write_batch_format_error(self, handler):
+        def builder():
+            raise ValueError()
+
+        handler.write_batch([make_record(LazyJSONMessage(builder)), make_record("ok")])
+
+        assert handler.target.handle.call_args[0][0].getMessage() == "ok"
+
+    def test_get_batch(self, handler):
+        for i in range(3):
+            handler.emit(make_record(str(i)))
+
+        assert [record.msg for record in handler._get_batch()] == ["0", "1"]
+        assert [record.msg for record in handler._get_batch()] == ["2"]
+
+    def test_worker(self, mocker):
+        handler = BatchingQueueHandler("logging.NullHandler", flush_interval=0)
+        handler.target = mocker.MagicMock()
+        handler.emit(make_record("a"))
+
+        for _ in range(100):
+            if handler.target.handle.called:
+                break
+            time.sleep(0.01)
+
+        assert handler.target.handle.call_args[0][0].getMessage() == "a"
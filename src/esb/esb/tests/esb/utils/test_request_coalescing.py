@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import threading
+
+import pytest
+
+from common.base_utils import FrozenDict
+from esb.utils.request_coalescing import CoalescingConfig, RequestCoalescer, _Call
+
+
+@pytest.fixture
+def coalescer():
+    coalescer = RequestCoalescer()
+    coalescer.clear()
+    yield coalescer
+    coalescer.clear()
+
+
+class TestCoalescingConfig:
+    @pytest.mark.parametrize(
+        "channel_conf, expected",
+        [
+            ({}, CoalescingConfig()),
+            ({"request_coalescing": None}, CoalescingConfig()),
+            (
+                FrozenDict({"request_coalescing": FrozenDict({"enabled": True, "cache_ttl": 0.5})}),
+                CoalescingConfig(enabled=True, cache_ttl=0.5),
+            ),
+        ],
+    )
+    def test_from_channel_conf(self, channel_conf, expected):
+        assert CoalescingConfig.from_channel_conf(channel_conf) == expected
+
+
+class TestRequestCoalescer:
+    def test_call_shared(self, coalescer):
+        started = threading.Event()
+        finish = threading.Event()
+        calls = []
+
+        def func():
+            calls.append(1)
+            started.set()
+            finish.wait(1)
+            return {"result": True, "data": [1]}
+
+        results = {}
+
+        def leader():
+            results["leader"] = coalescer.call("key", func)
+
+        def follower():
+            results["follower"] = coalescer.call("key", func)
+
+        leader_thread = threading.Thread(target=leader)
+        leader_thread.start()
+        started.wait(1)
+        follower_thread = threading.Thread(target=follower)
+        follower_thread.start()
+        finish.set()
+        leader_thread.join(1)
+        follower_thread.join(1)
+
+        assert len(calls) == 1
+        assert results["leader"] == ({"result": True, "data": [1]}, RequestCoalescer.LEADER)
+        assert results["follower"] == ({"result": True, "data": [1]}, RequestCoalescer.SHARED)
+        assert results["leader"][0] is not results["follower"][0]
+
+    def test_call_error_shared(self, coalescer):
+        call = coalescer._calls["key"] = _Call()
+        call.error = ValueError("error")
+        call.event.set()
+
+        with pytest.raises(ValueError):
+            coalescer.call("key", lambda: {"result": True})
+        coalescer._calls.pop("key")
+
+    def test_call_cached(self, coalescer):
+        value, source = coalescer.call("key", lambda: {"result": True}, cache_ttl=10)
+        assert source == RequestCoalescer.LEADER
+
+        value["request_id"] = "test"
+        assert coalescer.call("key", lambda: {"result": False}, cache_ttl=10) == (
+            {"result": True},
+            RequestCoalescer.CACHED,
+        )
+
+    def test_call_not_cacheable(self, coalescer):
+        coalescer.call("key", lambda: {"result": False}, cache_ttl=10, cacheable=lambda value: value["result"])
+        assert coalescer.call("key", lambda: {"result": True}, cache_ttl=10) == (
+            {"result": True},
+            RequestCoalescer.LEADER,
+        )
+
+    def test_call_cache_expired(self, coalescer):
+        coalescer.call("key", lambda: {"result": True}, cache_ttl=10)
+        value, expires_at = coalescer._cache["key"]
+        coalescer._cache["key"] = (value, expires_at - 11)
+
+        assert coalescer.call("key", lambda: {"result": True, "data": 1})[1] == RequestCoalescer.LEADER
+
+    def test_call_wait_timeout(self, settings, coalescer):
+        settings.ESB_REQUEST_COALESCING_WAIT_TIMEOUT = 0
+        coalescer._calls["key"] = _Call()
+
+        assert coalescer.call("key", lambda: {"result": True}) == ({"result": True}, RequestCoalescer.LEADER)
+        coalescer._calls.pop("key")
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import queue
+import smtplib
+
+import pytest
+
+from esb.utils.smtp_pool import SMTPDeliveryQueue, SMTPSessionPool
+
+KEY = ("smtp.example.com", 25, "admin", False, False)
+
+
+@pytest.fixture
+def pool(settings):
+    settings.ESB_SMTP_POOL_MAXSIZE = 2
+    settings.ESB_SMTP_POOL_IDLE_TIMEOUT = 30
+    settings.ESB_SMTP_POOL_MAX_MESSAGES_PER_SESSION = 100
+
+    pool = SMTPSessionPool()
+    pool.clear()
+    yield pool
+    pool.clear()
+
+
+@pytest.fixture
+def connect(mocker):
+    return mocker.Mock(side_effect=lambda: mocker.MagicMock(spec=smtplib.SMTP))
+
+
+class TestSMTPSessionPool:
+    def test_sendmail_reuse_session(self, pool, connect):
+        for _ in range(3):
+            pool.sendmail(KEY, connect, "admin@example.com", ["a@example.com"], "msg")
+
+        assert connect.call_count == 1
+        session = pool._idle_sessions[KEY][0]
+        assert session.sent_count == 3
+        assert session.smtp.sendmail.call_count == 3
+
+    def test_sendmail_reconnect_when_disconnected(self, pool, connect):
+        pool.sendmail(KEY, connect, "admin@example.com", ["a@example.com"], "msg")
+        stale_smtp = pool._idle_sessions[KEY][0].smtp
+        stale_smtp.sendmail.side_effect = smtplib.SMTPServerDisconnected()
+
+        pool.sendmail(KEY, connect, "admin@example.com", ["a@example.com"], "msg")
+
+        assert connect.call_count == 2
+        assert pool._idle_sessions[KEY][0].smtp is not stale_smtp
+
+    def test_sendmail_error_not_retried(self, pool, mocker):
+        smtp = mocker.MagicMock(spec=smtplib.SMTP)
+        smtp.sendmail.side_effect = smtplib.SMTPRecipientsRefused({})
+        connect = mocker.Mock(return_value=smtp)
+
+        with pytest.raises(smtplib.SMTPRecipientsRefused):
+            pool.sendmail(KEY, connect, "admin@example.com", ["a@example.com"], "msg")
+
+        assert connect.call_count == 1
+        assert not pool._idle_sessions.get(KEY)
+
+    def test_session_closed_after_max_messages(self, settings, pool, connect):
+        settings.ESB_SMTP_POOL_MAX_MESSAGES_PER_SESSION = 2
+
+        for _ in range(3):
+            pool.sendmail(KEY, connect, "admin@example.com", ["a@example.com"], "msg")
+
+        assert connect.call_count == 2
+
+    def test_idle_session_evicted(self, pool, connect):
+        pool.sendmail(KEY, connect, "admin@example.com", ["a@example.com"], "msg")
+        session = pool._idle_sessions[KEY][0]
+        session.last_used_at -= 31
+
+        pool.sendmail(KEY, connect, "admin@example.com", ["a@example.com"], "msg")
+
+        assert connect.call_count == 2
+        session.smtp.quit.assert_called_once_with()
+
+
+class TestSMTPDeliveryQueue:
+    def test_submit(self, settings, pool, connect):
+        settings.ESB_SMTP_QUEUE_WORKERS = 1
+
+        delivery_queue = SMTPDeliveryQueue()
+        futures = [
+            delivery_queue.submit(KEY, connect, "admin@example.com", ["a@example.com"], "msg") for _ in range(5)
+        ]
+
+        for future in futures:
+            assert future.result(timeout=5) is None
+        # 同一个 worker 依次在同一会话上发送
+        assert connect.call_count == 1
+
+    def test_submit_queue_full(self, settings, connect):
+        settings.ESB_SMTP_QUEUE_WORKERS = 0
+        settings.ESB_SMTP_QUEUE_MAXSIZE = 1
+        settings.ESB_SMTP_QUEUE_WAIT_TIMEOUT = 0
+        key = ("full.example.com", 25, "admin", False, False)
+
+        delivery_queue = SMTPDeliveryQueue()
+        delivery_queue.submit(key, connect, "admin@example.com", ["a@example.com"], "msg")
+        # 队列已满时，提交失败，不再无限增长
+        with pytest.raises(queue.Full):
+            delivery_queue.submit(key, connect, "admin@example.com", ["a@example.com"], "msg")
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import socket
+
+import pytest
+
+from esb.utils.thrift_pool import ThriftConnection, ThriftConnectionPool
+
+KEY = ("CacheAPI", "TFramedTransport", "127.0.0.1", 59313)
+
+
+class FakeTransport:
+    def __init__(self):
+        self.opened = True
+
+    def isOpen(self):
+        return self.opened
+
+    def close(self):
+        self.opened = False
+
+
+class FakeSocket:
+    def __init__(self, handle):
+        self.handle = handle
+
+
+@pytest.fixture
+def socket_pair():
+    local, remote = socket.socketpair()
+    yield local, remote
+    local.close()
+    remote.close()
+
+
+@pytest.fixture
+def make_connection(socket_pair):
+    def make_connection(key=KEY):
+        return ThriftConnection(key, FakeSocket(socket_pair[0]), FakeTransport(), object())
+
+    return make_connection
+
+
+@pytest.fixture
+def pool(settings):
+    settings.ESB_THRIFT_POOL_ENABLED = True
+    settings.ESB_THRIFT_POOL_MAXSIZE = 2
+    settings.ESB_THRIFT_POOL_IDLE_TIMEOUT = 60
+
+    pool = ThriftConnectionPool()
+    pool.clear()
+    yield pool
+    pool.clear()
+
+
+class TestThriftConnection:
+    def test_is_alive(self, socket_pair, make_connection):
+        connection = make_connection()
+        assert connection.is_alive()
+
+        # 空闲连接上出现可读数据，说明连接状态异常
+        socket_pair[1].send(b"x")
+        assert not connection.is_alive()
+
+    def test_is_alive_closed(self, make_connection):
+        connection = make_connection()
+        connection.close()
+        assert not connection.is_alive()
+
+
+class TestThriftConnectionPool:
+    def test_reuse(self, pool, make_connection):
+        connection = pool.acquire(KEY, make_connection)
+        pool.release(connection)
+
+        assert pool.acquire(KEY, make_connection) is connection
+        assert pool.acquire(KEY, make_connection) is not connection
+
+    def test_reuse_by_key(self, pool, make_connection):
+        connection = pool.acquire(KEY, make_connection)
+        pool.release(connection)
+
+        other_key = ("CacheAPI", "TFramedTransport", "127.0.0.2", 59313)
+        assert pool.acquire(other_key, lambda: make_connection(other_key)) is not connection
+
+    def test_release_discard(self, pool, make_connection):
+        connection = pool.acquire(KEY, make_connection)
+        pool.release(connection, discard=True)
+
+        assert not connection.transport.isOpen()
+        assert pool.acquire(KEY, make_connection) is not connection
+
+    def test_release_over_maxsize(self, pool, make_connection):
+        connections = [pool.acquire(KEY, make_connection) for _ in range(3)]
+        for connection in connections:
+            pool.release(connection)
+
+        assert not connections[2].transport.isOpen()
+        assert len(pool._idle_connections[KEY]) == 2
+
+    def test_idle_connection_evicted(self, pool, make_connection):
+        connection = pool.acquire(KEY, make_connection)
+        pool.release(connection)
+        connection.last_used_at -= 61
+
+        assert pool.acquire(KEY, make_connection) is not connection
+        assert not connection.transport.isOpen()
+
+    def test_broken_connection_evicted(self, pool, socket_pair, make_connection):
+        connection = pool.acquire(KEY, make_connection)
+        pool.release(connection)
+        socket_pair[1].close()
+
+        assert pool.acquire(KEY, make_connection) is not connection
+
+    def test_disabled(self, settings, pool, make_connection):
+        settings.ESB_THRIFT_POOL_ENABLED = False
+
+        connection = pool.acquire(KEY, make_connection)
+        pool.release(connection)
+
+        assert not connection.transport.isOpen()
+        assert pool.acquire(KEY, make_connection) is not connection
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+#
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - API 网关(BlueKing - APIGateway) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+#
+import threading
+import time
+
+import pytest
+from cachetools.keys import hashkey
+
+from esb.utils.two_tier_cache import TwoTierCache, two_tier_cached
+
+
+@pytest.fixture
+def cache(settings):
+    settings.ESB_AUTH_SHARED_CACHE_ALIAS = ""
+    return TwoTierCache("test", maxsize=10, ttl=60, stale_ttl=30)
+
+
+class TestTwoTierCache:
+    def test_get_or_load(self, mocker, cache):
+        loader = mocker.Mock(return_value="value")
+
+        assert cache.get_or_load("key", loader) == "value"
+        assert cache.get_or_load("key", loader) == "value"
+        assert loader.call_count == 1
+
+    def test_error_not_cached(self, mocker, cache):
+        loader = mocker.Mock(side_effect=[ValueError(), "value"])
+
+        with pytest.raises(ValueError):
+            cache.get_or_load("key", loader)
+        assert cache.get_or_load("key", loader) == "value"
+
+    def test_negative_cache(self, settings, mocker):
+        cache = TwoTierCache("test_negative", maxsize=10, ttl=60, negative_ttl=10, negative_exceptions=(KeyError,))
+        loader = mocker.Mock(side_effect=[KeyError(), ValueError(), "value"])
+
+        for _ in range(2):
+            with pytest.raises(KeyError):
+                cache.get_or_load("a", loader)
+        assert loader.call_count == 1
+
+        # 非指定类型的异常不缓存
+        with pytest.raises(ValueError):
+            cache.get_or_load("b", loader)
+        assert cache.get_or_load("b", loader) == "value"
+
+    def test_single_flight(self, mocker, cache):
+        started = threading.Event()
+        release = threading.Event()
+
+        def loader():
+            started.set()
+            release.wait()
+            return "value"
+
+        loader = mocker.Mock(side_effect=loader)
+        results = []
+        leader = threading.Thread(target=lambda: results.append(cache.get_or_load("key", loader)))
+        leader.start()
+        started.wait(timeout=5)
+
+        followers = [
+            threading.Thread(target=lambda: results.append(cache.get_or_load("key", loader))) for _ in range(3)
+        ]
+        for follower in followers:
+            follower.start()
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(timeout=5)
+
+        assert results == ["value"] * 4
+        assert loader.call_count == 1
+
+    def test_stale_while_revalidate(self, cache):
+        cache.get_or_load("key", lambda: "old")
+        value, fresh_until = cache._local["key"]
+        cache._local["key"] = (value, fresh_until - 61)
+
+        # 过期后先返回旧数据，后台刷新完成后返回新数据
+        assert cache.get_or_load("key", lambda: "new") == "old"
+        for _ in range(100):
+            if cache._local["key"][0] == "new":
+                break
+            time.sleep(0.01)
+        assert cache.get_or_load("key", lambda: "new") == "new"
+
+    def test_stale_entry_dropped_when_refresh_failed(self, mocker, cache):
+        cache.get_or_load("key", lambda: "old")
+        value, fresh_until = cache._local["key"]
+        cache._local["key"] = (value, fresh_until - 61)
+
+        loader = mocker.Mock(side_effect=ValueError())
+        assert cache.get_or_load("key", loader) == "old"
+        for _ in range(100):
+            if "key" not in cache._local:
+                break
+            time.sleep(0.01)
+        with pytest.raises(ValueError):
+            cache.get_or_load("key", loader)
+
+    def test_refresh_concurrency_limited(self, mocker, cache):
+        mocker.patch("esb.utils.two_tier_cache._refresh_slots", threading.BoundedSemaphore(0))
+        cache.get_or_load("key", lambda: "old")
+        value, fresh_until = cache._local["key"]
+        cache._local["key"] = (value, fresh_until - 61)
+
+        # 后台刷新数达到上限时，不再刷新，继续返回旧数据
+        loader = mocker.Mock(return_value="new")
+        assert cache.get_or_load("key", loader) == "old"
+        assert cache.get_or_load("key", loader) == "old"
+        assert loader.call_count == 0
+        assert "key" not in cache._calls
+
+    def test_shared_cache(self, settings, mocker):
+        settings.ESB_AUTH_SHARED_CACHE_ALIAS = "default"
+        loader = mocker.Mock(return_value="value")
+
+        cache_1 = TwoTierCache("test_shared", maxsize=10, ttl=60, stale_ttl=0)
+        cache_2 = TwoTierCache("test_shared", maxsize=10, ttl=60, stale_ttl=0)
+
+        assert cache_1.get_or_load(("app", "secret"), loader) == "value"
+        # 另一进程的进程内缓存为空，从共享缓存中获取
+        assert cache_2.get_or_load(("app", "secret"), loader) == "value"
+        assert loader.call_count == 1
+        assert "secret" not in cache_1._make_shared_key(("app", "secret"))
+
+
+def test_two_tier_cached(mocker, cache):
+    func = mocker.Mock(return_value="value")
+    cached_func = two_tier_cached(cache, key=lambda self, name: hashkey(name))(func)
+
+    assert cached_func(object(), "a") == "value"
+    assert cached_func(object(), "a") == "value"
+    assert func.call_count == 1
+    assert cached_func.cache is cache